@@ -0,0 +1,73 @@
+"""
+Память на столбец схемы: модели ядра (slots, интернирование строк) против обычного dataclass без интернирования,
+каким Column был раньше. Строки создаются заново для каждого столбца, как их возвращает драйвер базы.
+Модели ядра используют dataclass(slots=True), поэтому нужен Python 3.10+.
+
+    python -m src.benchmarks.column_memory --columns 200000
+"""
+import argparse
+import gc
+import tracemalloc
+from dataclasses import dataclass
+from typing import List, Callable, Any
+
+from src.main.core import Column
+
+
+@dataclass
+class PlainColumn:
+    name: str
+    type: str
+    is_primary_key: bool = False
+    is_foreign_key: bool = False
+    is_unique: bool = False
+    is_nullable: bool = True
+
+
+def driver_string(value: str) -> str:
+    """
+    Новый объект строки с тем же значением, как у строк из результата запроса
+    """
+    return "".join(list(value))
+
+
+def generate_columns(factory: Callable[..., Any], column_count: int, type_count: int,
+                     columns_per_table: int) -> List[Any]:
+    return [
+        factory(
+            name=driver_string(f"column_{index % columns_per_table}"),
+            type=driver_string(f"VARCHAR({index % type_count + 1})"),
+            is_primary_key=index % columns_per_table == 0,
+            is_nullable=index % 2 == 1
+        ) for index in range(column_count)
+    ]
+
+
+def measure(name: str, factory: Callable[..., Any], args: argparse.Namespace) -> float:
+    gc.collect()
+    tracemalloc.start()
+    columns = generate_columns(factory, args.columns, args.types, args.columns_per_table)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    per_column = current / len(columns)
+    print(f"  {name:<28} {current / 1024 / 1024:8.1f} МБ  {per_column:7.1f} байт на столбец")
+    del columns
+    return per_column
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Память на столбец схемы")
+    parser.add_argument("--columns", type=int, default=200000)
+    parser.add_argument("--types", type=int, default=40, help="число различных типов столбцов")
+    parser.add_argument("--columns-per-table", type=int, default=20, help="число различных имен столбцов")
+    args = parser.parse_args(argv)
+
+    print(f"{args.columns} столбцов, {args.types} типов, {args.columns_per_table} имен")
+    plain = measure("dataclass без интернирования", PlainColumn, args)
+    core = measure("Column ядра", Column, args)
+    print(f"  экономия: {1 - core / plain:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Размеры SVG диаграмм реальных схем до и после compact_svg.
+
+Принимает снимки схем (.jsonl.gz, см. cli -f snapshot), которые раскладываются Graphviz, или уже готовые SVG:
+
+    python -m src.benchmarks.svg_size prod.jsonl.gz other.svg
+"""
+import argparse
+import gzip
+import time
+from typing import List
+
+from src.main.persistence import SNAPSHOT_EXTENSION, load_snapshot
+from src.main.visualizer import GraphvizDatabaseSchemaVisualizer, compact_svg
+
+
+def load_svg(path: str) -> str:
+    if path.endswith(SNAPSHOT_EXTENSION):
+        snapshot = load_snapshot(path)
+        return GraphvizDatabaseSchemaVisualizer(snapshot.tables).visualize().decode("utf-8")
+
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def measure(path: str) -> None:
+    svg = load_svg(path)
+
+    started = time.perf_counter()
+    compact = compact_svg(svg)
+    compact_seconds = time.perf_counter() - started
+
+    print(path)
+    for name, data in (("исходный", svg), ("compact", compact)):
+        size = len(data.encode("utf-8"))
+        gzipped = len(gzip.compress(data.encode("utf-8"), mtime=0))
+        print(f"  {name:<10} {size:>12,} байт  {size / len(svg.encode('utf-8')):6.1%}  gzip {gzipped:>10,} байт")
+    print(f"  compact_svg: {compact_seconds * 1000:.1f} мс")
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Размеры SVG до и после compact_svg")
+    parser.add_argument("paths", nargs="+", help="снимки схем или файлы SVG")
+    args = parser.parse_args(argv)
+
+    for path in args.paths:
+        measure(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Сборка HTML-меток таблиц: build_table против эталонной build_table_blocks и LabelCache поверх build_table.
+
+    python -m src.benchmarks.table_labels --tables 2000 --columns 20
+"""
+import argparse
+import time
+from typing import List, Callable
+
+from src.main.core import Table, Column
+from src.main.visualizer import build_table, build_table_blocks, LabelCache
+
+
+def generate_tables(table_count: int, column_count: int) -> List[Table]:
+    return [
+        Table(
+            name=f"table_{index}",
+            columns=[
+                Column(
+                    name=f"column_{column}",
+                    type="INTEGER" if column % 3 == 0 else "VARCHAR(255)",
+                    is_primary_key=column == 0,
+                    is_foreign_key=column % 7 == 1,
+                    is_unique=column % 11 == 2,
+                    is_nullable=column % 2 == 1
+                ) for column in range(column_count)
+            ],
+            relations=[]
+        ) for index in range(table_count)
+    ]
+
+
+def measure(name: str, build: Callable[[Table], str], tables: List[Table], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for table in tables:
+            build(table)
+        best = min(best, time.perf_counter() - started)
+
+    print(f"  {name:<24} {best * 1000:10.1f} мс  {best / len(tables) * 1e6:8.2f} мкс на таблицу")
+    return best
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Скорость сборки HTML-меток таблиц")
+    parser.add_argument("--tables", type=int, default=2000)
+    parser.add_argument("--columns", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    tables = generate_tables(args.tables, args.columns)
+    mismatched = [e.name for e in tables if build_table(e) != build_table_blocks(e)]
+    if mismatched:
+        raise SystemExit(f"build_table расходится с build_table_blocks: {', '.join(mismatched[:5])}")
+
+    print(f"{args.tables} таблиц по {args.columns} столбцов, лучшее из {args.repeat}")
+    blocks = measure("build_table_blocks", build_table_blocks, tables, args.repeat)
+    fast = measure("build_table", build_table, tables, args.repeat)
+
+    cache = LabelCache()
+    # Первый проход заполняет кэш, поэтому измеряется отдельно от повторных
+    cold = measure("LabelCache, пустой", cache.get, tables, 1)
+    warm = measure("LabelCache, заполненный", cache.get, tables, args.repeat)
+
+    print(f"  ускорение build_table: {blocks / fast:.1f}x, кэша: {blocks / warm:.1f}x (заполнение {cold / fast:.1f}x "
+          f"от build_table)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+import argparse
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional
+
+from src.main.core import DatabaseSchemaInspector
+from src.main.persistence import Dialect, Connection, create_schema_inspector, load_connection_history, \
+    history_to_db_url, refresh_tables, SnapshotSchemaInspector, SNAPSHOT_EXTENSION, create_snapshot, export_snapshot, \
+    history_to_reflection_options, REFLECTION_WORKERS
+from src.main.persistence.history import HISTORY_PATH
+from src.main.visualizer import GraphvizDatabaseSchemaVisualizer, LayoutEngine, compact_svg
+
+OUTPUT_FORMATS = ('svg', 'dot', 'snapshot')
+
+
+@dataclass
+class TargetOptions:
+    output_directory: str
+    formats: List[str]
+    schemas: Optional[List[str]] = None
+    engine: Optional[LayoutEngine] = None
+    timeout: Optional[float] = None
+    compact: bool = False
+    # Настройки рефлексии; None оставляет значение из истории подключения
+    native_reflection: Optional[bool] = None
+    reflection_workers: Optional[int] = None
+    statement_timeout: Optional[float] = None
+
+
+@dataclass
+class TargetResult:
+    name: str
+    table_count: int = 0
+    reflect_seconds: float = 0
+    render_seconds: float = 0
+    files: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+def get_target_name(history: Dict) -> str:
+    """
+    Имя файлов диаграммы: база, хост и порт, без символов, недопустимых в именах файлов.
+    Для снимка схемы это имя его файла
+    """
+    if 'snapshot' in history:
+        name = os.path.basename(history['snapshot'])
+        for extension in (SNAPSHOT_EXTENSION, '.jsonl'):
+            if name.endswith(extension):
+                name = name[:-len(extension)]
+                break
+    else:
+        name = f"{history['database']}@{history['host']}_{history['port']}"
+    return re.sub(r'[^\w@.-]+', '_', name)
+
+
+def get_target_names(targets: List[Dict]) -> List[str]:
+    """
+    Имена файлов для всех целей. Совпавшие имена (одна база с разными схемами, одноименные снимки из разных
+    каталогов) получают суффикс -2, -3, ..., иначе результаты целей затирали бы друг друга.
+    Имена сравниваются без учета регистра, как на файловых системах Windows и macOS
+    """
+    names: List[str] = []
+    used = set()
+    for target in targets:
+        base_name = get_target_name(target)
+        name = base_name
+        suffix = 1
+        while name.casefold() in used:
+            suffix += 1
+            name = f"{base_name}-{suffix}"
+        used.add(name.casefold())
+        names.append(name)
+
+    return names
+
+
+def generate_target(history: Dict, options: TargetOptions, name: Optional[str] = None) -> TargetResult:
+    """
+    Отражает и отрисовывает одну базу или снимок. Выполняется в отдельном процессе, ошибки возвращаются в результате
+    """
+    result = TargetResult(name=name or get_target_name(history))
+    connection = None
+    try:
+        started = time.perf_counter()
+        schemas = options.schemas if options.schemas is not None else history.get('schemas')
+        source = None
+        if 'snapshot' in history:
+            inspector: DatabaseSchemaInspector = SnapshotSchemaInspector(history['snapshot'])
+        else:
+            db_url = history_to_db_url(history)
+            source = db_url.safe_url
+            connection = Connection(db_url)
+            reflection = history_to_reflection_options(history)
+            if options.native_reflection is not None:
+                reflection.native = options.native_reflection
+            if options.reflection_workers is not None:
+                reflection.workers = options.reflection_workers
+            if options.statement_timeout is not None:
+                reflection.statement_timeout = options.statement_timeout
+            inspector = create_schema_inspector(connection, schemas, reflection)
+        base_path = os.path.join(options.output_directory, result.name)
+
+        if 'snapshot' in options.formats:
+            # Снимку нужны версии таблиц, чтобы обновление из него читало только изменившиеся таблицы
+            tables, versions, _ = refresh_tables(inspector, [], {})
+            path = base_path + SNAPSHOT_EXTENSION
+            export_snapshot(path, create_snapshot(tables, versions), source, schemas)
+            result.files.append(path)
+        else:
+            tables = inspector.get_tables()
+        result.table_count = len(tables)
+        result.reflect_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        # Параллельность уже есть на уровне баз, поэтому компоненты одной схемы раскладываются последовательно
+        visualizer = GraphvizDatabaseSchemaVisualizer(tables, engine=options.engine, timeout=options.timeout)
+        if 'dot' in options.formats:
+            path = base_path + '.dot'
+            with open(path, "w") as f:
+                f.write(visualizer.build_dot())
+            result.files.append(path)
+        if 'svg' in options.formats:
+            svg = visualizer.visualize().decode("utf-8")
+            if options.compact:
+                svg = compact_svg(svg)
+            path = base_path + '.svg'
+            with open(path, "w") as f:
+                f.write(svg)
+            result.files.append(path)
+        result.render_seconds = time.perf_counter() - started
+    except Exception as ex:
+        result.error = f"{type(ex).__name__}: {ex}"
+    finally:
+        if connection is not None:
+            connection.close()
+
+    return result
+
+
+def select_targets(history: List[Dict], connections: Optional[List[str]]) -> List[Dict]:
+    """
+    Выбирает подключения из истории по uuid или имени базы; без списка возвращает всю историю
+    """
+    if not connections:
+        return history
+
+    targets = []
+    for connection in connections:
+        matched = [h for h in history if connection in (h.get('uuid'), h.get('database'))]
+        if not matched:
+            raise ValueError(f"Подключение '{connection}' не найдено в истории")
+        targets.extend(e for e in matched if e not in targets)
+
+    return targets
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="structura",
+        description="Пакетное построение ER-диаграмм без интерфейса"
+    )
+    parser.add_argument("-o", "--output", default="erd", help="каталог для диаграмм")
+    parser.add_argument("-f", "--format", action="append", choices=OUTPUT_FORMATS,
+                        help="формат результата, можно указать несколько раз (по умолчанию svg)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="число параллельных процессов")
+    parser.add_argument("--schema", action="append", dest="schemas", help="схема для чтения, можно несколько")
+    parser.add_argument("--engine", choices=[e.value for e in LayoutEngine], help="движок раскладки")
+    parser.add_argument("--timeout", type=float, help="время на раскладку одним движком, с")
+    parser.add_argument("--compact", action="store_true", help="сжимать SVG")
+
+    reflection_group = parser.add_argument_group("рефлексия")
+    reflection_group.add_argument("--generic-reflection", action="store_true",
+                                  help="читать схему через SQLAlchemy, а не запросами к каталогу базы")
+    reflection_group.add_argument("--reflection-workers", type=int,
+                                  help=f"потоков рефлексии по одной таблице для --generic-reflection "
+                                       f"(по умолчанию пакетные запросы, если диалект их поддерживает, "
+                                       f"иначе {REFLECTION_WORKERS})")
+    reflection_group.add_argument("--statement-timeout", type=float, help="таймаут запроса рефлексии, с")
+
+    history_group = parser.add_argument_group("подключения из истории")
+    history_group.add_argument("--history", default=HISTORY_PATH, help="файл истории подключений")
+    history_group.add_argument("-c", "--connection", action="append", dest="connections",
+                               help="uuid или имя базы из истории; без него обрабатывается вся история")
+
+    snapshot_group = parser.add_argument_group("без подключения")
+    snapshot_group.add_argument("-s", "--snapshot", action="append", dest="snapshots",
+                                help="файл снимка схемы (-f snapshot); можно указать несколько")
+
+    url_group = parser.add_argument_group("одно подключение")
+    url_group.add_argument("--dialect", choices=[e.value for e in Dialect])
+    url_group.add_argument("--host", default="localhost")
+    url_group.add_argument("--port", type=int)
+    url_group.add_argument("--user")
+    url_group.add_argument("--password", default=os.environ.get("STRUCTURA_PASSWORD"),
+                           help="пароль, по умолчанию из STRUCTURA_PASSWORD")
+    url_group.add_argument("--database")
+
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+
+    if args.snapshots:
+        targets = [dict(snapshot=path) for path in args.snapshots]
+    elif args.dialect:
+        if not all([args.port, args.user, args.password, args.database]):
+            print("Для одного подключения нужны --port, --user, --password и --database", file=sys.stderr)
+            return 2
+        targets = [dict(
+            dialect=Dialect.from_value(args.dialect),
+            host=args.host,
+            port=args.port,
+            user=args.user,
+            password=args.password,
+            database=args.database
+        )]
+    else:
+        try:
+            targets = select_targets(load_connection_history(args.history), args.connections)
+        except ValueError as ex:
+            print(ex, file=sys.stderr)
+            return 2
+
+    if not targets:
+        print("Нет подключений для обработки", file=sys.stderr)
+        return 2
+
+    os.makedirs(args.output, exist_ok=True)
+    options = TargetOptions(
+        output_directory=args.output,
+        formats=args.format or ['svg'],
+        schemas=args.schemas,
+        engine=LayoutEngine(args.engine) if args.engine else None,
+        timeout=args.timeout,
+        compact=args.compact,
+        native_reflection=False if args.generic_reflection else None,
+        reflection_workers=args.reflection_workers,
+        statement_timeout=args.statement_timeout
+    )
+
+    started = time.perf_counter()
+    failed = 0
+    with ProcessPoolExecutor(max_workers=max(1, min(args.jobs, len(targets)))) as executor:
+        futures = [
+            executor.submit(generate_target, target, options, name)
+            for target, name in zip(targets, get_target_names(targets))
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            if result.error:
+                failed += 1
+                print(f"[FAIL] {result.name}: {result.error}", file=sys.stderr)
+            else:
+                print(
+                    f"[ OK ] {result.name}: {result.table_count} таблиц, "
+                    f"рефлексия {result.reflect_seconds:.2f} с, отрисовка {result.render_seconds:.2f} с"
+                )
+
+    print(f"Готово: {len(targets) - failed} из {len(targets)} за {time.perf_counter() - started:.2f} с")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,2 +1,4 @@
-from .models import Table, Relation, Column
-from .output_ports import DatabaseSchemaInspector, DatabaseSchemaVisualizer
\ No newline at end of file
+from .models import Table, Relation, Column, qualify
+from .graph import SchemaGraph
+from .progress import Progress, ProgressEvent, ProgressStage, OperationCancelled, report_progress
+from .output_ports import DatabaseSchemaInspector, DatabaseSchemaVisualizer
@@ -0,0 +1,196 @@
+from array import array
+from typing import List, Dict, Optional, Iterable, Callable, Set, Tuple
+
+from src.main.core.models import Table
+
+
+class SchemaGraph:
+    """
+    Граф отношений схемы с целочисленными id вершин. Таблицы получают id по позиции в списке, таблицы вне списка,
+    на которые есть ссылки, следуют за ними в порядке первой ссылки.
+    Ребра хранятся массивами смежности в обе стороны, поэтому соседи и степени вершины доступны без перебора схемы.
+    Строится один раз на отраженную схему
+    """
+
+    def __init__(self, tables: List[Table]):
+        self.tables = tables
+        self.table_count = len(tables)
+        self.names: List[str] = [table.qualified_name for table in tables]
+        self.ids: Dict[str, int] = {name: node for node, name in enumerate(self.names)}
+
+        sources = array('i')
+        targets = array('i')
+        for node, table in enumerate(tables):
+            for relation in table.relations:
+                target = self.ids.get(relation.related_qualified_name)
+                if target is None:
+                    target = len(self.names)
+                    self.names.append(relation.related_qualified_name)
+                    self.ids[relation.related_qualified_name] = target
+                sources.append(node)
+                targets.append(target)
+
+        self.node_count = len(self.names)
+        # Ребро i исходящих списков соответствует отношению i в порядке обхода таблиц и их relations
+        self.out_offsets, self.out_targets = build_adjacency(self.node_count, sources, targets)
+        self.in_offsets, self.in_sources = build_adjacency(self.node_count, targets, sources)
+
+        self.__components: Optional[List[List[int]]] = None
+        self.__strongly_connected_components: Optional[List[List[int]]] = None
+
+    def get_id(self, name: str) -> Optional[int]:
+        return self.ids.get(name)
+
+    def is_table(self, node: int) -> bool:
+        return node < self.table_count
+
+    def get_successors(self, node: int) -> array:
+        return self.out_targets[self.out_offsets[node]:self.out_offsets[node + 1]]
+
+    def get_predecessors(self, node: int) -> array:
+        return self.in_sources[self.in_offsets[node]:self.in_offsets[node + 1]]
+
+    def get_out_degree(self, node: int) -> int:
+        return self.out_offsets[node + 1] - self.out_offsets[node]
+
+    def get_in_degree(self, node: int) -> int:
+        return self.in_offsets[node + 1] - self.in_offsets[node]
+
+    def get_neighborhood(self, node: int, radius: int, outgoing: bool = True, incoming: bool = True) -> Set[int]:
+        """
+        Возвращает вершины не дальше radius шагов от node по выбранным направлениям ребер, включая саму node
+        """
+        visited = {node}
+        frontier = [node]
+        for _ in range(radius):
+            next_frontier = []
+            for current in frontier:
+                neighbors = []
+                if outgoing:
+                    neighbors.extend(self.get_successors(current))
+                if incoming:
+                    neighbors.extend(self.get_predecessors(current))
+                for neighbor in neighbors:
+                    if neighbor not in visited:
+                        visited.add(neighbor)
+                        next_frontier.append(neighbor)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+
+        return visited
+
+    @property
+    def components(self) -> List[List[int]]:
+        """
+        Компоненты слабой связности таблиц, от крупных к мелким
+        """
+        if self.__components is None:
+            self.__components = self.get_components(range(self.table_count))
+        return self.__components
+
+    def get_components(self, sources: Iterable[int],
+                       is_visible: Optional[Callable[[int], bool]] = None) -> List[List[int]]:
+        """
+        Делит вершины sources на компоненты по их исходящим ребрам в видимые вершины. Вершины вне sources
+        только связывают компоненты и в результат не попадают. Компоненты идут от крупных к мелким
+        """
+        sources = list(sources)
+        parents = array('i', range(self.node_count))
+
+        def find(node: int) -> int:
+            while parents[node] != node:
+                parents[node] = parents[parents[node]]
+                node = parents[node]
+            return node
+
+        for source in sources:
+            for target in self.get_successors(source):
+                if is_visible is None or is_visible(target):
+                    parents[find(source)] = find(target)
+
+        components: Dict[int, List[int]] = {}
+        for source in sources:
+            components.setdefault(find(source), []).append(source)
+
+        return sorted(components.values(), key=len, reverse=True)
+
+    @property
+    def strongly_connected_components(self) -> List[List[int]]:
+        """
+        Компоненты сильной связности (циклы ссылок) по алгоритму Тарьяна без рекурсии, включая одиночные вершины
+        """
+        if self.__strongly_connected_components is None:
+            self.__strongly_connected_components = self.__find_strongly_connected_components()
+        return self.__strongly_connected_components
+
+    def __find_strongly_connected_components(self) -> List[List[int]]:
+        indexes = array('i', [-1] * self.node_count)
+        low_links = array('i', [0] * self.node_count)
+        on_stack = bytearray(self.node_count)
+        stack: List[int] = []
+        result: List[List[int]] = []
+        index = 0
+
+        for root in range(self.node_count):
+            if indexes[root] != -1:
+                continue
+
+            # Стек обхода хранит вершину и позицию следующего ребра в ее списке смежности
+            work = [(root, self.out_offsets[root])]
+            indexes[root] = low_links[root] = index
+            index += 1
+            stack.append(root)
+            on_stack[root] = 1
+
+            while work:
+                node, edge = work[-1]
+                if edge < self.out_offsets[node + 1]:
+                    work[-1] = (node, edge + 1)
+                    target = self.out_targets[edge]
+                    if indexes[target] == -1:
+                        indexes[target] = low_links[target] = index
+                        index += 1
+                        stack.append(target)
+                        on_stack[target] = 1
+                        work.append((target, self.out_offsets[target]))
+                    elif on_stack[target]:
+                        low_links[node] = min(low_links[node], indexes[target])
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low_links[parent] = min(low_links[parent], low_links[node])
+
+                if low_links[node] == indexes[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = 0
+                        component.append(member)
+                        if member == node:
+                            break
+                    result.append(component)
+
+        return result
+
+
+def build_adjacency(node_count: int, sources: array, targets: array) -> Tuple[array, array]:
+    """
+    Упаковывает ребра в сжатые списки смежности: соседи вершины v лежат в targets[offsets[v]:offsets[v + 1]]
+    в исходном порядке ребер
+    """
+    offsets = array('i', [0] * (node_count + 1))
+    for source in sources:
+        offsets[source + 1] += 1
+    for node in range(node_count):
+        offsets[node + 1] += offsets[node]
+
+    positions = array('i', offsets)
+    adjacency = array('i', [0] * len(targets))
+    for source, target in zip(sources, targets):
+        adjacency[positions[source]] = target
+        positions[source] += 1
+
+    return offsets, adjacency
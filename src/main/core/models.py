@@ -1,8 +1,24 @@
-from typing import List
+import sys
+from typing import List, Optional
 from dataclasses import dataclass
 
 
-@dataclass
+def qualify(schema: Optional[str], table_name: str) -> str:
+    """
+    Полное имя таблицы: со схемой, если она указана
+    """
+    return f"{schema}.{table_name}" if schema else table_name
+
+
+def intern(value: Optional[str]) -> Optional[str]:
+    """
+    Имена и типы повторяются по всей схеме и между ее снимками, поэтому хранятся одним экземпляром строки
+    """
+    return sys.intern(str(value)) if value is not None else None
+
+
+# slots=True у dataclass появился в Python 3.10, это минимальная поддерживаемая версия
+@dataclass(frozen=True, slots=True)
 class Column:
     name: str
     type: str
@@ -11,17 +27,47 @@ class Column:
     is_unique: bool = False
     is_nullable: bool = True
 
+    def __post_init__(self):
+        object.__setattr__(self, 'name', intern(self.name))
+        object.__setattr__(self, 'type', intern(self.type))
+
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Relation:
     parent_table_name: str
     parent_column_name: str
     related_table_name: str
     related_column_name: str
+    parent_schema: Optional[str] = None
+    related_schema: Optional[str] = None
 
+    def __post_init__(self):
+        for field_name in self.__slots__:
+            object.__setattr__(self, field_name, intern(getattr(self, field_name)))
 
-@dataclass
+    @property
+    def parent_qualified_name(self) -> str:
+        return qualify(self.parent_schema, self.parent_table_name)
+
+    @property
+    def related_qualified_name(self) -> str:
+        return qualify(self.related_schema, self.related_table_name)
+
+
+@dataclass(slots=True)
 class Table:
+    """
+    В отличие от столбцов и отношений не заморожена: при рефлексии списки таблицы заполняются по мере чтения
+    """
     name: str
     columns: List[Column]
     relations: List[Relation]
+    schema: Optional[str] = None
+
+    def __post_init__(self):
+        self.name = intern(self.name)
+        self.schema = intern(self.schema)
+
+    @property
+    def qualified_name(self) -> str:
+        return qualify(self.schema, self.name)
@@ -1,15 +1,39 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Dict, Optional
 
-from src.main.core import Table
+from src.main.core import Table, Progress
 
 
 class DatabaseSchemaInspector(ABC):
+    # Версии таблиц читаются из каталога базы дешевле рефлексии. Если нет, версии получаются только из отраженных
+    # таблиц, и обновление схемы отражает ее целиком один раз вместо чтения версий и затем таблиц
+    catalog_versions: bool = True
+
+    @abstractmethod
+    def get_tables(self, table_names: Optional[List[str]] = None, progress: Optional[Progress] = None) -> List[Table]:
+        """
+        Отражает все таблицы схемы или только перечисленные в table_names (по полным именам таблиц)
+        """
+        pass
+
     @abstractmethod
-    def get_tables(self) -> List[Table]:
+    def get_schema_names(self) -> List[str]:
+        """
+        Возвращает имена пользовательских схем базы данных
+        """
+        pass
+
+    @abstractmethod
+    def get_table_versions(self) -> Dict[str, str]:
+        """
+        Возвращает для каждой таблицы (по полному имени) метку, которая меняется при изменении ее структуры
+        """
         pass
 
 class DatabaseSchemaVisualizer(ABC):
     @abstractmethod
-    def visualize(self):
-        pass
\ No newline at end of file
+    def visualize(self, progress: Optional[Progress] = None) -> bytes:
+        """
+        Возвращает готовую диаграмму в виде SVG
+        """
+        pass
@@ -0,0 +1,60 @@
+import enum
+import threading
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+
+class ProgressStage(enum.Enum):
+    REFLECTING = 'reflecting'
+    LAYOUT = 'layout'
+    READY = 'ready'
+
+
+@dataclass
+class ProgressEvent:
+    stage: ProgressStage
+    done: int = 0
+    total: int = 0
+
+
+class OperationCancelled(Exception):
+    pass
+
+
+class Progress:
+    """
+    Передает события прогресса длительной операции и позволяет отменить ее из другого потока.
+    Отмена срабатывает в ближайшей точке, где операция сообщает о прогрессе или вызывает check()
+    """
+
+    def __init__(self, on_event: Optional[Callable[[ProgressEvent], None]] = None):
+        self.on_event = on_event
+        self.cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        self.cancelled.set()
+
+    def is_cancelled(self) -> bool:
+        return self.cancelled.is_set()
+
+    def check(self) -> None:
+        if self.cancelled.is_set():
+            raise OperationCancelled()
+
+    def child(self, on_event: Optional[Callable[[ProgressEvent], None]]) -> "Progress":
+        """
+        Прогресс части операции со своим обработчиком событий и общей с родителем отменой
+        """
+        progress = Progress(on_event)
+        progress.cancelled = self.cancelled
+        return progress
+
+    def report(self, stage: ProgressStage, done: int = 0, total: int = 0) -> None:
+        self.check()
+        if self.on_event:
+            self.on_event(ProgressEvent(stage=stage, done=done, total=total))
+
+
+def report_progress(progress: Optional[Progress], stage: ProgressStage, done: int = 0, total: int = 0) -> None:
+    if progress is not None:
+        progress.report(stage, done, total)
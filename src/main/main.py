@@ -1,6 +1,8 @@
 import flet as ft
 
+from src.main.persistence import engine_registry
 from src.main.ui import app
 
 if __name__ == "__main__":
-    ft.app(target=app)
\ No newline at end of file
+    ft.app(target=app)
+    engine_registry.dispose_all()
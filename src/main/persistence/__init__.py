@@ -1,2 +1,13 @@
+from .paths import get_user_cache_dir
 from .connection import Dialect, Connection, DatabaseURL
-from .inspector import SQLAlchemyDatabaseSchemaInspector
\ No newline at end of file
+from .engine_registry import EngineRegistry, engine_registry
+from .inspector import SQLAlchemyDatabaseSchemaInspector
+from .postgresql_inspector import PostgreSQLDatabaseSchemaInspector
+from .mysql_inspector import MySQLDatabaseSchemaInspector
+from .factory import create_schema_inspector, ReflectionOptions, REFLECTION_WORKERS
+from .schema_cache import SchemaCache, SchemaSnapshot
+from .incremental import SchemaChanges, detect_changes, merge_tables, refresh_tables
+from .history import save_connection_history, load_connection_history, history_to_db_url, \
+    history_to_reflection_options
+from .snapshot import SnapshotSchemaInspector, SnapshotError, SNAPSHOT_EXTENSION, create_snapshot, export_snapshot, \
+    load_snapshot, iter_snapshot
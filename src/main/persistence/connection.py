@@ -39,6 +39,7 @@ class DatabaseURL:
         self.database = database
 
         self.url = f"{self.dialect_driver}://{self.user}:{self.password}@{self.host}:{self.port}/{self.database}"
+        self.safe_url = f"{self.dialect_driver}://{self.user}@{self.host}:{self.port}/{self.database}"
 
     def __str__(self):
         return self.url
@@ -49,7 +50,8 @@ class DatabaseURL:
 
 
 class Connection:
-    def __init__(self, db_url: DatabaseURL):
+    def __init__(self, db_url: DatabaseURL, **engine_options):
+        self.dialect = db_url.dialect
         self.engine = create_engine(URL.create(
             drivername=db_url.dialect_driver,
             username=db_url.user,
@@ -57,7 +59,7 @@ class Connection:
             host=db_url.host,
             port=db_url.port,
             database=db_url.database,
-        ))
+        ), **engine_options)
 
     def get_engine(self) -> Engine:
         return self.engine
@@ -0,0 +1,114 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Set
+
+from src.main.persistence import Connection, DatabaseURL
+
+
+class EngineRegistry:
+    """
+    Хранит по одному пулу соединений на каждый DatabaseURL на все время работы процесса.
+    Пулы, которыми не пользовались дольше idle_timeout секунд, закрываются при следующем обращении к реестру.
+    Пул, занятый через acquire, не закрывается, пока его не освободят
+    """
+
+    def __init__(self, pool_size: int = 5, max_overflow: int = 10, pool_pre_ping: bool = True,
+                 pool_recycle: int = 1800, idle_timeout: float = 600):
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.pool_pre_ping = pool_pre_ping
+        self.pool_recycle = pool_recycle
+        self.idle_timeout = idle_timeout
+
+        self.connections: Dict[str, Connection] = {}
+        self.last_used: Dict[str, float] = {}
+        # Число незавершенных acquire на каждый пул
+        self.holders: Dict[Connection, int] = {}
+        # Пулы, удаленные из реестра во время использования; закрываются при освобождении
+        self.retired: Set[Connection] = set()
+        self.lock = threading.Lock()
+
+    def get(self, db_url: DatabaseURL) -> Connection:
+        """
+        Возвращает пул для короткого обращения. Для долгих операций используется acquire
+        """
+        with self.lock:
+            return self.__get(db_url)
+
+    @contextmanager
+    def acquire(self, db_url: DatabaseURL) -> Iterator[Connection]:
+        """
+        Выдает пул на время блока with; пока блок выполняется, пул не будет закрыт как простаивающий
+        """
+        with self.lock:
+            connection = self.__get(db_url)
+            self.holders[connection] = self.holders.get(connection, 0) + 1
+        try:
+            yield connection
+        finally:
+            self.__release(db_url.url, connection)
+
+    def dispose(self, db_url: DatabaseURL) -> None:
+        with self.lock:
+            self.__dispose(db_url.url)
+
+    def dispose_all(self) -> None:
+        with self.lock:
+            for key in list(self.connections):
+                self.__dispose(key)
+            # При завершении работы закрываются и занятые пулы, чтобы ни одно соединение не осталось открытым
+            for connection in self.retired:
+                connection.close()
+            self.retired.clear()
+
+    def __get(self, db_url: DatabaseURL) -> Connection:
+        self.__dispose_idle()
+
+        connection = self.connections.get(db_url.url)
+        if connection is None:
+            connection = Connection(
+                db_url,
+                pool_size=self.pool_size,
+                max_overflow=self.max_overflow,
+                pool_pre_ping=self.pool_pre_ping,
+                pool_recycle=self.pool_recycle
+            )
+            self.connections[db_url.url] = connection
+
+        self.last_used[db_url.url] = time.monotonic()
+        return connection
+
+    def __release(self, key: str, connection: Connection) -> None:
+        with self.lock:
+            count = self.holders.get(connection, 0) - 1
+            if count > 0:
+                self.holders[connection] = count
+                return
+
+            self.holders.pop(connection, None)
+            if connection in self.retired:
+                self.retired.discard(connection)
+                connection.close()
+            elif self.connections.get(key) is connection:
+                # Простой отсчитывается от окончания последней операции, а не от ее начала
+                self.last_used[key] = time.monotonic()
+
+    def __dispose_idle(self) -> None:
+        now = time.monotonic()
+        for key, last_used in list(self.last_used.items()):
+            if now - last_used > self.idle_timeout and self.connections.get(key) not in self.holders:
+                self.__dispose(key)
+
+    def __dispose(self, key: str) -> None:
+        connection = self.connections.pop(key, None)
+        self.last_used.pop(key, None)
+        if connection is None:
+            return
+        if connection in self.holders:
+            self.retired.add(connection)
+        else:
+            connection.close()
+
+
+engine_registry = EngineRegistry()
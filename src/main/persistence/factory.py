@@ -0,0 +1,45 @@
+from dataclasses import dataclass
+from typing import List, Optional
+
+from src.main.core import DatabaseSchemaInspector
+from src.main.persistence import Connection, Dialect
+from src.main.persistence.inspector import SQLAlchemyDatabaseSchemaInspector, supports_bulk_reflection
+from src.main.persistence.mysql_inspector import MySQLDatabaseSchemaInspector
+from src.main.persistence.postgresql_inspector import PostgreSQLDatabaseSchemaInspector
+
+# Потоков рефлексии по одной таблице, если у диалекта нет пакетных запросов к каталогу
+REFLECTION_WORKERS = 8
+
+
+@dataclass
+class ReflectionOptions:
+    """
+    native=False отключает собственные запросы к каталогу PostgreSQL и MySQL, например, при ограниченных правах
+    на системные представления. workers задает число потоков рефлексии по одной таблице в общем инспекторе,
+    statement_timeout ограничивает время каждого запроса этих потоков в секундах
+    """
+    native: bool = True
+    workers: Optional[int] = None
+    statement_timeout: Optional[float] = None
+
+
+def create_schema_inspector(connection: Connection, schemas: Optional[List[str]] = None,
+                            options: Optional[ReflectionOptions] = None) -> DatabaseSchemaInspector:
+    """
+    Выбирает самый быстрый инспектор схемы для диалекта подключения.
+    Без schemas читается только схема по умолчанию. Общий инспектор отражает схему пакетными запросами,
+    если диалект их поддерживает и число потоков не задано явно, иначе по одной таблице в пуле потоков
+    """
+    options = options or ReflectionOptions()
+    if options.native and connection.dialect == Dialect.POSTGRESQL:
+        return PostgreSQLDatabaseSchemaInspector(connection, schemas)
+    if options.native and connection.dialect in (Dialect.MYSQL, Dialect.MARIADB):
+        return MySQLDatabaseSchemaInspector(connection, schemas)
+
+    return SQLAlchemyDatabaseSchemaInspector(
+        connection,
+        bulk=options.workers is None and supports_bulk_reflection(connection.engine),
+        workers=options.workers or REFLECTION_WORKERS,
+        statement_timeout=options.statement_timeout,
+        schemas=schemas
+    )
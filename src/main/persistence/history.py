@@ -0,0 +1,54 @@
+import json
+import os
+import uuid
+from typing import List, Dict
+
+from src.main.persistence import Dialect, DatabaseURL, ReflectionOptions
+
+HISTORY_PATH = "connections.json"
+
+
+def save_connection_history(history: List[Dict], path: str = HISTORY_PATH) -> None:
+    serializable_history: List[Dict] = []
+
+    for h in history:
+        h_copy: Dict = h.copy()
+        if 'uuid' not in h_copy:
+            h_copy['uuid'] = str(uuid.uuid4())
+        if 'dialect' in h_copy:
+            h_copy['dialect'] = h_copy['dialect'].value
+        serializable_history.append(h_copy)
+
+    with open(path, "w") as f:
+        json.dump(serializable_history, f)
+
+
+def load_connection_history(path: str = HISTORY_PATH) -> List[Dict]:
+    if not os.path.exists(path):
+        return []
+    with open(path, "r") as f:
+        history: List[Dict] = json.load(f)
+
+    # Конвертируем строки обратно в Dialect и добавляем UUID если отсутствует
+    for h in history:
+        if 'dialect' in h:
+            h['dialect'] = Dialect.from_value(h['dialect'])
+        # Add UUID if not present (for backward compatibility)
+        if 'uuid' not in h:
+            h['uuid'] = str(uuid.uuid4())
+
+    return history
+
+
+def history_to_db_url(history: Dict) -> DatabaseURL:
+    return DatabaseURL(
+        history['dialect'], history['user'], history['password'], history['host'], history['port'], history['database']
+    )
+
+
+def history_to_reflection_options(history: Dict) -> ReflectionOptions:
+    return ReflectionOptions(
+        native=history.get('native_reflection', True),
+        workers=history.get('reflection_workers'),
+        statement_timeout=history.get('statement_timeout')
+    )
@@ -0,0 +1,85 @@
+from dataclasses import dataclass, field
+from typing import List, Dict, Tuple, Optional
+
+from src.main.core import DatabaseSchemaInspector, Table, Progress, ProgressStage, report_progress
+from src.main.persistence.inspector import sort_tables_by_related_count
+from src.main.persistence.serialization import table_fingerprint
+
+
+@dataclass
+class SchemaChanges:
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    dropped: List[str] = field(default_factory=list)
+
+    def is_empty(self) -> bool:
+        return not (self.added or self.changed or self.dropped)
+
+
+def detect_changes(previous_versions: Dict[str, str], current_versions: Dict[str, str]) -> SchemaChanges:
+    return SchemaChanges(
+        added=sorted(name for name in current_versions if name not in previous_versions),
+        changed=sorted(
+            name for name, version in current_versions.items()
+            if name in previous_versions and previous_versions[name] != version
+        ),
+        dropped=sorted(name for name in previous_versions if name not in current_versions)
+    )
+
+
+def merge_tables(previous_tables: List[Table], reflected_tables: List[Table], changes: SchemaChanges) -> List[Table]:
+    """
+    Заменяет в прошлом списке таблиц измененные, добавляет новые и убирает удаленные
+    """
+    removed = set(changes.changed) | set(changes.dropped)
+    tables = {table.qualified_name: table for table in previous_tables if table.qualified_name not in removed}
+    for table in reflected_tables:
+        tables[table.qualified_name] = table
+
+    merged = [tables[name] for name in sorted(tables)]
+    sort_tables_by_related_count(merged)
+
+    return merged
+
+
+def refresh_tables(inspector: DatabaseSchemaInspector, previous_tables: List[Table], previous_versions: Dict[str, str],
+                   progress: Optional[Progress] = None) -> Tuple[List[Table], Dict[str, str], SchemaChanges]:
+    """
+    Перечитывает только таблицы, изменившиеся с прошлой рефлексии. Без прошлых версий отражает схему целиком
+    """
+    if not inspector.catalog_versions:
+        return refresh_tables_by_reflection(inspector, previous_tables, previous_versions, progress)
+
+    # Версии читаются до таблиц: изменение между запросами обнаружится при следующем обновлении
+    report_progress(progress, ProgressStage.REFLECTING)
+    current_versions = inspector.get_table_versions()
+    changes = detect_changes(previous_versions, current_versions)
+
+    if not previous_versions:
+        return inspector.get_tables(progress=progress), current_versions, changes
+
+    if changes.is_empty():
+        return previous_tables, current_versions, changes
+
+    reflected_tables = inspector.get_tables(changes.added + changes.changed, progress)
+
+    return merge_tables(previous_tables, reflected_tables, changes), current_versions, changes
+
+
+def refresh_tables_by_reflection(
+        inspector: DatabaseSchemaInspector,
+        previous_tables: List[Table],
+        previous_versions: Dict[str, str],
+        progress: Optional[Progress] = None
+) -> Tuple[List[Table], Dict[str, str], SchemaChanges]:
+    """
+    Для инспекторов без версий в каталоге: схема отражается один раз, версиями служат хэши отраженных таблиц
+    """
+    tables = inspector.get_tables(progress=progress)
+    current_versions = {table.qualified_name: table_fingerprint(table) for table in tables}
+    changes = detect_changes(previous_versions, current_versions)
+
+    if previous_versions and changes.is_empty():
+        return previous_tables, current_versions, changes
+
+    return tables, current_versions, changes
@@ -1,80 +1,345 @@
-from typing import List
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional
 
-from sqlalchemy import inspect
-from sqlalchemy.engine.interfaces import ReflectedColumn, ReflectedForeignKeyConstraint
+from sqlalchemy import inspect, Inspector, Engine
+from sqlalchemy import Connection as SQLAlchemyConnection
+from sqlalchemy.engine.default import DefaultDialect
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.engine.interfaces import ReflectedColumn, ReflectedForeignKeyConstraint, ReflectedPrimaryKeyConstraint, \
+    ReflectedIndex
 
-from src.main.core import DatabaseSchemaInspector, Table, Column, Relation
+from src.main.core import DatabaseSchemaInspector, Table, Column, Relation, Progress, ProgressEvent, ProgressStage, \
+    report_progress, SchemaGraph
 from src.main.persistence import Connection
+from src.main.persistence.serialization import table_fingerprint
+
+
+SYSTEM_SCHEMAS = {'information_schema', 'pg_catalog', 'pg_toast', 'mysql', 'performance_schema', 'sys'}
 
 
 class SQLAlchemyDatabaseSchemaInspector(DatabaseSchemaInspector):
-    def __init__(self, connection: Connection):
-        self.inspector = inspect(connection.engine)
+    """
+    При bulk=False таблицы отражаются по одной; при workers > 1 это делается параллельно в пуле потоков,
+    где каждый поток берет свое соединение из пула движка. statement_timeout задается в секундах.
+    Если переданы schemas, до schema_workers схем отражаются одновременно, а таблицы получают полные имена.
+    Всего одновременно используется не больше max_connections соединений, по умолчанию это емкость пула движка
+    """
+
+    catalog_versions = False
+
+    def __init__(self, connection: Connection, bulk: bool = True, workers: int = 1,
+                 statement_timeout: Optional[float] = None, schemas: Optional[List[str]] = None,
+                 schema_workers: int = 8, max_connections: Optional[int] = None):
+        self.engine = connection.engine
+        self.bulk = bulk
+        self.workers = workers
+        self.statement_timeout = statement_timeout
+        self.schemas = schemas
+        self.schema_workers = schema_workers
+        if max_connections is None:
+            max_connections = get_pool_capacity(connection.engine)
+        self.max_connections = max_connections
+
+    def get_tables(self, table_names: Optional[List[str]] = None, progress: Optional[Progress] = None) -> List[Table]:
+        if self.schemas is None:
+            workers = self.workers if self.max_connections is None else min(self.workers, self.max_connections)
+            # Inspector кэширует прочитанное в info_cache, поэтому на каждый вызов создается новый, иначе повторная
+            # рефлексия вернула бы схему на момент первой
+            tables = self.__get_schema_tables(inspect(self.engine), None, table_names, progress, workers)
+        else:
+            tables = self.__get_tables_multi_schema(table_names, progress)
+
+        sort_tables_by_related_count(tables)
+
+        return tables
+
+    def get_schema_names(self) -> List[str]:
+        return [e for e in inspect(self.engine).get_schema_names() if e not in SYSTEM_SCHEMAS]
+
+    def get_table_versions(self) -> Dict[str, str]:
+        """
+        Общий слой рефлексии не знает о служебных метках каталога, поэтому версией служит хэш отраженной таблицы
+        """
+        return {table.qualified_name: table_fingerprint(table) for table in self.get_tables()}
+
+    def __get_tables_multi_schema(self, table_names: Optional[List[str]], progress: Optional[Progress]) -> List[Table]:
+        """
+        Отражает выбранные схемы параллельно, каждую через свое соединение. Прогресс суммируется по всем схемам.
+        Потоки таблиц делят между схемами оставшиеся соединения, поэтому их общее число не превышает max_connections
+        """
+        schema_threads = max(1, min(len(self.schemas), self.schema_workers))
+        workers = self.workers
+        if self.max_connections is not None:
+            schema_threads = max(1, min(schema_threads, self.max_connections))
+            # Каждая схема держит одно соединение сама, и еще по одному держит каждый ее поток таблиц
+            workers = min(workers, self.max_connections // schema_threads - 1)
+
+        requested = group_table_names_by_schema(table_names, self.schemas) if table_names is not None else None
+        lock = threading.Lock()
+        done: Dict[str, int] = {}
+        totals: Dict[str, int] = {}
+
+        def schema_progress(schema: str) -> Optional[Progress]:
+            if progress is None:
+                return None
+
+            def on_event(event: ProgressEvent) -> None:
+                with lock:
+                    done[schema] = event.done
+                    totals[schema] = event.total
+                    progress.report(ProgressStage.REFLECTING, sum(done.values()), sum(totals.values()))
+
+            return progress.child(on_event)
 
-    def get_tables(self) -> List[Table]:
-        table_names = self.__get_table_names()
+        def reflect_schema(schema: str) -> List[Table]:
+            schema_table_names = None if requested is None else requested.get(schema, [])
+            if schema_table_names == []:
+                return []
+            with self.engine.connect() as conn:
+                return self.__get_schema_tables(inspect(conn), schema, schema_table_names, schema_progress(schema),
+                                                workers)
+
+        with ThreadPoolExecutor(max_workers=schema_threads) as executor:
+            results = list(executor.map(reflect_schema, self.schemas))
+
+        return [table for schema_tables in results for table in schema_tables]
+
+    def __get_schema_tables(self, inspector: Inspector, schema: Optional[str], table_names: Optional[List[str]],
+                            progress: Optional[Progress], workers: int) -> List[Table]:
+        """
+        Отражает таблицы одной схемы; schema=None означает схему по умолчанию без полных имен.
+        Без пакетных запросов таблицы отражаются в workers потоках, при workers <= 1 последовательно через inspector
+        """
+        existing_names = inspector.get_table_names(schema=schema)
+        if table_names is not None:
+            requested = set(table_names)
+            existing_names = [e for e in existing_names if e in requested]
+
+        # Ссылки без схемы ведут в схему по умолчанию, ее имя нужно только при явном выборе схем
+        default_schema = None if schema is None else inspector.default_schema_name
+
+        report_progress(progress, ProgressStage.REFLECTING, 0, len(existing_names))
+
+        if self.bulk:
+            return self.__get_tables_bulk(inspector, schema, default_schema, existing_names, table_names, progress)
+        if workers > 1:
+            return self.__get_tables_parallel(schema, default_schema, existing_names, progress, workers)
+
+        tables = []
+        for table_name in existing_names:
+            tables.append(reflect_table(inspector, table_name, schema, default_schema))
+            report_progress(progress, ProgressStage.REFLECTING, len(tables), len(existing_names))
+        return tables
+
+    def __get_tables_bulk(self, inspector: Inspector, schema: Optional[str], default_schema: Optional[str],
+                          table_names: List[str], filter_names: Optional[List[str]],
+                          progress: Optional[Progress]) -> List[Table]:
+        """
+        Отражает всю схему фиксированным числом запросов, независимо от количества таблиц.
+        filter_names ограничивает запросы к каталогу перечисленными таблицами
+        """
+        columns = inspector.get_multi_columns(schema=schema, filter_names=filter_names)
+        report_progress(progress, ProgressStage.REFLECTING, 0, len(table_names))
+        pk_constraints = inspector.get_multi_pk_constraint(schema=schema, filter_names=filter_names)
+        report_progress(progress, ProgressStage.REFLECTING, 0, len(table_names))
+        foreign_keys = inspector.get_multi_foreign_keys(schema=schema, filter_names=filter_names)
+        report_progress(progress, ProgressStage.REFLECTING, 0, len(table_names))
+        indexes = inspector.get_multi_indexes(schema=schema, filter_names=filter_names)
 
         tables = []
-        all_relations = []
         for table_name in table_names:
-            columns = self.__get_all_columns(table_name)
-            relations = self.__get_foreign_keys(table_name)
-            all_relations.extend(relations)
-
-            tables.append(Table(
-                name=table_name,
-                columns=columns,
-                relations=relations
+            key = (schema, table_name)
+            tables.append(map_reflected_table_to_table(
+                table_name,
+                columns.get(key, []),
+                pk_constraints.get(key, {}),
+                foreign_keys.get(key, []),
+                indexes.get(key, []),
+                schema,
+                default_schema
             ))
 
-        related_count = {}
-        for relation in all_relations:
-            related_table = relation.related_table_name
-            related_count[related_table] = related_count.get(related_table, 0) + 1
-
-        tables.sort(key=lambda table: related_count.get(table.name, 0))
+        report_progress(progress, ProgressStage.REFLECTING, len(tables), len(table_names))
 
         return tables
 
-    def __get_table_names(self) -> List[str]:
-        return self.inspector.get_table_names()
-
-    def __get_all_columns(self, table_name: str) -> List[Column]:
-        reflected_columns = self.inspector.get_columns(table_name)
-        pk_columns = self.__get_primary_key_columns(table_name)
-        fk_columns = self.__get_foreign_key_columns(table_name)
-        unique_columns = self.__get_unique_columns(table_name)
-        
-        return [map_reflected_column_to_column(e, pk_columns, fk_columns, unique_columns) for e in reflected_columns]
-
-    def __get_primary_key_columns(self, table_name: str) -> List[str]:
-        pk_constraint = self.inspector.get_pk_constraint(table_name)
-        return pk_constraint.get('constrained_columns', [])
-
-    def __get_foreign_key_columns(self, table_name: str) -> List[str]:
-        foreign_keys = self.inspector.get_foreign_keys(table_name)
-        fk_columns = []
-        for fk in foreign_keys:
-            fk_columns.extend(fk.get('constrained_columns', []))
-        return fk_columns
-
-    def __get_unique_columns(self, table_name: str) -> List[str]:
-        indexes = self.inspector.get_indexes(table_name)
-        unique_columns = []
-        for index in indexes:
-            if index.get('unique', False):
-                unique_columns.extend(index.get('column_names', []))
-        return unique_columns
-
-    def __get_foreign_keys(self, table_name: str) -> List[Relation]:
-        foreign_keys = self.inspector.get_foreign_keys(table_name)
-        return [map_foreign_key_to_relation(table_name, e) for e in foreign_keys]
+    def __get_tables_parallel(self, schema: Optional[str], default_schema: Optional[str], table_names: List[str],
+                              progress: Optional[Progress], workers: int) -> List[Table]:
+        """
+        Отражает таблицы в пуле потоков. Результат сохраняет порядок table_names
+        """
+        local = threading.local()
+        lock = threading.Lock()
+        connections: List[SQLAlchemyConnection] = []
+        done = 0
+
+        def reflect(table_name: str) -> Table:
+            nonlocal done
+            if progress is not None:
+                progress.check()
+
+            inspector = getattr(local, 'inspector', None)
+            if inspector is None:
+                conn = self.engine.connect()
+                with lock:
+                    connections.append(conn)
+                set_statement_timeout(conn, self.statement_timeout)
+                inspector = local.inspector = inspect(conn)
+
+            table = reflect_table(inspector, table_name, schema, default_schema)
+            with lock:
+                done += 1
+                report_progress(progress, ProgressStage.REFLECTING, done, len(table_names))
+            return table
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(reflect, table_names))
+        finally:
+            for conn in connections:
+                release_connection(conn)
+
+
+def reflect_table(inspector: Inspector, table_name: str, schema: Optional[str] = None,
+                  default_schema: Optional[str] = None) -> Table:
+    """
+    Отражает одну таблицу отдельными запросами к каталогу
+    """
+    return map_reflected_table_to_table(
+        table_name,
+        inspector.get_columns(table_name, schema=schema),
+        inspector.get_pk_constraint(table_name, schema=schema),
+        inspector.get_foreign_keys(table_name, schema=schema),
+        inspector.get_indexes(table_name, schema=schema),
+        schema,
+        default_schema
+    )
+
+
+def set_statement_timeout(conn: SQLAlchemyConnection, timeout: Optional[float]) -> None:
+    """
+    Ограничивает время выполнения запросов в сессии соединения, None возвращает значение по умолчанию.
+    В MySQL max_execution_time действует только на SELECT, поэтому SHOW-запросы рефлексии не ограничиваются
+    """
+    if timeout is None and conn.info.get('statement_timeout') is None:
+        return
+
+    if conn.dialect.name == 'postgresql':
+        value = 'DEFAULT' if timeout is None else str(int(timeout * 1000))
+        conn.exec_driver_sql(f"SET statement_timeout = {value}")
+    elif getattr(conn.dialect, 'is_mariadb', False):
+        value = 'DEFAULT' if timeout is None else str(timeout)
+        conn.exec_driver_sql(f"SET SESSION max_statement_time = {value}")
+    elif conn.dialect.name == 'mysql':
+        value = 'DEFAULT' if timeout is None else str(int(timeout * 1000))
+        conn.exec_driver_sql(f"SET SESSION max_execution_time = {value}")
+
+    conn.info['statement_timeout'] = timeout
+
+
+def release_connection(conn: SQLAlchemyConnection) -> None:
+    """
+    Снимает ограничение времени запросов и возвращает соединение в пул. В PostgreSQL SET транзакционный
+    и отменяется откатом при закрытии, даже если транзакция уже прервана по таймауту. В MySQL сессионную
+    настройку нужно сбросить явно; соединение, на котором это не удалось, из пула удаляется
+    """
+    try:
+        if conn.dialect.name == 'postgresql':
+            conn.info.pop('statement_timeout', None)
+        else:
+            set_statement_timeout(conn, None)
+    except SQLAlchemyError:
+        conn.info.pop('statement_timeout', None)
+        conn.invalidate()
+    finally:
+        conn.close()
+
+
+def get_pool_capacity(engine: Engine) -> Optional[int]:
+    """
+    Наибольшее число соединений, которое выдаст пул движка; None, если пул не ограничен
+    """
+    pool = engine.pool
+    if not hasattr(pool, 'size'):
+        return None
+    max_overflow = getattr(pool, '_max_overflow', 0)
+    if max_overflow < 0:
+        return None
+    return pool.size() + max_overflow
+
+
+def supports_bulk_reflection(engine: Engine) -> bool:
+    """
+    Есть ли у диалекта собственные пакетные запросы к каталогу. Реализация по умолчанию в SQLAlchemy
+    отражает таблицы по одной последовательно, и тогда быстрее отражать их параллельно
+    """
+    return type(engine.dialect).get_multi_columns is not DefaultDialect.get_multi_columns
+
+
+def sort_tables_by_related_count(tables: List[Table]) -> None:
+    """
+    Сортирует таблицы по количеству ссылающихся на них отношений
+    """
+    graph = SchemaGraph(tables)
+    tables.sort(key=lambda table: graph.get_in_degree(graph.ids[table.qualified_name]))
+
+
+def group_table_names_by_schema(table_names: List[str], schemas: List[str]) -> Dict[str, List[str]]:
+    """
+    Раскладывает полные имена таблиц по схемам из schemas
+    """
+    grouped: Dict[str, List[str]] = {}
+    for qualified_name in table_names:
+        for schema in schemas:
+            if qualified_name.startswith(schema + "."):
+                grouped.setdefault(schema, []).append(qualified_name[len(schema) + 1:])
+                break
+    return grouped
+
+
+def map_reflected_table_to_table(table_name: str, reflected_columns: List[ReflectedColumn],
+                                 pk_constraint: Optional[ReflectedPrimaryKeyConstraint],
+                                 foreign_keys: List[ReflectedForeignKeyConstraint],
+                                 indexes: List[ReflectedIndex],
+                                 schema: Optional[str] = None, default_schema: Optional[str] = None) -> Table:
+    pk_columns = get_primary_key_columns(pk_constraint)
+    fk_columns = get_foreign_key_columns(foreign_keys)
+    unique_columns = get_unique_columns(indexes)
+
+    return Table(
+        name=table_name,
+        columns=[map_reflected_column_to_column(e, pk_columns, fk_columns, unique_columns) for e in reflected_columns],
+        relations=[map_foreign_key_to_relation(table_name, e, schema, default_schema) for e in foreign_keys],
+        schema=schema
+    )
+
+
+def get_primary_key_columns(pk_constraint: Optional[ReflectedPrimaryKeyConstraint]) -> List[str]:
+    if not pk_constraint:
+        return []
+    return pk_constraint.get('constrained_columns', [])
+
+
+def get_foreign_key_columns(foreign_keys: List[ReflectedForeignKeyConstraint]) -> List[str]:
+    fk_columns = []
+    for fk in foreign_keys:
+        fk_columns.extend(fk.get('constrained_columns', []))
+    return fk_columns
+
+
+def get_unique_columns(indexes: List[ReflectedIndex]) -> List[str]:
+    unique_columns = []
+    for index in indexes:
+        if index.get('unique', False):
+            unique_columns.extend(index.get('column_names', []))
+    return unique_columns
 
 
 def map_reflected_column_to_column(reflected_column: ReflectedColumn,
                                  pk_columns: List[str], fk_columns: List[str], unique_columns: List[str]) -> Column:
     column_name = reflected_column.get('name')
-    
+
     return Column(
         name=column_name,
         type=str(reflected_column.get('type')),
@@ -85,7 +350,8 @@ def map_reflected_column_to_column(reflected_column: ReflectedColumn,
     )
 
 
-def map_foreign_key_to_relation(table_name: str, foreign_key: ReflectedForeignKeyConstraint) -> Relation:
+def map_foreign_key_to_relation(table_name: str, foreign_key: ReflectedForeignKeyConstraint,
+                                schema: Optional[str] = None, default_schema: Optional[str] = None) -> Relation:
     parent_column_name = foreign_key.get('constrained_columns')[0]
     related_table_name = foreign_key.get('referred_table')
     related_column_name = foreign_key.get('referred_columns')[0]
@@ -94,5 +360,7 @@ def map_foreign_key_to_relation(table_name: str, foreign_key: ReflectedForeignKe
         parent_table_name=table_name,
         parent_column_name=parent_column_name,
         related_table_name=related_table_name,
-        related_column_name=related_column_name
-    )
\ No newline at end of file
+        related_column_name=related_column_name,
+        parent_schema=schema,
+        related_schema=foreign_key.get('referred_schema') or default_schema
+    )
@@ -0,0 +1,286 @@
+import re
+from functools import lru_cache
+from typing import List, Dict, Set, Tuple, Optional, Any
+
+from sqlalchemy import text, bindparam, TextClause
+from sqlalchemy.dialects.mysql import ENUM, SET, DATETIME, TIME, TIMESTAMP
+from sqlalchemy.dialects.mysql.base import ischema_names
+from sqlalchemy.types import NullType
+
+from src.main.core import DatabaseSchemaInspector, Table, Column, Relation, Progress, ProgressStage, report_progress, \
+    qualify
+from src.main.persistence import Connection
+from src.main.persistence.inspector import sort_tables_by_related_count, SYSTEM_SCHEMAS
+
+COLUMNS_QUERY = """
+SELECT c.TABLE_SCHEMA AS schema_name,
+       c.TABLE_NAME AS table_name,
+       c.COLUMN_NAME AS column_name,
+       c.COLUMN_TYPE AS column_type,
+       c.IS_NULLABLE = 'YES' AS is_nullable,
+       c.CHARACTER_SET_NAME AS character_set,
+       c.COLLATION_NAME AS collation,
+       tc.CHARACTER_SET_NAME AS table_character_set,
+       t.TABLE_COLLATION AS table_collation
+FROM information_schema.TABLES t
+JOIN information_schema.COLUMNS c ON c.TABLE_SCHEMA = t.TABLE_SCHEMA AND c.TABLE_NAME = t.TABLE_NAME
+LEFT JOIN information_schema.COLLATIONS tc ON tc.COLLATION_NAME = t.TABLE_COLLATION
+WHERE {schema_filter}
+  AND t.TABLE_TYPE = 'BASE TABLE'
+  {table_filter}
+ORDER BY c.TABLE_SCHEMA, c.TABLE_NAME, c.ORDINAL_POSITION
+"""
+
+KEY_COLUMNS_QUERY = """
+SELECT t.TABLE_SCHEMA AS schema_name,
+       t.TABLE_NAME AS table_name,
+       k.COLUMN_NAME AS column_name,
+       t.CONSTRAINT_TYPE AS constraint_type,
+       k.ORDINAL_POSITION AS ordinal_position,
+       k.REFERENCED_TABLE_SCHEMA AS related_schema_name,
+       k.REFERENCED_TABLE_NAME AS related_table_name,
+       k.REFERENCED_COLUMN_NAME AS related_column_name
+FROM information_schema.TABLE_CONSTRAINTS t
+JOIN information_schema.KEY_COLUMN_USAGE k
+  ON k.CONSTRAINT_SCHEMA = t.CONSTRAINT_SCHEMA
+ AND k.TABLE_NAME = t.TABLE_NAME
+ AND k.CONSTRAINT_NAME = t.CONSTRAINT_NAME
+WHERE {schema_filter}
+  AND t.CONSTRAINT_TYPE IN ('PRIMARY KEY', 'FOREIGN KEY')
+  {table_filter}
+ORDER BY t.TABLE_SCHEMA, t.TABLE_NAME, t.CONSTRAINT_NAME, k.ORDINAL_POSITION
+"""
+
+UNIQUE_COLUMNS_QUERY = """
+SELECT DISTINCT t.TABLE_SCHEMA AS schema_name,
+       t.TABLE_NAME AS table_name,
+       t.COLUMN_NAME AS column_name
+FROM information_schema.STATISTICS t
+WHERE {schema_filter}
+  AND t.NON_UNIQUE = 0
+  AND t.INDEX_NAME <> 'PRIMARY'
+  AND t.COLUMN_NAME IS NOT NULL
+  {table_filter}
+"""
+
+# GROUP_CONCAT по умолчанию обрезает результат до 1024 байт, что ломает хэш широких таблиц
+GROUP_CONCAT_LIMIT_QUERY = text("SET SESSION group_concat_max_len = 16777216")
+
+VERSIONS_QUERY = """
+SELECT t.TABLE_SCHEMA AS schema_name,
+       t.TABLE_NAME AS table_name,
+       CONCAT_WS(':', t.CREATE_TIME,
+                 MD5(CONCAT_WS('|', c.columns_definition, k.keys_definition, s.unique_definition))) AS version
+FROM information_schema.TABLES t
+JOIN (
+    SELECT TABLE_SCHEMA, TABLE_NAME,
+           GROUP_CONCAT(CONCAT_WS(' ', COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE, COLUMN_KEY, COLLATION_NAME)
+                        ORDER BY ORDINAL_POSITION SEPARATOR ',') AS columns_definition
+    FROM information_schema.COLUMNS t
+    WHERE {schema_filter}
+    GROUP BY TABLE_SCHEMA, TABLE_NAME
+) c ON c.TABLE_SCHEMA = t.TABLE_SCHEMA AND c.TABLE_NAME = t.TABLE_NAME
+LEFT JOIN (
+    SELECT TABLE_SCHEMA, TABLE_NAME,
+           GROUP_CONCAT(CONCAT_WS(' ', CONSTRAINT_NAME, COLUMN_NAME, REFERENCED_TABLE_SCHEMA, REFERENCED_TABLE_NAME,
+                                  REFERENCED_COLUMN_NAME)
+                        ORDER BY CONSTRAINT_NAME, ORDINAL_POSITION SEPARATOR ',') AS keys_definition
+    FROM information_schema.KEY_COLUMN_USAGE t
+    WHERE {schema_filter}
+    GROUP BY TABLE_SCHEMA, TABLE_NAME
+) k ON k.TABLE_SCHEMA = t.TABLE_SCHEMA AND k.TABLE_NAME = t.TABLE_NAME
+LEFT JOIN (
+    SELECT TABLE_SCHEMA, TABLE_NAME,
+           GROUP_CONCAT(CONCAT_WS(' ', INDEX_NAME, COLUMN_NAME)
+                        ORDER BY INDEX_NAME, SEQ_IN_INDEX SEPARATOR ',') AS unique_definition
+    FROM information_schema.STATISTICS t
+    WHERE {schema_filter}
+      AND NON_UNIQUE = 0
+    GROUP BY TABLE_SCHEMA, TABLE_NAME
+) s ON s.TABLE_SCHEMA = t.TABLE_SCHEMA AND s.TABLE_NAME = t.TABLE_NAME
+WHERE {schema_filter}
+  AND t.TABLE_TYPE = 'BASE TABLE'
+  {table_filter}
+"""
+
+SCHEMA_NAMES_QUERY = text("""
+SELECT SCHEMA_NAME AS schema_name
+FROM information_schema.SCHEMATA
+ORDER BY SCHEMA_NAME
+""")
+
+MYSQL_TYPE_PATTERN = re.compile(r'^(?P<base>\w+)(?:\((?P<modifiers>.*)\))?(?P<options>(?: \w+)*)$')
+MYSQL_VALUE_PATTERN = re.compile(r"'((?:[^']|'')*)'")
+MYSQL_NUMBER_PATTERN = re.compile(r'\d+')
+
+
+class MySQLDatabaseSchemaInspector(DatabaseSchemaInspector):
+    """
+    Читает схему MySQL и MariaDB из information_schema несколькими запросами на всю базу.
+    Все базы из schemas читаются теми же запросами, без схем читается текущая база без полных имен
+    """
+
+    def __init__(self, connection: Connection, schemas: Optional[List[str]] = None):
+        self.engine = connection.engine
+        self.schemas = schemas
+
+    def get_tables(self, table_names: Optional[List[str]] = None, progress: Optional[Progress] = None) -> List[Table]:
+        params = self.__get_params(table_names)
+        report_progress(progress, ProgressStage.REFLECTING)
+        with self.engine.connect() as conn:
+            column_rows = conn.execute(self.__build_query(COLUMNS_QUERY, table_names), params).all()
+            report_progress(progress, ProgressStage.REFLECTING)
+            key_column_rows = conn.execute(self.__build_query(KEY_COLUMNS_QUERY, table_names), params).all()
+            report_progress(progress, ProgressStage.REFLECTING)
+            unique_column_rows = conn.execute(self.__build_query(UNIQUE_COLUMNS_QUERY, table_names), params).all()
+
+        pk_columns: Set[Tuple[str, str, str]] = set()
+        fk_columns: Set[Tuple[str, str, str]] = set()
+        relations: Dict[str, List[Relation]] = {}
+        for row in key_column_rows:
+            key = (row.schema_name, row.table_name, row.column_name)
+            if row.constraint_type == 'PRIMARY KEY':
+                pk_columns.add(key)
+                continue
+
+            fk_columns.add(key)
+            if row.ordinal_position == 1:
+                schema = self.__get_schema(row.schema_name)
+                # Без выбора схем полное имя получают только таблицы из других баз
+                related_schema = row.related_schema_name
+                if self.schemas is None and related_schema == row.schema_name:
+                    related_schema = None
+
+                relations.setdefault(qualify(schema, row.table_name), []).append(Relation(
+                    parent_table_name=row.table_name,
+                    parent_column_name=row.column_name,
+                    related_table_name=row.related_table_name,
+                    related_column_name=row.related_column_name,
+                    parent_schema=schema,
+                    related_schema=related_schema
+                ))
+
+        unique_columns: Set[Tuple[str, str, str]] = {
+            (row.schema_name, row.table_name, row.column_name) for row in unique_column_rows
+        }
+
+        tables: Dict[str, Table] = {}
+        for row in column_rows:
+            schema = self.__get_schema(row.schema_name)
+            qualified_name = qualify(schema, row.table_name)
+            table = tables.get(qualified_name)
+            if table is None:
+                table = tables[qualified_name] = Table(
+                    name=row.table_name,
+                    columns=[],
+                    relations=relations.get(qualified_name, []),
+                    schema=schema
+                )
+
+            key = (row.schema_name, row.table_name, row.column_name)
+            table.columns.append(Column(
+                name=row.column_name,
+                type=map_mysql_type(
+                    row.column_type,
+                    # Как и SHOW CREATE TABLE, которую читает SQLAlchemy, кодировка и сравнение выводятся,
+                    # только если отличаются от заданных для таблицы
+                    row.character_set if row.character_set != row.table_character_set else None,
+                    row.collation if row.collation != row.table_collation else None
+                ),
+                is_primary_key=key in pk_columns,
+                is_foreign_key=key in fk_columns,
+                is_unique=key in unique_columns,
+                is_nullable=bool(row.is_nullable)
+            ))
+
+        result = list(tables.values())
+        sort_tables_by_related_count(result)
+        report_progress(progress, ProgressStage.REFLECTING, len(result), len(result))
+
+        return result
+
+    def get_table_versions(self) -> Dict[str, str]:
+        """
+        Версия таблицы складывается из CREATE_TIME и хэша определений столбцов, ключей и уникальных индексов
+        """
+        with self.engine.connect() as conn:
+            conn.execute(GROUP_CONCAT_LIMIT_QUERY)
+            rows = conn.execute(self.__build_query(VERSIONS_QUERY, None), self.__get_params(None))
+            return {qualify(self.__get_schema(row.schema_name), row.table_name): row.version for row in rows}
+
+    def get_schema_names(self) -> List[str]:
+        with self.engine.connect() as conn:
+            rows = conn.execute(SCHEMA_NAMES_QUERY)
+            return [row.schema_name for row in rows if row.schema_name not in SYSTEM_SCHEMAS]
+
+    def __get_schema(self, schema_name: str) -> Optional[str]:
+        return None if self.schemas is None else schema_name
+
+    def __get_params(self, table_names: Optional[List[str]]) -> Dict[str, Any]:
+        params = {}
+        if self.schemas is not None:
+            params['schemas'] = list(self.schemas)
+        if table_names is not None:
+            params['table_names'] = list(table_names)
+        return params
+
+    def __build_query(self, query: str, table_names: Optional[List[str]]) -> TextClause:
+        """
+        Подставляет фильтры по схемам и таблицам; в запросах основная таблица information_schema имеет псевдоним t
+        """
+        expanding = []
+        if self.schemas is None:
+            schema_filter = "t.TABLE_SCHEMA = DATABASE()"
+        else:
+            schema_filter = "t.TABLE_SCHEMA IN :schemas"
+            expanding.append(bindparam('schemas', expanding=True))
+
+        table_filter = ""
+        if table_names is not None:
+            if self.schemas is None:
+                table_filter = "AND t.TABLE_NAME IN :table_names"
+            else:
+                table_filter = "AND CONCAT(t.TABLE_SCHEMA, '.', t.TABLE_NAME) IN :table_names"
+            expanding.append(bindparam('table_names', expanding=True))
+
+        return text(query.format(schema_filter=schema_filter, table_filter=table_filter)).bindparams(*expanding)
+
+
+# Типов в схеме немного, а str() типа проходит через компилятор SQLAlchemy, поэтому результат запоминается
+@lru_cache(maxsize=4096)
+def map_mysql_type(column_type: str, character_set: Optional[str] = None, collation: Optional[str] = None) -> str:
+    """
+    Строит из COLUMN_TYPE тип диалекта MySQL так же, как рефлексия SQLAlchemy строит его из SHOW CREATE TABLE,
+    и возвращает его str(), чтобы написание совпадало с общим инспектором
+    """
+    match = MYSQL_TYPE_PATTERN.match(column_type.strip())
+    if not match:
+        return str(NullType())
+
+    type_class = ischema_names.get(match.group('base').lower())
+    if type_class is None:
+        # Неизвестный тип SQLAlchemy отражает как NullType
+        return str(NullType())
+
+    modifiers = match.group('modifiers') or ''
+    if issubclass(type_class, (ENUM, SET)):
+        args = [e.replace("''", "'") for e in MYSQL_VALUE_PATTERN.findall(modifiers)]
+    else:
+        args = [int(e) for e in MYSQL_NUMBER_PATTERN.findall(modifiers)]
+
+    kwargs = {}
+    if issubclass(type_class, (DATETIME, TIME, TIMESTAMP)) and args:
+        kwargs['fsp'] = args.pop(0)
+    options = (match.group('options') or '').lower().split()
+    for option in ('unsigned', 'zerofill'):
+        if option in options:
+            kwargs[option] = True
+    if character_set:
+        kwargs['charset'] = character_set
+    if collation:
+        kwargs['collate'] = collation
+
+    try:
+        return str(type_class(*args, **kwargs))
+    except TypeError:
+        return str(type_class())
@@ -0,0 +1,19 @@
+import os
+import sys
+
+APPLICATION_NAME = "structura"
+
+
+def get_user_cache_dir(name: str) -> str:
+    """
+    Каталог кэша пользователя для приложения, не зависящий от текущего каталога процесса:
+    %LOCALAPPDATA% в Windows, ~/Library/Caches в macOS, $XDG_CACHE_HOME или ~/.cache в остальных системах
+    """
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~/AppData/Local")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+
+    return os.path.join(base, APPLICATION_NAME, name)
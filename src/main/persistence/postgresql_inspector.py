@@ -0,0 +1,284 @@
+import re
+from typing import List, Dict, Optional
+
+from sqlalchemy import text, TextClause
+
+from src.main.core import DatabaseSchemaInspector, Table, Column, Relation, Progress, ProgressStage, report_progress, \
+    qualify
+from src.main.persistence import Connection
+from src.main.persistence.inspector import sort_tables_by_related_count
+
+COLUMNS_QUERY = """
+SELECT n.nspname AS schema_name,
+       c.relname AS table_name,
+       a.attname AS column_name,
+       pg_catalog.format_type(a.atttypid, a.atttypmod) AS column_type,
+       ty.typtype = 'd' AS is_domain,
+       (SELECT max(length(e.enumlabel)) FROM pg_catalog.pg_enum e WHERE e.enumtypid = a.atttypid) AS enum_length,
+       NOT a.attnotnull AS is_nullable,
+       EXISTS (
+           SELECT 1 FROM pg_catalog.pg_constraint con
+           WHERE con.conrelid = c.oid AND con.contype = 'p' AND a.attnum = ANY (con.conkey)
+       ) AS is_primary_key,
+       EXISTS (
+           SELECT 1 FROM pg_catalog.pg_constraint con
+           WHERE con.conrelid = c.oid AND con.contype = 'f' AND a.attnum = ANY (con.conkey)
+       ) AS is_foreign_key,
+       EXISTS (
+           SELECT 1 FROM pg_catalog.pg_index i
+           WHERE i.indrelid = c.oid AND i.indisunique AND NOT i.indisprimary AND a.attnum = ANY (i.indkey)
+       ) AS is_unique
+FROM pg_catalog.pg_class c
+JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+LEFT JOIN pg_catalog.pg_attribute a ON a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+LEFT JOIN pg_catalog.pg_type ty ON ty.oid = a.atttypid
+WHERE c.relkind IN ('r', 'p')
+  AND {schema_filter}
+  {table_filter}
+ORDER BY n.nspname, c.relname, a.attnum
+"""
+
+RELATIONS_QUERY = """
+SELECT n.nspname AS schema_name,
+       c.relname AS table_name,
+       a.attname AS column_name,
+       rn.nspname AS related_schema_name,
+       rc.relname AS related_table_name,
+       ra.attname AS related_column_name
+FROM pg_catalog.pg_constraint con
+JOIN pg_catalog.pg_class c ON c.oid = con.conrelid
+JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+JOIN pg_catalog.pg_class rc ON rc.oid = con.confrelid
+JOIN pg_catalog.pg_namespace rn ON rn.oid = rc.relnamespace
+JOIN pg_catalog.pg_attribute a ON a.attrelid = con.conrelid AND a.attnum = con.conkey[1]
+JOIN pg_catalog.pg_attribute ra ON ra.attrelid = con.confrelid AND ra.attnum = con.confkey[1]
+WHERE con.contype = 'f'
+  AND {schema_filter}
+  {table_filter}
+ORDER BY n.nspname, c.relname, con.conname
+"""
+
+VERSIONS_QUERY = """
+SELECT n.nspname AS schema_name,
+       c.relname AS table_name,
+       c.oid::text || ':' || md5(
+           coalesce((
+               SELECT string_agg(a.attname || ' ' || pg_catalog.format_type(a.atttypid, a.atttypmod)
+                                 || ' ' || a.attnotnull::text, ',' ORDER BY a.attnum)
+               FROM pg_catalog.pg_attribute a
+               WHERE a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+           ), '') || '|' ||
+           coalesce((
+               SELECT string_agg(con.conname || ' ' || pg_catalog.pg_get_constraintdef(con.oid), ',' ORDER BY con.conname)
+               FROM pg_catalog.pg_constraint con
+               WHERE con.conrelid = c.oid
+           ), '') || '|' ||
+           coalesce((
+               SELECT string_agg(pg_catalog.pg_get_indexdef(i.indexrelid), ',' ORDER BY i.indexrelid)
+               FROM pg_catalog.pg_index i
+               WHERE i.indrelid = c.oid AND i.indisunique
+           ), '')
+       ) AS version
+FROM pg_catalog.pg_class c
+JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+WHERE c.relkind IN ('r', 'p')
+  AND {schema_filter}
+  {table_filter}
+"""
+
+SCHEMA_NAMES_QUERY = text("""
+SELECT n.nspname AS schema_name
+FROM pg_catalog.pg_namespace n
+WHERE n.nspname NOT LIKE 'pg\\_%'
+  AND n.nspname <> 'information_schema'
+ORDER BY n.nspname
+""")
+
+# Написание типов без параметров, как его дает str() от типа рефлексии SQLAlchemy (ischema_names диалекта)
+PG_TYPE_NAMES = {
+    'smallint': 'SMALLINT',
+    'integer': 'INTEGER',
+    'bigint': 'BIGINT',
+    'numeric': 'NUMERIC',
+    'real': 'REAL',
+    'double precision': 'DOUBLE PRECISION',
+    'money': 'MONEY',
+    'character varying': 'VARCHAR',
+    'character': 'CHAR',
+    '"char"': 'VARCHAR',
+    'name': 'VARCHAR',
+    'text': 'TEXT',
+    'citext': 'CITEXT',
+    'bytea': 'BYTEA',
+    'boolean': 'BOOLEAN',
+    'date': 'DATE',
+    'time': 'TIME',
+    'time with time zone': 'TIME',
+    'time without time zone': 'TIME',
+    'timestamp': 'TIMESTAMP',
+    'timestamp with time zone': 'TIMESTAMP',
+    'timestamp without time zone': 'TIMESTAMP',
+    'uuid': 'UUID',
+    'json': 'JSON',
+    'jsonb': 'JSONB',
+    'hstore': 'HSTORE',
+    'inet': 'INET',
+    'cidr': 'CIDR',
+    'macaddr': 'MACADDR',
+    'macaddr8': 'MACADDR8',
+    'oid': 'OID',
+    'regclass': 'REGCLASS',
+    'tsvector': 'TSVECTOR',
+    'bit': 'BIT',
+    'bit varying': 'BIT',
+    'int4range': 'INT4RANGE',
+    'int8range': 'INT8RANGE',
+    'numrange': 'NUMRANGE',
+    'daterange': 'DATERANGE',
+    'tsrange': 'TSRANGE',
+    'tstzrange': 'TSTZRANGE',
+    'int4multirange': 'INT4MULTIRANGE',
+    'int8multirange': 'INT8MULTIRANGE',
+    'nummultirange': 'NUMMULTIRANGE',
+    'datemultirange': 'DATEMULTIRANGE',
+    'tsmultirange': 'TSMULTIRANGE',
+    'tstzmultirange': 'TSTZMULTIRANGE',
+}
+
+# Типы, у которых SQLAlchemy сохраняет параметры, и число сохраняемых параметров
+PG_TYPE_MODIFIERS = {
+    'numeric': 2,
+    'character varying': 1,
+    'character': 1,
+}
+
+# Тип, не известный SQLAlchemy, отражается как NullType
+PG_UNKNOWN_TYPE = 'NULL'
+
+PG_TYPE_PATTERN = re.compile(r'^(?P<base>[^(\[]+?)(?:\((?P<modifiers>[^)]*)\))?(?P<suffix> with(?:out)? time zone)?$')
+
+
+class PostgreSQLDatabaseSchemaInspector(DatabaseSchemaInspector):
+    """
+    Читает схему PostgreSQL напрямую из pg_catalog двумя запросами, минуя рефлексию SQLAlchemy.
+    Все схемы из schemas читаются теми же запросами, без схем читается текущая схема без полных имен
+    """
+
+    def __init__(self, connection: Connection, schemas: Optional[List[str]] = None):
+        self.engine = connection.engine
+        self.schemas = schemas
+
+    def get_tables(self, table_names: Optional[List[str]] = None, progress: Optional[Progress] = None) -> List[Table]:
+        params = self.__get_params(table_names)
+        report_progress(progress, ProgressStage.REFLECTING)
+        with self.engine.connect() as conn:
+            column_rows = conn.execute(self.__build_query(COLUMNS_QUERY, table_names), params).all()
+            report_progress(progress, ProgressStage.REFLECTING)
+            relation_rows = conn.execute(self.__build_query(RELATIONS_QUERY, table_names), params).all()
+
+        tables: Dict[str, Table] = {}
+        for row in column_rows:
+            schema = self.__get_schema(row.schema_name)
+            qualified_name = qualify(schema, row.table_name)
+            table = tables.get(qualified_name)
+            if table is None:
+                table = tables[qualified_name] = Table(name=row.table_name, columns=[], relations=[], schema=schema)
+
+            if row.column_name is None:
+                continue
+
+            table.columns.append(Column(
+                name=row.column_name,
+                type=map_pg_type(row.column_type, row.is_domain, row.enum_length),
+                is_primary_key=row.is_primary_key,
+                is_foreign_key=row.is_foreign_key,
+                is_unique=row.is_unique,
+                is_nullable=row.is_nullable
+            ))
+
+        for row in relation_rows:
+            schema = self.__get_schema(row.schema_name)
+            # Без выбора схем полное имя получают только таблицы из других схем
+            related_schema = row.related_schema_name
+            if self.schemas is None and related_schema == row.schema_name:
+                related_schema = None
+
+            tables[qualify(schema, row.table_name)].relations.append(Relation(
+                parent_table_name=row.table_name,
+                parent_column_name=row.column_name,
+                related_table_name=row.related_table_name,
+                related_column_name=row.related_column_name,
+                parent_schema=schema,
+                related_schema=related_schema
+            ))
+
+        result = list(tables.values())
+        sort_tables_by_related_count(result)
+        report_progress(progress, ProgressStage.REFLECTING, len(result), len(result))
+
+        return result
+
+    def get_table_versions(self) -> Dict[str, str]:
+        """
+        Версия таблицы складывается из ее OID и хэша определений столбцов, ограничений и уникальных индексов
+        """
+        with self.engine.connect() as conn:
+            rows = conn.execute(self.__build_query(VERSIONS_QUERY, None), self.__get_params(None))
+            return {qualify(self.__get_schema(row.schema_name), row.table_name): row.version for row in rows}
+
+    def get_schema_names(self) -> List[str]:
+        with self.engine.connect() as conn:
+            return [row.schema_name for row in conn.execute(SCHEMA_NAMES_QUERY)]
+
+    def __get_schema(self, schema_name: str) -> Optional[str]:
+        return None if self.schemas is None else schema_name
+
+    def __get_params(self, table_names: Optional[List[str]]) -> Dict[str, List[str]]:
+        params = {}
+        if self.schemas is not None:
+            params['schemas'] = list(self.schemas)
+        if table_names is not None:
+            params['table_names'] = list(table_names)
+        return params
+
+    def __build_query(self, query: str, table_names: Optional[List[str]]) -> TextClause:
+        if self.schemas is None:
+            schema_filter = "n.nspname = current_schema()"
+            table_filter = "" if table_names is None else "AND c.relname = ANY (:table_names)"
+        else:
+            schema_filter = "n.nspname = ANY (:schemas)"
+            table_filter = "" if table_names is None else "AND n.nspname || '.' || c.relname = ANY (:table_names)"
+
+        return text(query.format(schema_filter=schema_filter, table_filter=table_filter))
+
+
+def map_pg_type(format_type: str, is_domain: bool = False, enum_length: Optional[int] = None) -> str:
+    """
+    Приводит вывод format_type() к написанию типов, которое дает рефлексия SQLAlchemy: массивы выводятся как ARRAY,
+    домены как DOMAIN, перечисления как VARCHAR длиной в самую длинную метку, неизвестные типы как NULL
+    """
+    if format_type.endswith('[]'):
+        return 'ARRAY'
+    if is_domain:
+        return 'DOMAIN'
+    if enum_length is not None:
+        return f'VARCHAR({enum_length})'
+
+    match = PG_TYPE_PATTERN.match(format_type)
+    if not match:
+        return PG_UNKNOWN_TYPE
+
+    base = match.group('base') + (match.group('suffix') or '')
+    if base.startswith('interval'):
+        return 'INTERVAL'
+    if base not in PG_TYPE_NAMES:
+        return PG_UNKNOWN_TYPE
+
+    result = PG_TYPE_NAMES[base]
+    modifiers = match.group('modifiers')
+    if modifiers:
+        modifiers = [e.strip() for e in modifiers.split(',')]
+        if len(modifiers) == PG_TYPE_MODIFIERS.get(base):
+            result += '(' + ', '.join(modifiers) + ')'
+
+    return result
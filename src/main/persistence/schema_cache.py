@@ -0,0 +1,134 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Dict, Optional
+
+from src.main.core import Table
+from src.main.persistence import DatabaseURL
+from src.main.persistence.serialization import table_to_dict, table_from_dict, schema_fingerprint
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SchemaSnapshot:
+    tables: List[Table]
+    versions: Dict[str, str]
+    fingerprint: str
+    created_at: float
+
+
+class SchemaCache:
+    """
+    Локальный кэш отраженных схем по подключениям. Ключ не содержит пароль, старые записи вытесняются
+    по времени последнего обращения при превышении лимитов количества и размера
+    """
+
+    def __init__(self, directory: str = ".schema_cache", max_entries: int = 20, max_bytes: int = 200 * 1024 * 1024):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+
+    def contains(self, db_url: DatabaseURL, schemas: Optional[List[str]] = None) -> bool:
+        return os.path.exists(self.__get_path(db_url, schemas))
+
+    def get(self, db_url: DatabaseURL, schemas: Optional[List[str]] = None) -> Optional[SchemaSnapshot]:
+        path = self.__get_path(db_url, schemas)
+        with self.lock:
+            if not os.path.exists(path):
+                return None
+            try:
+                with open(path, "r") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                return None
+            # Время изменения файла служит временем последнего обращения для вытеснения
+            os.utime(path)
+
+        # Запись старого формата или поврежденная запись считается промахом кэша
+        try:
+            return SchemaSnapshot(
+                tables=[table_from_dict(e) for e in data['tables']],
+                versions=data.get('versions', {}),
+                fingerprint=data['fingerprint'],
+                created_at=data['created_at']
+            )
+        except (KeyError, TypeError, AttributeError):
+            return None
+
+    def put(self, db_url: DatabaseURL, tables: List[Table], versions: Dict[str, str],
+            schemas: Optional[List[str]] = None) -> SchemaSnapshot:
+        snapshot = SchemaSnapshot(
+            tables=tables,
+            versions=versions,
+            fingerprint=schema_fingerprint(tables),
+            created_at=time.time()
+        )
+        data = dict(
+            url=db_url.safe_url,
+            schemas=schemas,
+            fingerprint=snapshot.fingerprint,
+            created_at=snapshot.created_at,
+            versions=versions,
+            tables=[table_to_dict(e) for e in tables]
+        )
+
+        path = self.__get_path(db_url, schemas)
+        tmp_path = path + ".tmp"
+        with self.lock:
+            # Кэш необязателен: ошибка записи не должна отменять уже выполненную рефлексию
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                with open(tmp_path, "w") as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, path)
+                self.__evict()
+            except OSError as ex:
+                logger.warning("Не удалось сохранить схему в кэш %s: %s", self.directory, ex)
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+        return snapshot
+
+    def invalidate(self, db_url: DatabaseURL, schemas: Optional[List[str]] = None) -> None:
+        path = self.__get_path(db_url, schemas)
+        with self.lock:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def __get_path(self, db_url: DatabaseURL, schemas: Optional[List[str]] = None) -> str:
+        """
+        Один и тот же URL с разным набором схем кэшируется отдельно
+        """
+        source = db_url.safe_url
+        if schemas is not None:
+            source += "#" + ",".join(sorted(schemas))
+        key = hashlib.sha256(source.encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.directory, f"{key}.json")
+
+    def __evict(self) -> None:
+        """
+        Удаляет самые давно использованные записи, пока кэш не уложится в лимиты
+        """
+        entries = []
+        for file_name in os.listdir(self.directory):
+            if not file_name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, file_name)
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort(reverse=True)
+
+        total_bytes = 0
+        for index, (_, size, path) in enumerate(entries):
+            total_bytes += size
+            if index >= self.max_entries or (index > 0 and total_bytes > self.max_bytes):
+                os.remove(path)
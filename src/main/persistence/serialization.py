@@ -0,0 +1,31 @@
+import hashlib
+import json
+from dataclasses import asdict
+from typing import List, Dict, Any
+
+from src.main.core import Table, Column, Relation
+
+
+def table_to_dict(table: Table) -> Dict[str, Any]:
+    return asdict(table)
+
+
+def table_from_dict(data: Dict[str, Any]) -> Table:
+    return Table(
+        name=data['name'],
+        columns=[Column(**e) for e in data['columns']],
+        relations=[Relation(**e) for e in data['relations']],
+        schema=data.get('schema')
+    )
+
+
+def table_fingerprint(table: Table) -> str:
+    return hashlib.sha256(json.dumps(table_to_dict(table), sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def schema_fingerprint(tables: List[Table]) -> str:
+    """
+    Хэш содержимого схемы, не зависящий от порядка таблиц
+    """
+    serialized = sorted(json.dumps(table_to_dict(table), sort_keys=True) for table in tables)
+    return hashlib.sha256("\n".join(serialized).encode("utf-8")).hexdigest()
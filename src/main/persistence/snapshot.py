@@ -0,0 +1,227 @@
+import gzip
+import json
+import os
+import time
+import zlib
+from typing import List, Dict, Optional, Iterator, Tuple, Any, TextIO
+
+from src.main.core import DatabaseSchemaInspector, Table, Column, Relation, Progress, ProgressStage, report_progress
+from src.main.persistence.schema_cache import SchemaSnapshot
+from src.main.persistence.serialization import table_fingerprint, schema_fingerprint
+
+SNAPSHOT_FORMAT = "structura-snapshot"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_EXTENSION = ".jsonl.gz"
+
+# Флаги столбца упакованы в одно число
+PRIMARY_KEY = 1
+FOREIGN_KEY = 2
+UNIQUE = 4
+NULLABLE = 8
+
+# Как часто сообщать о прогрессе чтения, в таблицах
+PROGRESS_STEP = 500
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def open_snapshot(path: str, mode: str) -> TextIO:
+    """
+    Файлы с расширением .gz читаются и пишутся через gzip, остальные как обычный текст
+    """
+    if path.endswith(".gz"):
+        # Средняя степень сжатия: почти тот же размер, что и максимальная, при заметно более быстрой записи
+        return gzip.open(path, mode + "t", compresslevel=6, encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def table_to_record(table: Table, version: str) -> List[Any]:
+    return [
+        table.name,
+        table.schema,
+        version,
+        [
+            [
+                e.name,
+                e.type,
+                (PRIMARY_KEY if e.is_primary_key else 0) | (FOREIGN_KEY if e.is_foreign_key else 0)
+                | (UNIQUE if e.is_unique else 0) | (NULLABLE if e.is_nullable else 0)
+            ] for e in table.columns
+        ],
+        [
+            [
+                e.parent_schema, e.parent_table_name, e.parent_column_name,
+                e.related_schema, e.related_table_name, e.related_column_name
+            ] for e in table.relations
+        ]
+    ]
+
+
+def column_from_record(record: List[Any], column_cache: Dict[Tuple, Column]) -> Column:
+    """
+    Столбцы неизменяемы, поэтому одинаковые столбцы разных таблиц (id, created_at и т.п.) создаются один раз
+    """
+    key = tuple(record)
+    column = column_cache.get(key)
+    if column is None:
+        name, type, flags = record
+        column = Column(
+            name=name,
+            type=type,
+            is_primary_key=bool(flags & PRIMARY_KEY),
+            is_foreign_key=bool(flags & FOREIGN_KEY),
+            is_unique=bool(flags & UNIQUE),
+            is_nullable=bool(flags & NULLABLE)
+        )
+        column_cache[key] = column
+    return column
+
+
+def table_from_record(record: List[Any], column_cache: Dict[Tuple, Column]) -> Tuple[Table, str]:
+    name, schema, version, columns, relations = record
+    table = Table(
+        name=name,
+        columns=[column_from_record(e, column_cache) for e in columns],
+        relations=[
+            Relation(
+                parent_schema=e[0],
+                parent_table_name=e[1],
+                parent_column_name=e[2],
+                related_schema=e[3],
+                related_table_name=e[4],
+                related_column_name=e[5]
+            ) for e in relations
+        ],
+        schema=schema
+    )
+    return table, version
+
+
+def create_snapshot(tables: List[Table], versions: Optional[Dict[str, str]] = None) -> SchemaSnapshot:
+    return SchemaSnapshot(
+        tables=tables,
+        versions=versions or {},
+        fingerprint=schema_fingerprint(tables),
+        created_at=time.time()
+    )
+
+
+def export_snapshot(path: str, snapshot: SchemaSnapshot, source: Optional[str] = None,
+                    schemas: Optional[List[str]] = None) -> None:
+    """
+    Записывает схему в файл JSON Lines: первая строка заголовок с форматом и версией, далее по таблице на строку.
+    Таблицы без версии получают версию по содержимому, чтобы снимки можно было сравнивать между собой
+    """
+    header = dict(
+        format=SNAPSHOT_FORMAT,
+        version=SNAPSHOT_VERSION,
+        source=source,
+        schemas=schemas,
+        created_at=snapshot.created_at,
+        table_count=len(snapshot.tables),
+        fingerprint=snapshot.fingerprint
+    )
+
+    # Временный файл сохраняет расширение, чтобы сжатие выбиралось так же, как для итогового
+    tmp_path = os.path.join(os.path.dirname(path), ".tmp-" + os.path.basename(path))
+    with open_snapshot(tmp_path, "w") as f:
+        f.write(json.dumps(header) + "\n")
+        for table in snapshot.tables:
+            version = snapshot.versions.get(table.qualified_name) or table_fingerprint(table)
+            f.write(json.dumps(table_to_record(table, version), ensure_ascii=False, separators=(',', ':')) + "\n")
+    os.replace(tmp_path, path)
+
+
+def read_snapshot_header(f: TextIO) -> Dict[str, Any]:
+    try:
+        header = json.loads(f.readline())
+    except (ValueError, OSError, EOFError, zlib.error):
+        raise SnapshotError("Файл не является снимком схемы")
+
+    if not isinstance(header, dict) or header.get('format') != SNAPSHOT_FORMAT:
+        raise SnapshotError("Файл не является снимком схемы")
+    version = header.get('version', 0)
+    # bool тоже int, но версией снимка быть не может
+    if not isinstance(version, int) or isinstance(version, bool) or version > SNAPSHOT_VERSION:
+        raise SnapshotError(f"Снимок версии {version!r} не поддерживается")
+
+    return header
+
+
+def read_lines(f: TextIO) -> Iterator[str]:
+    """
+    Строки снимка; обрезанный или поврежденный gzip дает SnapshotError, а не ошибку распаковки
+    """
+    try:
+        yield from f
+    except (EOFError, gzip.BadGzipFile, zlib.error) as ex:
+        raise SnapshotError(f"Файл снимка поврежден: {ex}")
+
+
+def iter_snapshot(path: str, progress: Optional[Progress] = None) -> Iterator[Tuple[Table, str]]:
+    """
+    Читает таблицы снимка по одной строке, не загружая файл целиком
+    """
+    with open_snapshot(path, "r") as f:
+        total = read_snapshot_header(f).get('table_count', 0)
+        report_progress(progress, ProgressStage.REFLECTING, 0, total)
+        column_cache: Dict[Tuple, Column] = {}
+        for done, line in enumerate(read_lines(f), 1):
+            if not line.strip():
+                continue
+            try:
+                yield table_from_record(json.loads(line), column_cache)
+            except (ValueError, TypeError, IndexError) as ex:
+                raise SnapshotError(f"Поврежденная строка снимка {done + 1}: {ex}")
+            if done % PROGRESS_STEP == 0:
+                report_progress(progress, ProgressStage.REFLECTING, done, total)
+
+
+def load_snapshot(path: str, progress: Optional[Progress] = None) -> SchemaSnapshot:
+    with open_snapshot(path, "r") as f:
+        header = read_snapshot_header(f)
+
+    tables = []
+    versions = {}
+    for table, version in iter_snapshot(path, progress):
+        tables.append(table)
+        versions[table.qualified_name] = version
+    report_progress(progress, ProgressStage.REFLECTING, len(tables), len(tables))
+
+    return SchemaSnapshot(
+        tables=tables,
+        versions=versions,
+        fingerprint=header.get('fingerprint') or schema_fingerprint(tables),
+        created_at=header.get('created_at', 0)
+    )
+
+
+class SnapshotSchemaInspector(DatabaseSchemaInspector):
+    """
+    Инспектор, читающий схему из файла снимка вместо базы данных
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def get_tables(self, table_names: Optional[List[str]] = None, progress: Optional[Progress] = None) -> List[Table]:
+        names = set(table_names) if table_names is not None else None
+        tables = [
+            table for table, _ in iter_snapshot(self.path, progress)
+            if names is None or table.qualified_name in names
+        ]
+        report_progress(progress, ProgressStage.REFLECTING, len(tables), len(tables))
+        return tables
+
+    def get_schema_names(self) -> List[str]:
+        with open_snapshot(self.path, "r") as f:
+            schemas = read_snapshot_header(f).get('schemas')
+        if schemas:
+            return list(schemas)
+
+        return sorted({table.schema for table, _ in iter_snapshot(self.path) if table.schema})
+
+    def get_table_versions(self) -> Dict[str, str]:
+        return {table.qualified_name: version for table, version in iter_snapshot(self.path)}
@@ -1,3 +1,5 @@
-from .components import DatabaseCard, ConnectionHistoryCard, TableVisibilitySelector
-from .utils import get_svg_size, generate_erd_svg, load_connection_history, save_connection_history
+from .components import DatabaseCard, ConnectionHistoryCard, TableVisibilitySelector, ProgressPanel, TiledDiagramView
+from .utils import get_svg_size, generate_erd_svg, reflect_schema, get_schema_names, history_to_db_url, load_connection_history, save_connection_history, history_to_reflection_options
+from .session import SchemaSession
+from .tasks import BackgroundTask
 from .app import app
@@ -1,13 +1,20 @@
 import uuid
-from typing import Dict, List, Optional, Callable
+from typing import Dict, List, Optional, Callable, Any, Tuple
 
 import flet as ft
 
-from src.main.persistence import DatabaseURL, Dialect, Connection
-from src.main.persistence import SQLAlchemyDatabaseSchemaInspector
+from src.main.core import Progress, ProgressEvent, SchemaGraph, OperationCancelled
+from src.main.persistence import DatabaseURL, Dialect
+from src.main.persistence import SchemaCache, SchemaChanges, engine_registry, SNAPSHOT_EXTENSION, REFLECTION_WORKERS, \
+    get_user_cache_dir
 from src.main.ui import load_connection_history, DatabaseCard, save_connection_history, ConnectionHistoryCard, \
-    generate_erd_svg, get_svg_size, TableVisibilitySelector
-from src.main.visualizer import VisualizeState
+    history_to_db_url, get_svg_size, get_schema_names, TableVisibilitySelector, ProgressPanel, TiledDiagramView, \
+    SchemaSession, BackgroundTask, history_to_reflection_options
+from src.main.visualizer import VisualizeState, RenderCache, LayoutEngine, SvgTileSource, adjust_detail_level, \
+    Focus, FocusDirection
+
+# Диаграммы больше этого размера (в символах SVG) показываются по тайлам
+TILED_VIEW_THRESHOLD = 2 * 1024 * 1024
 
 
 def app(page: ft.Page) -> None:
@@ -15,12 +22,20 @@ def app(page: ft.Page) -> None:
     page.window_width = 900
     page.window_height = 700
     page.theme_mode = ft.ThemeMode.DARK
+    page.on_close = lambda e: engine_registry.dispose_all()
 
     # Состояние
     connection_history: List[Dict] = load_connection_history()
-    current_db_url: Optional[DatabaseURL] = None
+    # Кэши лежат в каталоге пользователя: текущий каталог установленного приложения может быть недоступен для записи
+    schema_cache: SchemaCache = SchemaCache(directory=get_user_cache_dir("schemas"))
+    render_cache: RenderCache = RenderCache(directory=get_user_cache_dir("renders"))
+    schema_session: Optional[SchemaSession] = None
+    current_history: Optional[Dict] = None
     svg_data: Optional[str] = None
     error_text: ft.Text = ft.Text("", color=ft.Colors.RED, text_align=ft.TextAlign.CENTER, max_lines=8)
+    # Диалог выбора файлов общий для всех экранов, обработчик результата назначается перед открытием
+    file_picker: ft.FilePicker = ft.FilePicker()
+    page.overlay.append(file_picker)
 
     def go_to_screen(screen: ft.View) -> None:
         page.views.clear()
@@ -50,25 +65,45 @@ def app(page: ft.Page) -> None:
         db_cards_row: ft.Row = ft.Row(db_cards, alignment=ft.MainAxisAlignment.CENTER, spacing=24)
 
         def delete_history(connection_uuid: str) -> None:
+            for h in connection_history:
+                if h.get('uuid') == connection_uuid:
+                    db_url: DatabaseURL = history_to_db_url(h)
+                    schema_cache.invalidate(db_url, h.get('schemas'))
+                    engine_registry.dispose(db_url)
             connection_history[:] = [h for h in connection_history if h.get('uuid') != connection_uuid]
             save_connection_history(connection_history)
             go_to_screen(db_choice_screen())
 
         def quick_connect(history: Dict) -> None:
-            nonlocal current_db_url
+            nonlocal schema_session, current_history
             try:
-                dialect: Dialect = history.get('dialect')
-                current_db_url = DatabaseURL(
-                    dialect, history['user'], history['password'], history['host'], history['port'], history['database']
-                )
-                conn = Connection(current_db_url)
-                conn.get_engine().connect().close()
+                db_url: DatabaseURL = history_to_db_url(history)
+                schemas: Optional[List[str]] = history.get('schemas')
+                # Схема из кэша рисуется сразу, подключение проверит фоновая проверка актуальности
+                if not schema_cache.contains(db_url, schemas):
+                    with engine_registry.acquire(db_url) as conn:
+                        conn.get_engine().connect().close()
+                schema_session = SchemaSession(db_url, schema_cache, schemas, render_cache,
+                                               reflection_options=history_to_reflection_options(history))
+                current_history = history
                 error_text.value = ""
                 go_to_screen(erd_screen())
             except Exception as ex:
                 error_text.value = f"Ошибка подключения: {ex}"
                 page.update()
 
+        def on_snapshot_picked(e: ft.FilePickerResultEvent) -> None:
+            nonlocal schema_session, current_history
+            if not e.files:
+                return
+            schema_session = SchemaSession(None, schema_cache, render_cache=render_cache, snapshot_path=e.files[0].path)
+            current_history = None
+            go_to_screen(erd_screen())
+
+        def open_snapshot(e: ft.ControlEvent) -> None:
+            file_picker.on_result = on_snapshot_picked
+            file_picker.pick_files(dialog_title="Снимок схемы", allowed_extensions=["gz", "jsonl"])
+
         history_cards: List[ConnectionHistoryCard] = [
             ConnectionHistoryCard(
                 history=h,
@@ -96,6 +131,11 @@ def app(page: ft.Page) -> None:
                     padding=ft.padding.only(top=20, bottom=5)
                 ),
                 db_cards_row,
+                ft.Container(
+                    ft.TextButton("Открыть снимок схемы", icon=ft.Icons.FOLDER_OPEN, on_click=open_snapshot),
+                    alignment=ft.alignment.center,
+                    padding=ft.padding.only(top=10)
+                ),
                 ft.Container(
                     ft.Divider(height=2, thickness=2, color=ft.Colors.GREY_300),
                     padding=ft.padding.symmetric(vertical=20),
@@ -141,8 +181,8 @@ def app(page: ft.Page) -> None:
                 db_url: DatabaseURL = DatabaseURL(dialect, user.value, password.value, host.value, int(port.value),
                                                   database.value)
                 # Проверка подключения
-                conn: Connection = Connection(db_url)
-                conn.get_engine().connect().close()
+                with engine_registry.acquire(db_url) as conn:
+                    conn.get_engine().connect().close()
 
                 # Сохраняем в историю только после успешного подключения
                 h: Dict = dict(
@@ -158,8 +198,9 @@ def app(page: ft.Page) -> None:
                 connection_history.append(h)
                 save_connection_history(connection_history)
 
-                nonlocal current_db_url
-                current_db_url = db_url
+                nonlocal schema_session, current_history
+                schema_session = SchemaSession(db_url, schema_cache, render_cache=render_cache)
+                current_history = h
                 go_to_screen(erd_screen())
             except Exception as ex:
                 error_text.value = f"Ошибка подключения: {ex}"
@@ -214,77 +255,423 @@ def app(page: ft.Page) -> None:
     def erd_screen() -> ft.View:
         nonlocal svg_data
 
-        conn: Connection = Connection(current_db_url)
-        inspector: SQLAlchemyDatabaseSchemaInspector = SQLAlchemyDatabaseSchemaInspector(conn)
-        tables: List = inspector.get_tables()
-        table_names: List[str] = [t.name for t in tables]
-        table_states: Dict[str, VisualizeState] = {name: VisualizeState.SHOW for name in table_names}
+        session: SchemaSession = schema_session
+        svg_data = None
 
-        svg_data = generate_erd_svg(current_db_url)
-        svg_view: ft.Image = ft.Image(src_base64=None, src=None)
-        svg_view.src = "data:image/svg+xml;utf8," + svg_data.replace("\n", "")
+        svg_view: ft.Image = ft.Image(src_base64=None, src=None, visible=False)
         svg_view.expand = True
         svg_view.fit = ft.ImageFit.CONTAIN
 
-        base_width: float
-        base_height: float
-        base_width, base_height = get_svg_size(svg_data)
+        base_width: float = 0
+        base_height: float = 0
         current_scale: float = 1.0
         min_scale: float = 0.2
         max_scale: float = 20.0
         scale_step: float = 0.2
 
-        def zoom_in(e: ft.ControlEvent) -> None:
+        active_task: Optional[BackgroundTask] = None
+
+        def on_tiled_zoom(zoom: float) -> None:
             nonlocal current_scale
-            if current_scale < max_scale:
-                current_scale = min(current_scale + scale_step, max_scale)
+            current_scale = zoom
+            update_detail_level()
+
+        tiled_view: TiledDiagramView = TiledDiagramView(
+            width=page.window_width - 320, height=page.window_height - 120, min_zoom=min_scale, max_zoom=max_scale,
+            on_zoom=on_tiled_zoom
+        )
+
+        def show_svg(data: str, keep_view: bool = False) -> None:
+            """
+            Показывает новую диаграмму; с keep_view сохраняются масштаб и положение окна просмотра
+            """
+            nonlocal svg_data, base_width, base_height, current_scale
+
+            svg_data = data
+            if not keep_view:
+                current_scale = 1.0
+
+            # Огромную диаграмму клиент не растеризует целиком, она показывается по тайлам
+            if len(svg_data) > TILED_VIEW_THRESHOLD:
+                tiled_view.set_source(SvgTileSource(svg_data), current_scale, keep_view and tiled_view.visible)
+                tiled_view.visible = True
+                svg_view.visible = False
+                return
+
+            svg_view.src = "data:image/svg+xml;utf8," + svg_data
+
+            base_width, base_height = get_svg_size(svg_data)
+
+            svg_view.width = int(base_width * current_scale)
+            svg_view.height = int(base_height * current_scale)
+            svg_view.visible = True
+            tiled_view.visible = False
+
+        def apply_scale() -> None:
+            if tiled_view.visible:
+                tiled_view.set_zoom(current_scale)
+            else:
                 svg_view.width = int(base_width * current_scale)
                 svg_view.height = int(base_height * current_scale)
+            page.update()
+
+        def update_detail_level() -> None:
+            """
+            При сильном приближении диаграмма перерисовывается подробнее, при отдалении проще и быстрее
+            """
+            if session.detail_level is None or active_task:
+                return
+            level = adjust_detail_level(session.detail_level, current_scale)
+            if level != session.detail_level:
+                session.detail_level = level
+                # Смена подробности не должна сбрасывать масштаб и положение, при которых она произошла
+                run_task(session.render, lambda data: show_svg(data, keep_view=True))
                 page.update()
 
+        def zoom_in(e: ft.ControlEvent) -> None:
+            nonlocal current_scale
+            if tiled_view.visible:
+                current_scale = tiled_view.zoom
+            if current_scale < max_scale:
+                current_scale = min(current_scale + scale_step, max_scale)
+                apply_scale()
+                update_detail_level()
+
         def zoom_out(e: ft.ControlEvent) -> None:
             nonlocal current_scale
+            if tiled_view.visible:
+                current_scale = tiled_view.zoom
             if current_scale > min_scale:
                 current_scale = max(current_scale - scale_step, min_scale)
-                svg_view.width = int(base_width * current_scale)
-                svg_view.height = int(base_height * current_scale)
-                page.update()
+                apply_scale()
+                update_detail_level()
 
         def reset_scale(e: ft.ControlEvent) -> None:
             nonlocal current_scale
             current_scale = 1.0
-            svg_view.width = int(base_width * current_scale)
-            svg_view.height = int(base_height * current_scale)
-            page.update()
+            apply_scale()
 
         def on_change_table_state(table_name: str) -> Callable[[ft.ControlEvent], None]:
             def on_change(e: ft.ControlEvent) -> None:
-                table_states[table_name] = VisualizeState(e.control.value)
+                session.table_states[table_name] = VisualizeState(e.control.value)
 
             return on_change
 
-        visibility_controls: List[TableVisibilitySelector] = [
-            TableVisibilitySelector(
-                table_name=name,
-                selected_value=VisualizeState.SHOW,
-                on_change=on_change_table_state(name)
-            ) for name in table_names
-        ]
+        visibility_column: ft.Column = ft.Column(
+            [],
+            scroll=ft.ScrollMode.HIDDEN,
+            expand=True,
+        )
+
+        def on_focus_table(table_name: str) -> Callable[[ft.ControlEvent], None]:
+            def on_focus(e: ft.ControlEvent) -> None:
+                if active_task:
+                    return
+                session.focus = Focus(table_name, int(focus_radius.value), FocusDirection(focus_direction.value))
+                update_focus_bar()
+                run_task(session.render, show_svg)
+                page.update()
+
+            return on_focus
+
+        def fill_visibility_controls() -> None:
+            graph: SchemaGraph = session.graph
+            visibility_column.controls = [
+                TableVisibilitySelector(
+                    table_name=table.qualified_name,
+                    selected_value=session.table_states[table.qualified_name],
+                    on_change=on_change_table_state(table.qualified_name),
+                    on_focus=on_focus_table(table.qualified_name),
+                    tooltip=f"Ссылки: {graph.get_out_degree(index)}, ссылаются на нее: {graph.get_in_degree(index)}"
+                ) for index, table in enumerate(session.tables)
+            ]
+            update_focus_bar()
+
+        def change_focus(e: ft.ControlEvent) -> None:
+            if session.focus is None or active_task:
+                return
+            session.focus = Focus(session.focus.table_name, int(focus_radius.value),
+                                  FocusDirection(focus_direction.value))
+            run_task(session.render, show_svg)
+            page.update()
+
+        def clear_focus(e: ft.ControlEvent) -> None:
+            if active_task:
+                return
+            session.focus = None
+            update_focus_bar()
+            run_task(session.render, show_svg)
+            page.update()
+
+        focus_text: ft.Text = ft.Text("", size=13, expand=True, no_wrap=True)
+        focus_radius: ft.Dropdown = ft.Dropdown(
+            value=str(session.focus.radius if session.focus else 1),
+            options=[ft.dropdown.Option(str(e)) for e in range(1, 6)],
+            tooltip="Радиус окрестности",
+            on_change=change_focus,
+            width=70,
+            dense=True
+        )
+        focus_direction: ft.Dropdown = ft.Dropdown(
+            value=(session.focus.direction if session.focus else FocusDirection.BOTH).value,
+            options=[
+                ft.dropdown.Option(FocusDirection.BOTH.value, "Все связи"),
+                ft.dropdown.Option(FocusDirection.OUTGOING.value, "Исходящие"),
+                ft.dropdown.Option(FocusDirection.INCOMING.value, "Входящие"),
+            ],
+            tooltip="Направление связей",
+            on_change=change_focus,
+            width=130,
+            dense=True
+        )
+        clear_focus_button: ft.IconButton = ft.IconButton(ft.Icons.CLOSE, tooltip="Показать всю схему", icon_size=18,
+                                                          on_click=clear_focus)
+        focus_bar: ft.Column = ft.Column(
+            [
+                ft.Row(
+                    [
+                        ft.Icon(ft.Icons.CENTER_FOCUS_STRONG, size=18),
+                        focus_text,
+                        clear_focus_button,
+                    ],
+                    spacing=6
+                ),
+                ft.Row([focus_radius, focus_direction], spacing=8),
+            ],
+            spacing=4,
+            visible=False
+        )
+
+        def update_focus_bar() -> None:
+            focus_bar.visible = session.focus is not None
+            if session.focus is not None:
+                focus_text.value = session.focus.table_name
+
+        def set_busy(busy: bool) -> None:
+            """
+            Пока идет фоновая задача, недоступны элементы, меняющие то, что она читает: раскладку, движок и фокус
+            """
+            accept_button.disabled = busy
+            stable_layout_button.disabled = busy
+            engine_dropdown.disabled = busy
+            focus_radius.disabled = busy
+            focus_direction.disabled = busy
+            clear_focus_button.disabled = busy
+            for selector in visibility_column.controls:
+                if selector.focus_button is not None:
+                    selector.focus_button.disabled = busy
+
+        def stop_active_task() -> None:
+            """
+            Отменяет текущую задачу; новое поколение не дает ей изменить сессию, даже если отмена опоздает
+            """
+            nonlocal active_task
+            if active_task:
+                active_task.cancel()
+                active_task = None
+            session.begin_task()
+
+        def cancel_task(e: ft.ControlEvent) -> None:
+            stop_active_task()
+
+            # Без готовой диаграммы на экране нечего показывать, поэтому отмена возвращает к выбору базы
+            if svg_data is None:
+                go_to_screen(db_choice_screen())
+                return
+
+            progress_panel.visible = False
+            set_busy(False)
+            page.update()
+
+        progress_panel: ProgressPanel = ProgressPanel(on_cancel=cancel_task)
+
+        def run_task(operation: Callable[[Progress, int], Any], on_done: Callable[[Any], None]) -> None:
+            """
+            Запускает рефлексию или отрисовку в фоне, показывая ее прогресс поверх диаграммы.
+            Операция получает номер поколения задачи; результаты задач, смененных более новыми, игнорируются
+            """
+            nonlocal active_task
+
+            def done(result: Any) -> None:
+                nonlocal active_task
+                if not session.is_current(generation):
+                    return
+                active_task = None
+                progress_panel.visible = False
+                set_busy(False)
+                on_done(result)
+                page.update()
+
+            def failed(ex: Exception) -> None:
+                nonlocal active_task
+                if not session.is_current(generation):
+                    return
+                active_task = None
+                progress_panel.visible = False
+                set_busy(False)
+                error_text.value = f"Ошибка построения схемы: {ex}"
+                page.update()
+
+            def on_progress(event: ProgressEvent) -> None:
+                if not session.is_current(generation):
+                    return
+                progress_panel.show_event(event)
+                page.update()
+
+            if active_task:
+                active_task.cancel()
+            generation: int = session.begin_task()
+
+            progress_panel.visible = True
+            set_busy(True)
+            active_task = BackgroundTask(page, lambda progress: operation(progress, generation), done, failed,
+                                         on_progress)
+            active_task.start()
+
+        def on_schema_loaded(result: Tuple[bool, str]) -> None:
+            from_cache, data = result
+            fill_visibility_controls()
+            show_svg(data)
+
+            if from_cache:
+                # Проверка идет обычной фоновой задачей, поэтому не пересекается с действиями пользователя над сессией
+                run_task(check_schema_freshness, on_freshness_checked)
+
+        def load_schema(progress: Progress, generation: int) -> Tuple[bool, str]:
+            from_cache = session.load(progress, generation)
+            return from_cache, session.render(progress, generation)
+
+        def on_schema_refreshed(data: Optional[str]) -> None:
+            if data is not None:
+                fill_visibility_controls()
+                show_svg(data)
+
+        def refresh_and_render(progress: Progress, generation: int) -> Optional[str]:
+            changes: SchemaChanges = session.refresh(progress, generation)
+            if changes.is_empty():
+                return None
+            return session.render(progress, generation)
 
         def on_accept_tables(e: ft.ControlEvent) -> None:
-            nonlocal svg_data, base_width, base_height, current_scale
+            run_task(session.render, show_svg)
+            page.update()
 
-            svg_data = generate_erd_svg(current_db_url, table_states)
-            svg_view.src = "data:image/svg+xml;utf8," + svg_data.replace("\n", "")
+        def toggle_stable_layout(e: ft.ControlEvent) -> None:
+            if active_task:
+                return
+            session.stable_layout = not session.stable_layout
+            stable_layout_button.selected = session.stable_layout
+            run_task(session.render, show_svg)
+            page.update()
 
-            base_width, base_height = get_svg_size(svg_data)
-            current_scale = 1.0
+        stable_layout_button: ft.IconButton = ft.IconButton(
+            ft.Icons.PUSH_PIN_OUTLINED,
+            selected_icon=ft.Icons.PUSH_PIN,
+            selected=session.stable_layout,
+            tooltip="Закрепить расположение таблиц",
+            on_click=toggle_stable_layout
+        )
 
-            svg_view.width = int(base_width * current_scale)
-            svg_view.height = int(base_height * current_scale)
+        def change_engine(e: ft.ControlEvent) -> None:
+            if active_task:
+                return
+            session.engine = LayoutEngine(e.control.value) if e.control.value else None
+            run_task(session.render, show_svg)
+            page.update()
 
+        engine_dropdown: ft.Dropdown = ft.Dropdown(
+            value=session.engine.value if session.engine else "",
+            options=[ft.dropdown.Option("", "Авто")] + [ft.dropdown.Option(e.value) for e in LayoutEngine],
+            tooltip="Движок раскладки",
+            on_change=change_engine,
+            width=110,
+            dense=True
+        )
+
+        def refresh_schema(e: ft.ControlEvent) -> None:
+            run_task(refresh_and_render, on_schema_refreshed)
             page.update()
 
+        accept_button: ft.FilledButton = ft.FilledButton("Принять", on_click=on_accept_tables, width=250)
+
+        def apply_schemas(schemas: Optional[List[str]]) -> None:
+            """
+            Сохраняет выбор схем в историю подключения и открывает диаграмму заново с новым набором схем
+            """
+            nonlocal schema_session
+            selected: Optional[List[str]] = sorted(schemas) if schemas else None
+            if current_history is not None:
+                current_history['schemas'] = selected
+                save_connection_history(connection_history)
+
+            stop_active_task()
+
+            schema_session = SchemaSession(session.db_url, schema_cache, selected, render_cache,
+                                           reflection_options=session.reflection_options)
+            go_to_screen(erd_screen())
+
+        def open_schemas_dialog(schema_names: List[str]) -> None:
+            selected: List[str] = session.schemas or []
+            checkboxes: List[ft.Checkbox] = [
+                ft.Checkbox(label=name, value=name in selected) for name in schema_names
+            ]
+
+            def on_apply(e: ft.ControlEvent) -> None:
+                page.close(dialog)
+                apply_schemas([e.label for e in checkboxes if e.value])
+
+            dialog: ft.AlertDialog = ft.AlertDialog(
+                title=ft.Text("Схемы"),
+                content=ft.Column(
+                    [ft.Text("Без выбора читается только схема по умолчанию", size=12)] + checkboxes,
+                    scroll=ft.ScrollMode.AUTO,
+                    tight=True
+                ),
+                actions=[
+                    ft.TextButton("Отмена", on_click=lambda e: page.close(dialog)),
+                    ft.FilledButton("Принять", on_click=on_apply),
+                ]
+            )
+            page.open(dialog)
+
+        def on_export_path(e: ft.FilePickerResultEvent) -> None:
+            if not e.path or session.snapshot is None:
+                return
+            try:
+                session.export(e.path)
+            except Exception as ex:
+                error_text.value = f"Ошибка сохранения снимка: {ex}"
+                page.update()
+
+        def export_snapshot(e: ft.ControlEvent) -> None:
+            name: str = session.db_url.database if session.db_url is not None else "schema"
+            file_picker.on_result = on_export_path
+            file_picker.save_file(dialog_title="Сохранить снимок схемы", file_name=name + SNAPSHOT_EXTENSION)
+
+        def select_schemas(e: ft.ControlEvent) -> None:
+            """
+            Читает список схем в фоне: запрос к базе не должен блокировать обработчик событий.
+            Это отдельная задача, она не прерывает идущую отрисовку и не меняет сессию
+            """
+
+            def done(schema_names: List[str]) -> None:
+                schemas_button.disabled = session.is_offline
+                open_schemas_dialog(schema_names)
+                page.update()
+
+            def failed(ex: Exception) -> None:
+                schemas_button.disabled = session.is_offline
+                error_text.value = f"Ошибка чтения схем: {ex}"
+                page.update()
+
+            schemas_button.disabled = True
+            page.update()
+            BackgroundTask(page, lambda progress: get_schema_names(session.db_url, session.reflection_options), done,
+                           failed, lambda event: None).start()
+
+        schemas_button: ft.IconButton = ft.IconButton(ft.Icons.ACCOUNT_TREE, tooltip="Схемы", on_click=select_schemas,
+                                                      disabled=session.is_offline)
+
         table_select_panel: ft.Container = ft.Container(
             ft.Column(
                 [
@@ -306,12 +693,9 @@ def app(page: ft.Page) -> None:
                         alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
                         width=280
                     ),
-                    ft.Column(
-                        visibility_controls,
-                        scroll=ft.ScrollMode.HIDDEN,
-                        expand=True,
-                    ),
-                    ft.FilledButton("Принять", on_click=on_accept_tables, width=250)
+                    focus_bar,
+                    visibility_column,
+                    accept_button
                 ],
                 expand=True,
                 alignment=ft.alignment.center,
@@ -325,12 +709,16 @@ def app(page: ft.Page) -> None:
             expand=False
         )
 
+        def go_back(e: ft.ControlEvent) -> None:
+            stop_active_task()
+            go_to_screen(db_choice_screen())
+
         toolbar: ft.Row = ft.Row(
             [
                 ft.TextButton(
                     "Назад",
                     icon=ft.Icons.ARROW_BACK,
-                    on_click=lambda e: go_to_screen(db_choice_screen()),
+                    on_click=go_back,
                     style=ft.ButtonStyle(
                         padding=ft.padding.symmetric(horizontal=16, vertical=8)
                     )
@@ -340,17 +728,27 @@ def app(page: ft.Page) -> None:
                         ft.IconButton(ft.Icons.REMOVE, tooltip="Уменьшить", on_click=zoom_out),
                         ft.IconButton(ft.Icons.ADD, tooltip="Увеличить", on_click=zoom_in),
                         ft.IconButton(ft.Icons.REFRESH, tooltip="Сбросить", on_click=reset_scale),
+                        stable_layout_button,
+                        engine_dropdown,
                     ],
                     alignment=ft.MainAxisAlignment.CENTER,
                     spacing=8
                 ),
-                ft.Container(width=80)
+                ft.Row(
+                    [
+                        error_text,
+                        ft.IconButton(ft.Icons.SAVE_ALT, tooltip="Сохранить снимок схемы", on_click=export_snapshot),
+                        schemas_button,
+                        ft.IconButton(ft.Icons.SYNC, tooltip="Обновить схему", on_click=refresh_schema),
+                    ],
+                    spacing=8
+                )
             ],
             alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
             vertical_alignment=ft.CrossAxisAlignment.CENTER,
         )
 
-        return ft.View(
+        view: ft.View = ft.View(
             "/erd",
             [
                 ft.Container(
@@ -360,24 +758,35 @@ def app(page: ft.Page) -> None:
                 ft.Container(
                     ft.Row([
                         table_select_panel,
-                        ft.Container(
-                            ft.Column(
-                                [
-                                    ft.Row(
+                        ft.Stack(
+                            [
+                                ft.Container(
+                                    ft.Column(
                                         [
-                                            ft.Container(
-                                                svg_view,
-                                                alignment=ft.alignment.center,
-                                                expand=True
-                                            )
+                                            ft.Row(
+                                                [
+                                                    ft.Container(
+                                                        svg_view,
+                                                        alignment=ft.alignment.center,
+                                                        expand=True
+                                                    )
+                                                ],
+                                                scroll=ft.ScrollMode.ALWAYS
+                                            ),
                                         ],
-                                        scroll=ft.ScrollMode.ALWAYS
+                                        scroll=ft.ScrollMode.ALWAYS,
+                                        expand=True
                                     ),
-                                ],
-                                scroll=ft.ScrollMode.ALWAYS,
-                                expand=True
-                            ),
-                            alignment=ft.alignment.center,
+                                    alignment=ft.alignment.center,
+                                    expand=True
+                                ),
+                                tiled_view,
+                                ft.Container(
+                                    progress_panel,
+                                    alignment=ft.alignment.center,
+                                    expand=True
+                                ),
+                            ],
                             expand=True
                         )
                     ]),
@@ -387,6 +796,32 @@ def app(page: ft.Page) -> None:
             ]
         )
 
+        def check_schema_freshness(progress: Progress, generation: int) -> Tuple[Optional[str], Optional[str]]:
+            """
+            Перечитывает изменившиеся таблицы и перерисовывает схему, если она изменилась с момента кэширования.
+            Возвращает новую диаграмму и текст ошибки подключения
+            """
+            try:
+                changes: SchemaChanges = session.refresh(progress, generation)
+            except OperationCancelled:
+                raise
+            except Exception as ex:
+                return None, f"Схема из кэша, подключение недоступно: {ex}"
+
+            if changes.is_empty():
+                return None, None
+            return session.render(progress, generation), None
+
+        def on_freshness_checked(result: Tuple[Optional[str], Optional[str]]) -> None:
+            data, error = result
+            if error is not None:
+                error_text.value = error
+            on_schema_refreshed(data)
+
+        run_task(load_schema, on_schema_loaded)
+
+        return view
+
     # --- Экран 4: Редактирование соединения ---
     def connection_edit_screen(history: Dict) -> ft.View:
         card_width: int = 400
@@ -401,18 +836,37 @@ def app(page: ft.Page) -> None:
                                               height=field_height, width=card_width)
         database: ft.TextField = ft.TextField(label="База данных", value=history['database'], height=field_height,
                                               width=card_width)
+        native_reflection: ft.Checkbox = ft.Checkbox(label="Читать каталог базы напрямую",
+                                                     value=history.get('native_reflection', True), width=card_width)
+        reflection_workers: ft.TextField = ft.TextField(label="Потоков рефлексии",
+                                                        value=str(history.get('reflection_workers') or ""),
+                                                        hint_text=f"авто, {REFLECTION_WORKERS}", height=field_height,
+                                                        expand=True)
+        statement_timeout: ft.TextField = ft.TextField(label="Таймаут запроса, с",
+                                                       value=str(history.get('statement_timeout') or ""),
+                                                       hint_text="без ограничения", height=field_height, expand=True)
 
         def on_accept(e: ft.ControlEvent) -> None:
             if not all([host.value, port.value, user.value, password.value, database.value]):
                 error_text.value = "Все поля должны быть заполнены!"
                 page.update()
                 return
+            try:
+                workers: Optional[int] = int(reflection_workers.value) if reflection_workers.value else None
+                timeout: Optional[float] = float(statement_timeout.value) if statement_timeout.value else None
+            except ValueError:
+                error_text.value = "Число потоков и таймаут должны быть числами"
+                page.update()
+                return
             try:
                 db_url: DatabaseURL = DatabaseURL(history['dialect'], user.value, password.value, host.value,
                                                   int(port.value),
                                                   database.value)
-                conn: Connection = Connection(db_url)
-                conn.get_engine().connect().close()
+                with engine_registry.acquire(db_url) as conn:
+                    conn.get_engine().connect().close()
+                previous_db_url: DatabaseURL = history_to_db_url(history)
+                if previous_db_url.url != db_url.url:
+                    engine_registry.dispose(previous_db_url)
 
                 for h in connection_history:
                     if h.get('uuid') == history.get('uuid'):
@@ -422,7 +876,10 @@ def app(page: ft.Page) -> None:
                             'host': host.value,
                             'port': int(port.value),
                             'database': database.value,
-                            'dialect': history['dialect']
+                            'dialect': history['dialect'],
+                            'native_reflection': native_reflection.value,
+                            'reflection_workers': workers,
+                            'statement_timeout': timeout
                         })
                         break
                 save_connection_history(connection_history)
@@ -446,6 +903,11 @@ def app(page: ft.Page) -> None:
                             user,
                             password,
                             database,
+                            native_reflection,
+                            ft.Row([
+                                reflection_workers,
+                                statement_timeout
+                            ], spacing=8, alignment=ft.MainAxisAlignment.CENTER),
                             error_text,
                             ft.Row([
                                 ft.OutlinedButton("Отмена", on_click=lambda e: go_to_screen(db_choice_screen()),
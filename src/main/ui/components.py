@@ -1,9 +1,11 @@
-from typing import Callable, Dict, Any
+import math
+from typing import Callable, Dict, Any, Optional
 
 import flet as ft
 
+from src.main.core import ProgressEvent, ProgressStage
 from src.main.persistence import Dialect
-from src.main.visualizer import VisualizeState
+from src.main.visualizer import VisualizeState, SvgTileSource
 
 
 class DatabaseCard(ft.Container):
@@ -96,11 +98,20 @@ class TableVisibilitySelector(ft.Row):
             self,
             table_name: str,
             selected_value: VisualizeState,
-            on_change: Callable[[ft.ControlEvent], None]
+            on_change: Callable[[ft.ControlEvent], None],
+            on_focus: Optional[Callable[[ft.ControlEvent], None]] = None,
+            tooltip: Optional[str] = None
     ) -> None:
+        focus_controls = []
+        self.focus_button: Optional[ft.IconButton] = None
+        if on_focus is not None:
+            self.focus_button = ft.IconButton(ft.Icons.CENTER_FOCUS_STRONG, tooltip="Фокус на таблице", icon_size=16,
+                                              width=28, on_click=on_focus)
+            focus_controls.append(self.focus_button)
         super().__init__(
             controls=[
-                ft.Text(table_name, expand=True),
+                ft.Text(table_name, expand=True, tooltip=tooltip),
+                *focus_controls,
                 ft.RadioGroup(
                     content=ft.Row(
                         [
@@ -118,3 +129,140 @@ class TableVisibilitySelector(ft.Row):
             spacing=8,
             expand=True
         )
+
+
+class ProgressPanel(ft.Container):
+    def __init__(self, on_cancel: Callable[[ft.ControlEvent], None]) -> None:
+        self._text: ft.Text = ft.Text("", size=14)
+        self._bar: ft.ProgressBar = ft.ProgressBar(width=320, value=None)
+        super().__init__(
+            content=ft.Column(
+                [
+                    self._text,
+                    self._bar,
+                    ft.OutlinedButton("Отмена", on_click=on_cancel, width=160),
+                ],
+                horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+                spacing=12
+            ),
+            padding=20,
+            border=ft.border.all(1, ft.Colors.OUTLINE),
+            border_radius=12,
+            bgcolor=ft.Colors.SURFACE,
+            visible=False,
+        )
+
+    def show_event(self, event: ProgressEvent) -> None:
+        if event.stage == ProgressStage.REFLECTING:
+            if event.total:
+                self._text.value = f"Чтение схемы: {event.done} из {event.total} таблиц"
+                self._bar.value = event.done / event.total
+            else:
+                self._text.value = "Чтение схемы..."
+                self._bar.value = None
+        elif event.stage == ProgressStage.LAYOUT:
+            self._text.value = "Построение диаграммы..."
+            self._bar.value = None
+        else:
+            self._text.value = "Диаграмма готова"
+            self._bar.value = 1
+
+
+class TiledDiagramView(ft.Container):
+    """
+    Просмотр большой диаграммы по тайлам: показываются только тайлы, попадающие в окно,
+    перемещение перетаскиванием, масштаб колесом мыши
+    """
+
+    def __init__(self, width: float, height: float, min_zoom: float = 0.2, max_zoom: float = 20.0,
+                 on_zoom: Optional[Callable[[float], None]] = None) -> None:
+        self._source: Optional[SvgTileSource] = None
+        self._on_zoom: Optional[Callable[[float], None]] = on_zoom
+        self._zoom: float = 1.0
+        self._min_zoom: float = min_zoom
+        self._max_zoom: float = max_zoom
+        self._offset_x: float = 0
+        self._offset_y: float = 0
+        self._stack: ft.Stack = ft.Stack([], width=width, height=height)
+        super().__init__(
+            content=ft.GestureDetector(
+                content=self._stack,
+                on_pan_update=self._on_pan,
+                on_scroll=self._on_scroll,
+                drag_interval=30
+            ),
+            width=width,
+            height=height,
+            bgcolor=ft.Colors.WHITE,
+            clip_behavior=ft.ClipBehavior.HARD_EDGE,
+            visible=False,
+        )
+
+    @property
+    def zoom(self) -> float:
+        return self._zoom
+
+    def set_source(self, source: SvgTileSource, zoom: float = 1.0, keep_offset: bool = False) -> None:
+        """
+        Показывает новую диаграмму в масштабе zoom; с keep_offset окно остается на прежнем месте,
+        например при перерисовке той же схемы с другой подробностью
+        """
+        self._source = source
+        self._zoom = min(max(zoom, self._min_zoom), self._max_zoom)
+        if not keep_offset:
+            self._offset_x = 0
+            self._offset_y = 0
+        self._show_tiles()
+
+    def set_zoom(self, zoom: float) -> None:
+        """
+        Меняет масштаб относительно центра окна
+        """
+        zoom = min(max(zoom, self._min_zoom), self._max_zoom)
+        center_x, center_y = self.width / 2, self.height / 2
+        ratio = zoom / self._zoom
+        self._offset_x = (self._offset_x + center_x) * ratio - center_x
+        self._offset_y = (self._offset_y + center_y) * ratio - center_y
+        self._zoom = zoom
+        self._show_tiles()
+
+    def _on_pan(self, e: ft.DragUpdateEvent) -> None:
+        self._offset_x -= e.delta_x
+        self._offset_y -= e.delta_y
+        self._show_tiles()
+        self.update()
+
+    def _on_scroll(self, e: ft.ScrollEvent) -> None:
+        if e.scroll_delta_y:
+            self.set_zoom(self._zoom * (0.9 if e.scroll_delta_y > 0 else 1.1))
+            self.update()
+            if self._on_zoom:
+                self._on_zoom(self._zoom)
+
+    def _show_tiles(self) -> None:
+        if self._source is None:
+            return
+
+        tile_size = self._source.tile_size
+        columns, rows = self._source.get_tile_count(self._zoom)
+        # Диаграмма не уводится за края окна дальше, чем на ее собственный размер
+        self._offset_x = min(max(self._offset_x, -self.width / 2), columns * tile_size - self.width / 2)
+        self._offset_y = min(max(self._offset_y, -self.height / 2), rows * tile_size - self.height / 2)
+
+        first_column = max(0, math.floor(self._offset_x / tile_size))
+        last_column = min(columns - 1, math.floor((self._offset_x + self.width) / tile_size))
+        first_row = max(0, math.floor(self._offset_y / tile_size))
+        last_row = min(rows - 1, math.floor((self._offset_y + self.height) / tile_size))
+
+        self._stack.controls = [
+            ft.Image(
+                src="data:image/svg+xml;utf8," + self._source.get_tile(self._zoom, column, row),
+                left=column * tile_size - self._offset_x,
+                top=row * tile_size - self._offset_y,
+                width=tile_size,
+                height=tile_size,
+                gapless_playback=True
+            )
+            for row in range(first_row, last_row + 1)
+            for column in range(first_column, last_column + 1)
+        ]
@@ -0,0 +1,173 @@
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Iterator
+
+from src.main.core import Table, Progress, SchemaGraph, OperationCancelled
+from src.main.persistence import DatabaseURL, SchemaCache, SchemaSnapshot, SchemaChanges, detect_changes, \
+    load_snapshot, export_snapshot, ReflectionOptions
+from src.main.ui.utils import reflect_schema, generate_erd_svg, LAYOUT_WORKERS, LAYOUT_TIMEOUT
+from src.main.visualizer import VisualizeState, RenderCache, StableLayout, LayoutEngine, LabelCache, DetailLevel, \
+    initial_detail_level, Focus
+
+
+class SchemaSession:
+    """
+    Владеет отраженной схемой и состояниями видимости таблиц на время работы с экраном ERD.
+    Рефлексия выполняется только при первой загрузке без кэша и при явном обновлении.
+    С snapshot_path схема читается из файла снимка без подключения к базе.
+    Фоновые задачи получают номер поколения из begin_task; задача, которую сменила более новая,
+    уже не меняет сессию, даже если отмена дошла до нее слишком поздно
+    """
+
+    def __init__(self, db_url: Optional[DatabaseURL], schema_cache: SchemaCache, schemas: Optional[List[str]] = None,
+                 render_cache: Optional[RenderCache] = None, snapshot_path: Optional[str] = None,
+                 reflection_options: Optional[ReflectionOptions] = None):
+        self.db_url = db_url
+        self.snapshot_path = snapshot_path
+        self.reflection_options = reflection_options
+        self.schema_cache = schema_cache
+        self.schemas = schemas
+        self.render_cache = render_cache
+        self.stable_layout = False
+        self.engine: Optional[LayoutEngine] = None
+        self.label_cache = LabelCache()
+        # Уровень детализации выбирается по размеру схемы при первой отрисовке
+        self.detail_level: Optional[DetailLevel] = None
+        self.layout: Optional[StableLayout] = None
+        # Режим фокуса: показывается только окрестность выбранной таблицы
+        self.focus: Optional[Focus] = None
+        self.schema_graph: Optional[SchemaGraph] = None
+        self.snapshot: Optional[SchemaSnapshot] = None
+        self.table_states: Dict[str, VisualizeState] = {}
+        self.generation = 0
+        self.lock = threading.Lock()
+
+    @property
+    def tables(self) -> List[Table]:
+        return self.snapshot.tables if self.snapshot else []
+
+    @property
+    def graph(self) -> SchemaGraph:
+        """
+        Граф отношений текущего снимка, строится один раз после загрузки или обновления схемы
+        """
+        if self.schema_graph is None or self.schema_graph.tables is not self.tables:
+            self.schema_graph = SchemaGraph(self.tables)
+        return self.schema_graph
+
+    @property
+    def is_offline(self) -> bool:
+        return self.snapshot_path is not None
+
+    def begin_task(self) -> int:
+        """
+        Начинает новое поколение задач: все запущенные ранее задачи больше не могут менять сессию
+        """
+        with self.lock:
+            self.generation += 1
+            return self.generation
+
+    def is_current(self, generation: Optional[int]) -> bool:
+        return generation is None or generation == self.generation
+
+    def load(self, progress: Optional[Progress] = None, generation: Optional[int] = None) -> bool:
+        """
+        Загружает схему из кэша, а при его отсутствии отражает базу. Возвращает True, если схема взята из кэша
+        """
+        if self.snapshot is not None:
+            return False
+
+        if self.is_offline:
+            self.refresh(progress, generation)
+            return False
+
+        snapshot = self.schema_cache.get(self.db_url, self.schemas)
+        if snapshot is None:
+            self.refresh(progress, generation)
+            return False
+
+        with self.__mutation(generation):
+            self.snapshot = snapshot
+            self.__sync_table_states()
+        return True
+
+    def refresh(self, progress: Optional[Progress] = None, generation: Optional[int] = None) -> SchemaChanges:
+        """
+        Перечитывает изменившиеся таблицы и сохраняет схему в кэш. Без подключения заново читает файл снимка
+        """
+        if self.is_offline:
+            snapshot = load_snapshot(self.snapshot_path, progress)
+            changes = detect_changes(self.snapshot.versions if self.snapshot else {}, snapshot.versions)
+            if progress is not None:
+                progress.check()
+        else:
+            tables, versions, changes = reflect_schema(self.db_url, self.snapshot, progress, self.schemas,
+                                                       self.reflection_options)
+            if progress is not None:
+                progress.check()
+            if not self.is_current(generation):
+                raise OperationCancelled()
+            snapshot = self.schema_cache.put(self.db_url, tables, versions, self.schemas)
+
+        with self.__mutation(generation):
+            self.snapshot = snapshot
+            self.__sync_table_states()
+            if self.focus is not None and self.focus.table_name not in self.table_states:
+                self.focus = None
+            if not changes.is_empty():
+                # Метки измененных и удаленных таблиц больше не понадобятся
+                self.label_cache.retain(self.tables)
+
+        return changes
+
+    def export(self, path: str) -> None:
+        """
+        Сохраняет текущую схему в файл снимка для отрисовки без подключения
+        """
+        source = self.db_url.safe_url if self.db_url is not None else None
+        export_snapshot(path, self.snapshot, source, self.schemas)
+
+    def render(self, progress: Optional[Progress] = None, generation: Optional[int] = None) -> str:
+        """
+        В режиме стабильной раскладки полная схема раскладывается один раз на каждый снимок и уровень детализации.
+        Фокус имеет приоритет: окрестность таблицы раскладывается отдельно по графу отношений текущего снимка
+        """
+        with self.__mutation(generation):
+            if self.detail_level is None:
+                self.detail_level = initial_detail_level(len(self.tables))
+
+            focus = self.focus
+            table_states = dict(self.table_states)
+            layout = None
+            if self.stable_layout and focus is None:
+                if self.layout is None or self.layout.tables is not self.tables or self.layout.engine != self.engine \
+                        or self.layout.level != self.detail_level:
+                    self.layout = StableLayout(self.tables, self.render_cache, LAYOUT_WORKERS, self.engine,
+                                               LAYOUT_TIMEOUT, self.label_cache, self.detail_level, self.graph)
+                layout = self.layout
+
+        if focus is not None:
+            return generate_erd_svg(self.tables, None, progress, self.render_cache, None, self.engine,
+                                    self.label_cache, self.detail_level, focus, self.graph)
+
+        return generate_erd_svg(self.tables, table_states, progress, self.render_cache, layout,
+                                self.engine, self.label_cache, self.detail_level, schema_graph=self.graph)
+
+    @contextmanager
+    def __mutation(self, generation: Optional[int]) -> Iterator[None]:
+        """
+        Изменяет сессию атомарно относительно begin_task: задача устаревшего поколения отменяется
+        """
+        with self.lock:
+            if not self.is_current(generation):
+                raise OperationCancelled()
+            yield
+
+    def __sync_table_states(self) -> None:
+        """
+        Новые таблицы показываются, состояния удаленных таблиц забываются
+        """
+        self.table_states = {
+            table.qualified_name: self.table_states.get(table.qualified_name, VisualizeState.SHOW)
+            for table in self.tables
+        }
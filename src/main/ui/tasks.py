@@ -0,0 +1,45 @@
+from typing import Callable, Any
+
+import flet as ft
+
+from src.main.core import Progress, ProgressEvent, OperationCancelled
+
+
+class BackgroundTask:
+    """
+    Выполняет длительную операцию в рабочем потоке, не блокируя обработчики событий flet.
+    После отмены результат и ошибки операции игнорируются
+    """
+
+    def __init__(
+            self,
+            page: ft.Page,
+            operation: Callable[[Progress], Any],
+            on_done: Callable[[Any], None],
+            on_error: Callable[[Exception], None],
+            on_progress: Callable[[ProgressEvent], None]
+    ) -> None:
+        self._page: ft.Page = page
+        self._operation: Callable[[Progress], Any] = operation
+        self._on_done: Callable[[Any], None] = on_done
+        self._on_error: Callable[[Exception], None] = on_error
+        self.progress: Progress = Progress(on_progress)
+
+    def start(self) -> None:
+        self._page.run_thread(self._run)
+
+    def cancel(self) -> None:
+        self.progress.cancel()
+
+    def _run(self) -> None:
+        try:
+            result = self._operation(self.progress)
+        except OperationCancelled:
+            return
+        except Exception as ex:
+            if not self.progress.is_cancelled():
+                self._on_error(ex)
+            return
+
+        if not self.progress.is_cancelled():
+            self._on_done(result)
@@ -1,53 +1,57 @@
-import json
 import os
 import re
-import uuid
 from typing import List, Dict, Optional, Tuple
 
-from src.main.persistence import Dialect, Connection, DatabaseURL
-from src.main.persistence.inspector import SQLAlchemyDatabaseSchemaInspector
-from src.main.visualizer import GraphvizDatabaseSchemaVisualizer
-
-
-def save_connection_history(history: List[Dict]) -> None:
-    serializable_history: List[Dict] = []
-
-    for h in history:
-        h_copy: Dict = h.copy()
-        if 'uuid' not in h_copy:
-            h_copy['uuid'] = str(uuid.uuid4())
-        if 'dialect' in h_copy:
-            h_copy['dialect'] = h_copy['dialect'].value
-        serializable_history.append(h_copy)
-
-    with open("connections.json", "w") as f:
-        json.dump(serializable_history, f)
-
-
-def load_connection_history() -> List[Dict]:
-    if not os.path.exists("connections.json"):
-        return []
-    with open("connections.json", "r") as f:
-        history: List[Dict] = json.load(f)
-
-    # Конвертируем строки обратно в Dialect и добавляем UUID если отсутствует
-    for h in history:
-        if 'dialect' in h:
-            h['dialect'] = Dialect.from_value(h['dialect'])
-        # Add UUID if not present (for backward compatibility)
-        if 'uuid' not in h:
-            h['uuid'] = str(uuid.uuid4())
-
-    return history
-
-
-def generate_erd_svg(db_url: DatabaseURL, visualize_state: Optional[Dict] = None) -> str:
-    conn: Connection = Connection(db_url)
-    inspector: SQLAlchemyDatabaseSchemaInspector = SQLAlchemyDatabaseSchemaInspector(conn)
-    visualizer: GraphvizDatabaseSchemaVisualizer = GraphvizDatabaseSchemaVisualizer(inspector.get_tables(), visualize_state)
-    visualizer.visualize()
-    with open("./erd.svg", "r") as f:
-        return f.read()
+from src.main.core import DatabaseSchemaInspector, Table, Progress, SchemaGraph
+from src.main.persistence import DatabaseURL, SchemaSnapshot, SchemaChanges, create_schema_inspector, \
+    refresh_tables, engine_registry, ReflectionOptions
+from src.main.persistence.history import save_connection_history, load_connection_history, history_to_db_url, \
+    history_to_reflection_options
+from src.main.visualizer import GraphvizDatabaseSchemaVisualizer, RenderCache, StableLayout, LayoutEngine, \
+    LabelCache, DetailLevel, Focus, compact_svg
+
+
+def get_schema_names(db_url: DatabaseURL, options: Optional[ReflectionOptions] = None) -> List[str]:
+    with engine_registry.acquire(db_url) as conn:
+        return create_schema_inspector(conn, options=options).get_schema_names()
+
+
+def reflect_schema(
+        db_url: DatabaseURL,
+        snapshot: Optional[SchemaSnapshot] = None,
+        progress: Optional[Progress] = None,
+        schemas: Optional[List[str]] = None,
+        options: Optional[ReflectionOptions] = None
+) -> Tuple[List[Table], Dict[str, str], SchemaChanges]:
+    """
+    Отражает схему целиком или, если есть снимок, только таблицы, изменившиеся с момента его создания.
+    Без schemas читается только схема по умолчанию
+    """
+    with engine_registry.acquire(db_url) as conn:
+        inspector: DatabaseSchemaInspector = create_schema_inspector(conn, schemas, options)
+        if snapshot is None:
+            return refresh_tables(inspector, [], {}, progress)
+        return refresh_tables(inspector, snapshot.tables, snapshot.versions, progress)
+
+
+# Компоненты схемы раскладываются отдельными процессами Graphviz, по одному на ядро
+LAYOUT_WORKERS = os.cpu_count() or 1
+# Сколько секунд ждать раскладки, прежде чем перейти к более быстрому движку
+LAYOUT_TIMEOUT = 30.0
+
+
+def generate_erd_svg(tables: List[Table], visualize_state: Optional[Dict] = None,
+                     progress: Optional[Progress] = None, render_cache: Optional[RenderCache] = None,
+                     layout: Optional[StableLayout] = None, engine: Optional[LayoutEngine] = None,
+                     label_cache: Optional[LabelCache] = None, level: DetailLevel = DetailLevel.FULL,
+                     focus: Optional[Focus] = None, schema_graph: Optional[SchemaGraph] = None) -> str:
+    visualizer: GraphvizDatabaseSchemaVisualizer = GraphvizDatabaseSchemaVisualizer(tables, visualize_state,
+                                                                                    render_cache, layout,
+                                                                                    LAYOUT_WORKERS, engine,
+                                                                                    LAYOUT_TIMEOUT, label_cache,
+                                                                                    level, focus, schema_graph)
+    # Сжатие идет в фоновом потоке рендеринга, экран получает уже компактный SVG
+    return compact_svg(visualizer.visualize(progress).decode("utf-8"))
 
 
 def get_svg_size(svg_text: str) -> Tuple[float, float]:
@@ -1,2 +1,11 @@
-from .html_builder import build_table
-from .visualizer import GraphvizDatabaseSchemaVisualizer, VisualizeState
\ No newline at end of file
+from .detail import DetailLevel, initial_detail_level, adjust_detail_level
+from .html_builder import build_table, build_table_blocks, is_column_shown
+from .label_cache import LabelCache, table_content_key
+from .svg_optimizer import compact_svg, compress_svg, decompress_svg
+from .render_cache import RenderCache, RenderCacheStats, render_key
+from .packing import pack_svgs, SVG_ELEMENT_PATTERN
+from .layout import LayoutEngine, LayoutError, LayoutTimeout, LayoutTimeouts, FALLBACK_ENGINES, choose_layout_engine, \
+    run_layout, layout_timeouts
+from .focus import FocusDirection, Focus, get_focus_nodes
+from .visualizer import GraphvizDatabaseSchemaVisualizer, VisualizeState, StableLayout
+from .tiles import SvgTileSource
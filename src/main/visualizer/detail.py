@@ -0,0 +1,34 @@
+import enum
+
+
+class DetailLevel(enum.Enum):
+    NAME = 'name'
+    KEYS = 'keys'
+    FULL = 'full'
+
+
+DETAIL_LEVELS = [DetailLevel.NAME, DetailLevel.KEYS, DetailLevel.FULL]
+
+# Масштаб, при котором диаграмма перерисовывается на уровень подробнее или проще
+ZOOM_IN_THRESHOLD = 1.6
+ZOOM_OUT_THRESHOLD = 0.6
+
+
+def initial_detail_level(table_count: int) -> DetailLevel:
+    """
+    Большая схема сначала показывается обзором: без столбцов она и раскладывается, и рисуется быстрее
+    """
+    if table_count > 300:
+        return DetailLevel.NAME
+    if table_count > 100:
+        return DetailLevel.KEYS
+    return DetailLevel.FULL
+
+
+def adjust_detail_level(level: DetailLevel, zoom: float) -> DetailLevel:
+    index = DETAIL_LEVELS.index(level)
+    if zoom >= ZOOM_IN_THRESHOLD and index < len(DETAIL_LEVELS) - 1:
+        return DETAIL_LEVELS[index + 1]
+    if zoom <= ZOOM_OUT_THRESHOLD and index > 0:
+        return DETAIL_LEVELS[index - 1]
+    return level
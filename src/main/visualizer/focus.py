@@ -0,0 +1,34 @@
+import enum
+from dataclasses import dataclass
+from typing import Set
+
+from src.main.core import SchemaGraph
+
+
+class FocusDirection(enum.Enum):
+    OUTGOING = 'outgoing'
+    INCOMING = 'incoming'
+    BOTH = 'both'
+
+
+@dataclass
+class Focus:
+    table_name: str
+    radius: int = 1
+    direction: FocusDirection = FocusDirection.BOTH
+
+
+def get_focus_nodes(graph: SchemaGraph, focus: Focus) -> Set[int]:
+    """
+    Вершины графа в окрестности таблицы фокуса; пустое множество, если таблицы нет в схеме
+    """
+    node = graph.get_id(focus.table_name)
+    if node is None:
+        return set()
+
+    return graph.get_neighborhood(
+        node,
+        focus.radius,
+        outgoing=focus.direction != FocusDirection.INCOMING,
+        incoming=focus.direction != FocusDirection.OUTGOING
+    )
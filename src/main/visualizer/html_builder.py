@@ -1,9 +1,65 @@
 from src.main.core import Column, Table as TableModel
 from src.main.visualizer.blocks import *
+from src.main.visualizer.detail import DetailLevel
+
+TABLE_START = '<TABLE border="0" cellborder="1" cellspacing="0">'
+TABLE_END = '</TABLE>'
+HEADER_ROW_TEMPLATE = '<TR><TD bgcolor="lightblue"><B><FONT face="Arial" point-size="9">{}</FONT></B></TD></TR>'
+COLUMN_NAME_TEMPLATE = '<B><FONT face="Arial" point-size="9">{}</FONT></B> <BR/> '
+COLUMN_TYPE_TEMPLATE = '<I><FONT face="Arial" point-size="7" color="gray">{}</FONT></I>'
+COLUMN_NULLABLE = ' <FONT face="Arial" point-size="7" color="gray">NULL</FONT>'
+KEY_PK = '<B><FONT face="Arial" point-size="7" color="blue">PK</FONT></B> '
+KEY_FK = '<B><FONT face="Arial" point-size="7" color="green">FK</FONT></B> '
+KEY_UQ = '<B><FONT face="Arial" point-size="7" color="purple">UQ</FONT></B> '
+
+
+def is_column_shown(column: Column, level: DetailLevel) -> bool:
+    if level == DetailLevel.FULL:
+        return True
+    if level == DetailLevel.KEYS:
+        return column.is_primary_key or column.is_foreign_key or column.is_unique
+    return False
+
+
+def build_table(table: TableModel, level: DetailLevel = DetailLevel.FULL) -> str:
+    """
+    Собирает HTML-метку таблицы прямым форматированием строк. Результат побайтно совпадает
+    с build_table_blocks, но без построения и обхода дерева элементов.
+    На уровне KEYS выводятся только ключевые столбцы, на уровне NAME только заголовок
+    """
+    parts = [TABLE_START, HEADER_ROW_TEMPLATE.format(table.qualified_name)]
+    append = parts.append
 
-
-def build_table(table: TableModel) -> str:
-    table_rows = [build_table_header_row(table.name)]
+    for column in table.columns:
+        if level != DetailLevel.FULL and not is_column_shown(column, level):
+            continue
+
+        if column.is_primary_key:
+            key = KEY_PK
+        elif column.is_foreign_key:
+            key = KEY_FK
+        elif column.is_unique:
+            key = KEY_UQ
+        else:
+            key = ''
+
+        append(f'<TR><TD port="{column.name}">' if column.name else '<TR><TD>')
+        append(COLUMN_NAME_TEMPLATE.format(column.name))
+        append(key)
+        append(COLUMN_TYPE_TEMPLATE.format(column.type))
+        if column.is_nullable:
+            append(COLUMN_NULLABLE)
+        append('</TD></TR>')
+
+    append(TABLE_END)
+    return ''.join(parts)
+
+
+def build_table_blocks(table: TableModel) -> str:
+    """
+    Сборка метки через дерево элементов blocks; остается эталоном для build_table
+    """
+    table_rows = [build_table_header_row(table.qualified_name)]
 
     for column in table.columns:
         table_rows.append(build_table_column_row(column))
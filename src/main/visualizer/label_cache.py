@@ -0,0 +1,58 @@
+import threading
+from collections import OrderedDict
+from typing import List, Tuple
+
+from src.main.core import Table
+from src.main.visualizer.detail import DetailLevel
+from src.main.visualizer.html_builder import build_table
+
+
+def table_content_key(table: Table) -> Tuple:
+    """
+    Ключ содержимого таблицы: все, от чего зависит ее метка
+    """
+    return (
+        table.schema,
+        table.name,
+        tuple(
+            (e.name, e.type, e.is_primary_key, e.is_foreign_key, e.is_unique, e.is_nullable)
+            for e in table.columns
+        )
+    )
+
+
+class LabelCache:
+    """
+    Кэш HTML-меток таблиц по их содержимому. Измененная таблица получает новый ключ,
+    а метки таблиц, которых больше нет в схеме, убирает retain
+    """
+
+    def __init__(self, max_entries: int = 50000):
+        self.max_entries = max_entries
+        self.labels: OrderedDict[Tuple[DetailLevel, Tuple], str] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, table: Table, level: DetailLevel = DetailLevel.FULL) -> str:
+        key = (level, table_content_key(table))
+        with self.lock:
+            label = self.labels.get(key)
+            if label is not None:
+                self.labels.move_to_end(key)
+                return label
+
+        label = build_table(table, level)
+        with self.lock:
+            self.labels[key] = label
+            if len(self.labels) > self.max_entries:
+                self.labels.popitem(last=False)
+
+        return label
+
+    def retain(self, tables: List[Table]) -> None:
+        """
+        Оставляет только метки переданных таблиц, например после обновления схемы
+        """
+        keys = {table_content_key(table) for table in tables}
+        with self.lock:
+            for key in [e for e in self.labels if e[1] not in keys]:
+                del self.labels[key]
@@ -0,0 +1,117 @@
+import enum
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict
+
+from src.main.core import Progress, OperationCancelled
+
+
+class LayoutEngine(enum.Enum):
+    DOT = 'dot'
+    SFDP = 'sfdp'
+    FDP = 'fdp'
+    NEATO = 'neato'
+    OSAGE = 'osage'
+
+
+# Более быстрый движок, на который переходит раскладка, не уложившаяся во время
+FALLBACK_ENGINES: Dict[LayoutEngine, LayoutEngine] = {
+    LayoutEngine.DOT: LayoutEngine.SFDP,
+    LayoutEngine.FDP: LayoutEngine.SFDP,
+    LayoutEngine.NEATO: LayoutEngine.SFDP,
+    LayoutEngine.SFDP: LayoutEngine.OSAGE,
+}
+
+# Интервал, с которым ожидание раскладки проверяет отмену и бюджет времени
+POLL_INTERVAL = 0.2
+
+
+class LayoutError(RuntimeError):
+    pass
+
+
+class LayoutTimeout(LayoutError):
+    pass
+
+
+def choose_layout_engine(node_count: int, edge_count: int) -> LayoutEngine:
+    """
+    Иерархический dot дает самую читаемую схему, но растет сверхлинейно; на больших графах
+    используется многоуровневый sfdp, а почти без связей таблицы просто упаковываются osage
+    """
+    if node_count <= 300 and edge_count <= 600:
+        return LayoutEngine.DOT
+    if edge_count < node_count // 10:
+        return LayoutEngine.OSAGE
+    return LayoutEngine.SFDP
+
+
+class LayoutTimeouts:
+    """
+    Помнит раскладки, не уложившиеся во время, и сколько времени у них было. Повторная отрисовка того же DOT
+    с не большим бюджетом сразу переходит к запасному движку, не дожидаясь заведомого таймаута
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.budgets: OrderedDict[str, float] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def remember(self, key: str, budget: float) -> None:
+        with self.lock:
+            self.budgets[key] = max(budget, self.budgets.pop(key, 0))
+            if len(self.budgets) > self.max_entries:
+                self.budgets.popitem(last=False)
+
+    def is_hopeless(self, key: str, budget: float) -> bool:
+        with self.lock:
+            failed_budget = self.budgets.get(key)
+            return failed_budget is not None and budget <= failed_budget
+
+    def clear(self) -> None:
+        with self.lock:
+            self.budgets.clear()
+
+
+layout_timeouts = LayoutTimeouts()
+
+
+def run_layout(source: str, engine: LayoutEngine, format: str = 'svg', timeout: Optional[float] = None,
+               progress: Optional[Progress] = None, deadline: Optional[float] = None) -> bytes:
+    """
+    Запускает движок Graphviz, передавая DOT через stdin. Процесс убивается при отмене операции,
+    по истечении timeout секунд или при наступлении deadline (по time.monotonic)
+    """
+    if timeout is not None:
+        deadline = time.monotonic() + timeout if deadline is None else min(deadline, time.monotonic() + timeout)
+    process = subprocess.Popen(
+        [engine.value, f'-T{format}'],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE
+    )
+
+    data = source.encode("utf-8")
+    while True:
+        try:
+            # Данные передаются только первым вызовом: повторный communicate с input запрещен,
+            # а без него продолжает уже начатую передачу и чтение вывода
+            stdout, stderr = process.communicate(data, timeout=POLL_INTERVAL)
+            break
+        except subprocess.TimeoutExpired:
+            data = None
+            if progress is not None and progress.is_cancelled():
+                process.kill()
+                process.communicate()
+                raise OperationCancelled()
+            if deadline is not None and time.monotonic() > deadline:
+                process.kill()
+                process.communicate()
+                raise LayoutTimeout(f"{engine.value} не уложился в отведенное время")
+
+    if process.returncode != 0:
+        raise LayoutError(stderr.decode("utf-8", errors="replace").strip())
+
+    return stdout
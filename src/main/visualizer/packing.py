@@ -0,0 +1,70 @@
+import math
+import re
+from typing import List, Tuple
+
+SVG_ROOT_PATTERN = re.compile(r'<svg\b[^>]*>')
+SVG_SIZE_PATTERN = re.compile(r'\swidth="([\d.]+)[a-zA-Z]*"\s+height="([\d.]+)[a-zA-Z]*"')
+# Нода или ребро Graphviz вместе с предшествующим комментарием; вложенных групп в них не бывает.
+# Переводы строк необязательны, чтобы шаблон подходил и к сжатому SVG
+SVG_ELEMENT_PATTERN = re.compile(
+    r'(?:<!-- [^\n]*? -->\n)?<g id="(?P<id>[^"]+)" class="(?:node|edge)"[^>]*>.*?</g>\n?',
+    re.DOTALL
+)
+
+
+def get_root_size(svg: str) -> Tuple[float, float]:
+    match = SVG_SIZE_PATTERN.search(SVG_ROOT_PATTERN.search(svg).group(0))
+    return float(match.group(1)), float(match.group(2))
+
+
+def place_shelves(sizes: List[Tuple[float, float]], margin: float) -> Tuple[List[Tuple[float, float]], float, float]:
+    """
+    Раскладывает прямоугольники по полкам: от высоких к низким, слева направо, с переносом на новую полку
+    при превышении ширины, близкой к стороне квадрата той же площади
+    """
+    area = sum((width + margin) * (height + margin) for width, height in sizes)
+    max_width = max(math.sqrt(area) * 1.2, max(width for width, _ in sizes))
+
+    positions: List[Tuple[float, float]] = [(0, 0)] * len(sizes)
+    x, y, shelf_height, total_width = 0.0, 0.0, 0.0, 0.0
+    for index in sorted(range(len(sizes)), key=lambda i: sizes[i][1], reverse=True):
+        width, height = sizes[index]
+        if x > 0 and x + width > max_width:
+            y += shelf_height + margin
+            x, shelf_height = 0.0, 0.0
+
+        positions[index] = (x, y)
+        x += width + margin
+        shelf_height = max(shelf_height, height)
+        total_width = max(total_width, x - margin)
+
+    return positions, total_width, y + shelf_height
+
+
+def pack_svgs(svgs: List[bytes], margin: float = 24) -> bytes:
+    """
+    Собирает диаграммы компонент в один SVG, вкладывая каждую как дочерний svg со своей позицией, как это делает gvpack
+    """
+    documents = [svg.decode("utf-8") for svg in svgs]
+    sizes = [get_root_size(document) for document in documents]
+    positions, width, height = place_shelves(sizes, margin)
+
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n',
+        f'<svg width="{width:.0f}pt" height="{height:.0f}pt" viewBox="0.00 0.00 {width:.2f} {height:.2f}" '
+        f'xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink">\n'
+    ]
+    for document, (x, y), (component_width, component_height) in zip(documents, positions, sizes):
+        root = SVG_ROOT_PATTERN.search(document)
+        # Единицы pt вложенного svg пересчитались бы в пиксели внешнего, поэтому размеры задаются без единиц
+        nested_root = SVG_SIZE_PATTERN.sub(
+            f' x="{x:.2f}" y="{y:.2f}" width="{component_width:.2f}" height="{component_height:.2f}"',
+            root.group(0),
+            count=1
+        )
+        parts.append(nested_root)
+        parts.append(document[root.end():document.rindex('</svg>')])
+        parts.append('</svg>\n')
+    parts.append('</svg>\n')
+
+    return "".join(parts).encode("utf-8")
@@ -0,0 +1,199 @@
+import gzip
+import hashlib
+import logging
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from src.main.visualizer.svg_optimizer import compress_svg, decompress_svg
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RenderCacheStats:
+    hits: int
+    misses: int
+    entries: int
+    bytes: int
+
+
+def render_key(source: str, engine: str, format: str) -> str:
+    """
+    Ключ отрисовки: хэш DOT-описания графа вместе с параметрами раскладки
+    """
+    return hashlib.sha256(f"{engine}\n{format}\n{source}".encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    """
+    Кэш готовых диаграмм по содержимому DOT. Первый уровень хранится в памяти, второй, если задан каталог, на диске
+    в сжатом виде.
+    Оба уровня вытесняют давно использованные записи при превышении лимита размера. Сжатие, запись и чтение файлов
+    идут вне блокировок, поэтому потоки отрисовки не ждут чужой дисковый ввод-вывод.
+    Диск необязателен: ошибка чтения считается промахом, а после ошибки записи дисковый уровень отключается
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, directory: Optional[str] = None,
+                 max_disk_bytes: int = 512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.entries: OrderedDict[str, bytes] = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+        # Файлы диска от давно использованных к недавним с их размерами; читается из каталога при первом обращении
+        self.disk_entries: Optional[OrderedDict[str, int]] = None
+        self.disk_size = 0
+        self.disk_lock = threading.Lock()
+        self.disk_enabled = directory is not None
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self.lock:
+            data = self.entries.get(key)
+            if data is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return data
+
+        data = self.__read_disk(key)
+
+        with self.lock:
+            if data is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.__put_memory(key, data)
+            return data
+
+    def put(self, key: str, data: bytes) -> None:
+        with self.lock:
+            self.__put_memory(key, data)
+        self.__write_disk(key, data)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    @property
+    def stats(self) -> RenderCacheStats:
+        with self.lock:
+            return RenderCacheStats(hits=self.hits, misses=self.misses, entries=len(self.entries), bytes=self.size)
+
+    def __put_memory(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.size -= len(previous)
+        self.entries[key] = data
+        self.size += len(data)
+
+        while self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def __read_disk(self, key: str) -> Optional[bytes]:
+        if not self.disk_enabled:
+            return None
+
+        path = self.__get_path(key)
+        try:
+            with open(path, "rb") as f:
+                data = decompress_svg(f.read())
+            # Время изменения файла служит временем последнего обращения для вытеснения после перезапуска
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, gzip.BadGzipFile, zlib.error) as ex:
+            logger.warning("Не удалось прочитать %s из кэша отрисовки: %s", path, ex)
+            self.__forget_disk(key)
+            return None
+
+        with self.disk_lock:
+            disk_entries = self.__get_disk_entries()
+            if key in disk_entries:
+                disk_entries.move_to_end(key)
+
+        return data
+
+    def __write_disk(self, key: str, data: bytes) -> None:
+        if not self.disk_enabled or len(data) > self.max_disk_bytes:
+            return
+
+        path = self.__get_path(key)
+        # Свой временный файл у каждого потока, чтобы одновременная запись одного ключа не смешивала данные
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        compressed = compress_svg(data)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(compressed)
+
+            with self.disk_lock:
+                disk_entries = self.__get_disk_entries()
+                os.replace(tmp_path, path)
+                self.disk_size += len(compressed) - disk_entries.pop(key, 0)
+                disk_entries[key] = len(compressed)
+                self.__evict_disk(disk_entries)
+        except OSError as ex:
+            # Каталог недоступен для записи: диаграммы продолжают кэшироваться только в памяти
+            logger.warning("Дисковый кэш отрисовки %s отключен: %s", self.directory, ex)
+            self.disk_enabled = False
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def __forget_disk(self, key: str) -> None:
+        """
+        Убирает поврежденную запись, чтобы следующая отрисовка записала ее заново
+        """
+        with self.disk_lock:
+            if self.disk_entries is not None and key in self.disk_entries:
+                self.disk_size -= self.disk_entries.pop(key)
+            try:
+                os.remove(self.__get_path(key))
+            except OSError:
+                pass
+
+    def __get_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.svgz")
+
+    def __get_disk_entries(self) -> OrderedDict:
+        """
+        Каталог просматривается один раз, дальше размер диска ведется по записям и вытеснениям
+        """
+        if self.disk_entries is not None:
+            return self.disk_entries
+
+        entries = []
+        if os.path.isdir(self.directory):
+            for file_name in os.listdir(self.directory):
+                if not file_name.endswith(".svgz"):
+                    continue
+                stat = os.stat(os.path.join(self.directory, file_name))
+                entries.append((stat.st_mtime, file_name[:-len(".svgz")], stat.st_size))
+        entries.sort()
+
+        self.disk_entries = OrderedDict((key, size) for _, key, size in entries)
+        self.disk_size = sum(self.disk_entries.values())
+        return self.disk_entries
+
+    def __evict_disk(self, disk_entries: OrderedDict) -> None:
+        while self.disk_size > self.max_disk_bytes and disk_entries:
+            key, size = disk_entries.popitem(last=False)
+            self.disk_size -= size
+            try:
+                os.remove(self.__get_path(key))
+            except OSError:
+                pass
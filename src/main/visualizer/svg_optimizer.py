@@ -0,0 +1,45 @@
+import gzip
+import re
+
+PROLOG_PATTERN = re.compile(r'<\?xml[^>]*\?>|<!DOCTYPE[^>]*>|<!--.*?-->', re.DOTALL)
+TAG_PATTERN = re.compile(r'<[^>]+>')
+BETWEEN_TAGS_PATTERN = re.compile(r'>\s+<')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+COORDINATE_ATTRIBUTE_PATTERN = re.compile(r'\s(points|d|x|y|transform)="([^"]*)"')
+NUMBER_PATTERN = re.compile(r'-?\d+\.\d+')
+
+
+def format_number(value: float, precision: int) -> str:
+    result = f"{value:.{precision}f}".rstrip('0').rstrip('.')
+    return '0' if result == '-0' else result
+
+
+def round_coordinates(svg: str, precision: int) -> str:
+    def round_numbers(match: re.Match) -> str:
+        value = NUMBER_PATTERN.sub(lambda e: format_number(float(e.group(0)), precision), match.group(2))
+        return f' {match.group(1)}="{value}"'
+
+    return COORDINATE_ATTRIBUTE_PATTERN.sub(round_numbers, svg)
+
+
+def compact_svg(svg: str, precision: int = 1) -> str:
+    """
+    Уменьшает SVG Graphviz без изменения изображения: убирает пролог, комментарии и пробелы между тегами,
+    округляет координаты. Оформление подписей остается в атрибутах: ft.Image рисует SVG через flutter_svg,
+    который не применяет CSS из элемента style, поэтому вынесенные в классы стили терялись бы
+    """
+    svg = PROLOG_PATTERN.sub('', svg)
+    svg = TAG_PATTERN.sub(lambda e: WHITESPACE_PATTERN.sub(' ', e.group(0)), svg)
+    svg = BETWEEN_TAGS_PATTERN.sub('><', svg).strip()
+    return round_coordinates(svg, precision)
+
+
+def compress_svg(svg: bytes) -> bytes:
+    """
+    gzip-вариант SVG (svgz); mtime обнулен, чтобы одинаковые диаграммы давали одинаковые байты
+    """
+    return gzip.compress(svg, mtime=0)
+
+
+def decompress_svg(data: bytes) -> bytes:
+    return gzip.decompress(data)
@@ -0,0 +1,166 @@
+import math
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Dict, Tuple, Set
+
+from src.main.visualizer.packing import SVG_ELEMENT_PATTERN
+
+VIEWBOX_PATTERN = re.compile(r'viewBox="([-\d.]+) ([-\d.]+) ([-\d.]+) ([-\d.]+)"')
+# Корень svg (в том числе вложенный после упаковки), группа графа или нода/ребро
+STRUCTURE_PATTERN = re.compile(
+    r'(?P<svg><svg\b[^>]*>)'
+    r'|(?P<graph><g id="[^"]*" class="graph" transform="(?P<transform>[^"]*)">)'
+    r'|(?P<element>' + SVG_ELEMENT_PATTERN.pattern + ')',
+    re.DOTALL
+)
+STYLE_PATTERN = re.compile(r'<style>.*?</style>', re.DOTALL)
+TRANSLATE_PATTERN = re.compile(r'translate\(([-\d.]+)[ ,]([-\d.]+)\)')
+ATTRIBUTE_PATTERN = re.compile(r'\s(x|y)="([-\d.]+)"')
+COORDINATES_PATTERN = re.compile(r'\s(?:points|d)="([^"]*)"')
+NUMBER_PATTERN = re.compile(r'-?\d+(?:\.\d+)?(?:e-?\d+)?')
+
+# Размер ячейки пространственного индекса в единицах диаграммы
+INDEX_CELL_SIZE = 256
+
+
+@dataclass
+class SvgElement:
+    text: str
+    offset: Tuple[float, float]
+    bounds: Tuple[float, float, float, float]
+
+
+def get_element_bounds(text: str, offset: Tuple[float, float]) -> Tuple[float, float, float, float]:
+    """
+    Ограничивающий прямоугольник ноды или ребра по координатам точек, путей и текста
+    """
+    xs, ys = [], []
+    for match in COORDINATES_PATTERN.finditer(text):
+        numbers = [float(e) for e in NUMBER_PATTERN.findall(match.group(1))]
+        xs.extend(numbers[0::2])
+        ys.extend(numbers[1::2])
+    for name, value in ATTRIBUTE_PATTERN.findall(text):
+        (xs if name == 'x' else ys).append(float(value))
+
+    if not xs or not ys:
+        return offset[0], offset[1], offset[0], offset[1]
+
+    return min(xs) + offset[0], min(ys) + offset[1], max(xs) + offset[0], max(ys) + offset[1]
+
+
+class SvgTileSource:
+    """
+    Нарезает готовую диаграмму на квадратные тайлы для каждого масштаба. Тайл содержит только ноды и ребра,
+    пересекающие его область, поэтому клиент растеризует объем одного тайла, а не всей диаграммы.
+    Готовые тайлы хранятся в LRU-кэше
+    """
+
+    def __init__(self, svg: str, tile_size: int = 512, max_tiles: int = 256):
+        self.tile_size = tile_size
+        self.max_tiles = max_tiles
+        self.tiles: OrderedDict[Tuple[float, int, int], str] = OrderedDict()
+        self.lock = threading.Lock()
+
+        _, _, self.width, self.height = (float(e) for e in VIEWBOX_PATTERN.search(svg).groups())
+        style = STYLE_PATTERN.search(svg)
+        self.style = style.group(0) if style else ''
+        self.elements = self.__parse_elements(svg)
+        self.index = self.__build_index()
+
+    def get_tile_count(self, zoom: float) -> Tuple[int, int]:
+        return (
+            max(1, math.ceil(self.width * zoom / self.tile_size)),
+            max(1, math.ceil(self.height * zoom / self.tile_size))
+        )
+
+    def get_tile(self, zoom: float, column: int, row: int) -> str:
+        key = (round(zoom, 3), column, row)
+        with self.lock:
+            tile = self.tiles.get(key)
+            if tile is not None:
+                self.tiles.move_to_end(key)
+                return tile
+
+        tile = self.__render_tile(*key)
+        with self.lock:
+            self.tiles[key] = tile
+            if len(self.tiles) > self.max_tiles:
+                self.tiles.popitem(last=False)
+
+        return tile
+
+    def __render_tile(self, zoom: float, column: int, row: int) -> str:
+        span = self.tile_size / zoom
+        left, top = column * span, row * span
+        right, bottom = left + span, top + span
+
+        parts = [
+            f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+            f'width="{self.tile_size}" height="{self.tile_size}" viewBox="{left:.2f} {top:.2f} {span:.2f} {span:.2f}">',
+            self.style,
+            f'<rect x="{left:.2f}" y="{top:.2f}" width="{span:.2f}" height="{span:.2f}" fill="white"/>'
+        ]
+
+        offset = None
+        for index in self.__find_elements(left, top, right, bottom):
+            element = self.elements[index]
+            if element.offset != offset:
+                if offset is not None:
+                    parts.append('</g>')
+                offset = element.offset
+                parts.append(f'<g transform="translate({offset[0]:.2f} {offset[1]:.2f})">')
+            parts.append(element.text)
+        if offset is not None:
+            parts.append('</g>')
+        parts.append('</svg>')
+
+        return "".join(parts)
+
+    def __find_elements(self, left: float, top: float, right: float, bottom: float) -> List[int]:
+        """
+        Возвращает индексы элементов, пересекающих область, в исходном порядке отрисовки
+        """
+        found: Set[int] = set()
+        for cell_x in range(math.floor(left / INDEX_CELL_SIZE), math.floor(right / INDEX_CELL_SIZE) + 1):
+            for cell_y in range(math.floor(top / INDEX_CELL_SIZE), math.floor(bottom / INDEX_CELL_SIZE) + 1):
+                for index in self.index.get((cell_x, cell_y), ()):
+                    x1, y1, x2, y2 = self.elements[index].bounds
+                    if x1 <= right and x2 >= left and y1 <= bottom and y2 >= top:
+                        found.add(index)
+
+        return sorted(found)
+
+    def __build_index(self) -> Dict[Tuple[int, int], List[int]]:
+        index: Dict[Tuple[int, int], List[int]] = {}
+        for element_index, element in enumerate(self.elements):
+            x1, y1, x2, y2 = element.bounds
+            for cell_x in range(math.floor(x1 / INDEX_CELL_SIZE), math.floor(x2 / INDEX_CELL_SIZE) + 1):
+                for cell_y in range(math.floor(y1 / INDEX_CELL_SIZE), math.floor(y2 / INDEX_CELL_SIZE) + 1):
+                    index.setdefault((cell_x, cell_y), []).append(element_index)
+
+        return index
+
+    @staticmethod
+    def __parse_elements(svg: str) -> List[SvgElement]:
+        """
+        Собирает ноды и ребра со смещением в координатах диаграммы: позиция вложенного svg плюс перенос группы графа
+        """
+        elements = []
+        svg_x, svg_y = 0.0, 0.0
+        offset = (0.0, 0.0)
+        for match in STRUCTURE_PATTERN.finditer(svg):
+            if match.group('svg'):
+                attributes = dict(ATTRIBUTE_PATTERN.findall(match.group('svg')))
+                svg_x, svg_y = float(attributes.get('x', 0)), float(attributes.get('y', 0))
+                offset = (svg_x, svg_y)
+            elif match.group('graph'):
+                translate = TRANSLATE_PATTERN.search(match.group('transform'))
+                if translate:
+                    offset = (svg_x + float(translate.group(1)), svg_y + float(translate.group(2)))
+            else:
+                text = match.group('element')
+                elements.append(SvgElement(text=text, offset=offset, bounds=get_element_bounds(text, offset)))
+
+        return elements
@@ -1,10 +1,15 @@
 import enum
-from typing import List
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Dict, Tuple, Set
 
 from graphviz import Digraph
 
-from src.main.core import DatabaseSchemaVisualizer, Table, Relation
-from src.main.visualizer import build_table
+from src.main.core import DatabaseSchemaVisualizer, Table, Progress, ProgressStage, report_progress, SchemaGraph
+from src.main.visualizer import build_table, is_column_shown, DetailLevel, LabelCache, RenderCache, render_key, pack_svgs, SVG_ELEMENT_PATTERN, \
+    LayoutEngine, LayoutTimeout, FALLBACK_ENGINES, choose_layout_engine, run_layout, layout_timeouts, Focus, \
+    get_focus_nodes
 
 
 class VisualizeState(enum.Enum):
@@ -13,66 +18,386 @@ class VisualizeState(enum.Enum):
     HIDE = 'hide'
 
 
+def create_graph(engine: LayoutEngine = LayoutEngine.DOT) -> Digraph:
+    graph = Digraph(engine=engine.value)
+    graph.attr("node", shape="plain")
+    if engine == LayoutEngine.DOT:
+        graph.attr(rankdir="TB")
+        graph.attr(nodesep="1.2")
+        graph.attr(ranksep="0.8")
+        graph.attr(TBbalance="max")
+    elif engine == LayoutEngine.OSAGE:
+        graph.attr(pack="24")
+    else:
+        # Силовые движки сами не раздвигают ноды-таблицы, перекрытия убираются отдельным проходом
+        graph.attr(overlap="prism")
+        graph.attr(sep="+24")
+        graph.attr(splines="true")
+    return graph
+
+
+def render_graph(graph: Digraph, render_cache: Optional[RenderCache] = None, timeout: Optional[float] = None,
+                 progress: Optional[Progress] = None, deadline: Optional[float] = None) -> bytes:
+    """
+    Раскладывает DOT, не дольше timeout секунд и не позже deadline. Если этот же DOT уже не уложился
+    в не меньшее время, LayoutTimeout выбрасывается сразу, без запуска Graphviz
+    """
+    key = render_key(graph.source, graph.engine, 'svg')
+    if render_cache is not None:
+        svg = render_cache.get(key)
+        if svg is not None:
+            return svg
+
+    budget = timeout
+    if deadline is not None:
+        remaining = deadline - time.monotonic()
+        budget = remaining if budget is None else min(budget, remaining)
+    if budget is not None and layout_timeouts.is_hopeless(key, budget):
+        raise LayoutTimeout(f"{graph.engine} уже не укладывался в {budget:.1f} с")
+
+    try:
+        svg = run_layout(graph.source, LayoutEngine(graph.engine), 'svg', budget, progress)
+    except LayoutTimeout:
+        layout_timeouts.remember(key, budget)
+        raise
+    if render_cache is not None:
+        render_cache.put(key, svg)
+
+    return svg
+
+
 class GraphvizDatabaseSchemaVisualizer(DatabaseSchemaVisualizer):
+    """
+    Строит DOT по таблицам и раскладывает его Graphviz. При нескольких потоках несвязанные компоненты схемы
+    раскладываются параллельно и упаковываются в один SVG. Со стабильной раскладкой представление
+    вырезается из однажды разложенной полной схемы.
+    Без явного engine движок выбирается по размеру каждой компоненты; раскладка, не уложившаяся в timeout,
+    повторяется более быстрым движком. Срок общий для всех компонент и попыток, последнему движку цепочки
+    дается еще один timeout, так что вся отрисовка занимает не больше 2 * timeout.
+    В режиме фокуса DOT строится только для окрестности выбранной таблицы, остальные таблицы не перебираются
+    """
 
-    def __init__(self, tables: List[Table], table_states: dict[str, VisualizeState] = None):
-        self.schema = Digraph()
-        self.schema.attr("node", shape="plain")
-        self.schema.attr(rankdir="TB")
-        self.schema.attr(nodesep="1.2")
-        self.schema.attr(ranksep="0.8")
-        self.schema.attr(TBbalance="max")
+    def __init__(self, tables: List[Table], table_states: dict[str, VisualizeState] = None,
+                 render_cache: Optional[RenderCache] = None, layout: Optional['StableLayout'] = None,
+                 workers: int = 1, engine: Optional[LayoutEngine] = None, timeout: Optional[float] = None,
+                 label_cache: Optional[LabelCache] = None, level: DetailLevel = DetailLevel.FULL,
+                 focus: Optional[Focus] = None, schema_graph: Optional[SchemaGraph] = None):
+        self.schema = create_graph(engine or LayoutEngine.DOT)
 
         self.tables = tables
 
         if not table_states:
             table_states = {}
         self.visualize_state = table_states
+        self.render_cache = render_cache
+        self.layout = layout
+        self.workers = workers
+        self.engine = engine
+        self.timeout = timeout
+        self.label_cache = label_cache
+        self.level = level
+        if schema_graph is None or schema_graph.tables is not tables:
+            schema_graph = SchemaGraph(tables)
+        self.schema_graph = schema_graph
+        self.focus_nodes = get_focus_nodes(schema_graph, focus) if focus is not None else None
+        self.hidden_nodes: Optional[bytearray] = None
+
+    def visualize(self, progress: Optional[Progress] = None) -> bytes:
+        """
+        Передает DOT движку раскладки через stdin и возвращает SVG из stdout, не создавая файлов
+        """
+        if self.layout is not None and self.focus_nodes is None:
+            return self.layout.render(self.visualize_state, progress)
 
-    def visualize(self):
-        self.__create_nodes()
-        self.__create_edges_between_all_nodes()
+        table_indexes = self.__get_shown_table_indexes()
+        if self.workers > 1:
+            components = self.schema_graph.get_components(table_indexes, self.__is_visible)
+        else:
+            components = [table_indexes]
 
-        self.schema.render(filename='erd', format='svg')
+        deadlines = self.__get_deadlines()
+        report_progress(progress, ProgressStage.LAYOUT, 0, len(components))
+        if len(components) <= 1:
+            svg = self.__layout(table_indexes, progress, deadlines)
+        else:
+            svg = pack_svgs(self.__render_components(components, progress, deadlines))
+        report_progress(progress, ProgressStage.READY)
 
-    def __create_nodes(self) -> None:
+        return svg
+
+    def build_dot(self) -> str:
         """
-        Создает ноды для таблиц с состоянием SHOW
+        Возвращает DOT всей видимой схемы одним графом, без раскладки
         """
-        for table in self.tables:
-            state = self.visualize_state.get(table.name, VisualizeState.SHOW)
+        table_indexes = self.__get_shown_table_indexes()
+        engine = self.engine
+        if engine is None:
+            engine = choose_layout_engine(len(table_indexes), self.__count_edges(table_indexes))
 
-            if state == VisualizeState.SHOW:
-                self.schema.node(
-                    name=table.name,
-                    label="<" + build_table(table) + ">"
-                )
+        graph = create_graph(engine)
+        self.__fill_graph(graph, table_indexes)
+        return graph.source
+
+    def __get_shown_table_indexes(self) -> List[int]:
+        if self.focus_nodes is not None:
+            return sorted(e for e in self.focus_nodes if self.schema_graph.is_table(e))
+
+        return [
+            index for index, table in enumerate(self.tables)
+            if self.visualize_state.get(table.qualified_name, VisualizeState.SHOW) == VisualizeState.SHOW
+        ]
 
-    def __create_edges_between_all_nodes(self) -> None:
+    def __is_visible(self, node: int) -> bool:
         """
-        Создает ребра для отношений каждой из таблиц с состоянием SHOW
+        Видна ли нода, к которой ведет ребро. В режиме фокуса видимость определяется окрестностью,
+        а не выбранными пользователем состояниями
         """
-        for table in self.tables:
-            state = self.visualize_state.get(table.name, VisualizeState.SHOW)
+        if self.focus_nodes is not None:
+            return node in self.focus_nodes
 
-            if state == VisualizeState.SHOW:
-                self.__create_edges(table.relations)
+        if self.hidden_nodes is None:
+            self.hidden_nodes = bytearray(self.schema_graph.node_count)
+            for name, state in self.visualize_state.items():
+                node_id = self.schema_graph.get_id(name)
+                if state == VisualizeState.HIDE and node_id is not None:
+                    self.hidden_nodes[node_id] = 1
 
-    def __create_edges(self, relations: List[Relation]) -> None:
+        return not self.hidden_nodes[node]
+
+    def __get_deadlines(self) -> Tuple[Optional[float], Optional[float]]:
         """
-        Создает ребра для отношений между таблицами, только если связанная таблица имеет состояние SHOW или LINK
+        Возвращает срок для основных движков и более поздний срок для последнего движка цепочки
         """
-        for relation in relations:
-            related_table_state = self.visualize_state.get(relation.related_table_name, VisualizeState.SHOW)
+        if self.timeout is None:
+            return None, None
 
-            if related_table_state == VisualizeState.HIDE:
+        start = time.monotonic()
+        return start + self.timeout, start + 2 * self.timeout
+
+    def __render_components(self, components: List[List[int]], progress: Optional[Progress],
+                            deadlines: Tuple[Optional[float], Optional[float]]) -> List[bytes]:
+        """
+        Раскладывает компоненты в пуле потоков: каждая раскладка идет в собственном процессе Graphviz,
+        поэтому потоки не упираются в GIL. Крупные компоненты запускаются первыми
+        """
+        lock = threading.Lock()
+        done = 0
+
+        def render(component: List[int]) -> bytes:
+            nonlocal done
+            if progress is not None:
+                progress.check()
+
+            svg = self.__layout(component, progress, deadlines)
+            with lock:
+                done += 1
+                report_progress(progress, ProgressStage.LAYOUT, done, len(components))
+            return svg
+
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(components))) as executor:
+            return list(executor.map(render, components))
+
+    def __layout(self, table_indexes: List[int], progress: Optional[Progress],
+                 deadlines: Tuple[Optional[float], Optional[float]]) -> bytes:
+        """
+        Раскладывает таблицы выбранным движком, при превышении срока переходя к более быстрому.
+        Если срок уже истек на других компонентах, медленные движки пропускаются. Последний движок цепочки
+        ограничен вторым, более поздним сроком
+        """
+        deadline, final_deadline = deadlines
+        engine = self.engine
+        if engine is None:
+            engine = choose_layout_engine(len(table_indexes), self.__count_edges(table_indexes))
+
+        while True:
+            fallback = FALLBACK_ENGINES.get(engine)
+            if fallback is not None and deadline is not None and time.monotonic() >= deadline:
+                engine = fallback
+                continue
+
+            graph = create_graph(engine)
+            self.__fill_graph(graph, table_indexes)
+            self.schema = graph
+
+            try:
+                return render_graph(graph, self.render_cache, progress=progress,
+                                    deadline=deadline if fallback is not None else final_deadline)
+            except LayoutTimeout:
+                if fallback is None:
+                    raise
+                engine = fallback
+
+    def __count_edges(self, table_indexes: List[int]) -> int:
+        return sum(
+            1 for index in table_indexes for node in self.schema_graph.get_successors(index) if self.__is_visible(node)
+        )
+
+    def __fill_graph(self, graph: Digraph, table_indexes: List[int]) -> None:
+        declared_nodes: Set[int] = set()
+        self.__create_nodes(graph, table_indexes, declared_nodes)
+        for index in table_indexes:
+            self.__create_edges(graph, index, declared_nodes)
+
+    def __create_nodes(self, graph: Digraph, table_indexes: List[int], declared_nodes: Set[int]) -> None:
+        """
+        Создает ноды для таблиц с состоянием SHOW
+        """
+        for index in table_indexes:
+            table = self.tables[index]
+            if self.label_cache is not None:
+                label = self.label_cache.get(table, self.level)
+            else:
+                label = build_table(table, self.level)
+            graph.node(
+                name=table.qualified_name,
+                label="<" + label + ">",
+                id=get_node_id(self.schema_graph, index)
+            )
+            declared_nodes.add(index)
+
+    def __create_edges(self, graph: Digraph, table_index: int, declared_nodes: Set[int]) -> None:
+        """
+        Создает ребра для отношений между таблицами, только если связанная таблица имеет состояние SHOW или LINK
+        """
+        relations = self.tables[table_index].relations
+        related_nodes = self.schema_graph.get_successors(table_index)
+        for relation_index, (relation, related_node) in enumerate(zip(relations, related_nodes)):
+            if not self.__is_visible(related_node):
                 continue
 
-            self.schema.edge(
-                tail_name=f"{relation.parent_table_name}:{relation.parent_column_name}",
-                head_name=f"{relation.related_table_name}:{relation.related_column_name}",
+            # Ноды без описания Graphviz создал бы сам, объявление нужно только чтобы задать им id
+            if related_node not in declared_nodes:
+                graph.node(
+                    name=relation.related_qualified_name,
+                    id=get_node_id(self.schema_graph, related_node)
+                )
+                declared_nodes.add(related_node)
+
+            graph.edge(
+                tail_name=self.__get_endpoint(relation.parent_qualified_name, relation.parent_column_name),
+                head_name=self.__get_endpoint(relation.related_qualified_name, relation.related_column_name),
                 arrowsize='0.7',
                 penwidth='0.7',
                 arrowtail='crow',
-                dir='back'
+                dir='back',
+                id=relation_id(table_index, relation_index)
             )
+
+    def __get_endpoint(self, table_name: str, column_name: str) -> str:
+        """
+        Ребро крепится к порту столбца, только если столбец есть в метке на текущем уровне детализации
+        """
+        if self.level == DetailLevel.FULL:
+            return f"{table_name}:{column_name}"
+
+        node = self.schema_graph.get_id(table_name)
+        table = self.tables[node] if node is not None and self.schema_graph.is_table(node) else None
+        if table is not None and self.level == DetailLevel.KEYS and any(
+                e.name == column_name and is_column_shown(e, self.level) for e in table.columns
+        ):
+            return f"{table_name}:{column_name}"
+
+        return table_name
+
+
+class StableLayout:
+    """
+    Раскладка всей схемы, построенная один раз. Представления с разной видимостью таблиц получаются удалением
+    скрытых нод и ребер из ее SVG без повторного запуска Graphviz, поэтому таблицы не меняют положения.
+    Таблицы LINK, в отличие от обычного режима, остаются полными, но рисуются приглушенно
+    """
+
+    def __init__(self, tables: List[Table], render_cache: Optional[RenderCache] = None, workers: int = 1,
+                 engine: Optional[LayoutEngine] = None, timeout: Optional[float] = None,
+                 label_cache: Optional[LabelCache] = None, level: DetailLevel = DetailLevel.FULL,
+                 schema_graph: Optional[SchemaGraph] = None):
+        self.tables = tables
+        if schema_graph is None or schema_graph.tables is not tables:
+            schema_graph = SchemaGraph(tables)
+        self.schema_graph = schema_graph
+        self.render_cache = render_cache
+        self.workers = workers
+        self.engine = engine
+        self.timeout = timeout
+        self.label_cache = label_cache
+        self.level = level
+        self.chunks: Optional[List[Tuple[Optional[str], str]]] = None
+        self.lock = threading.Lock()
+
+    def render(self, table_states: Dict[str, VisualizeState], progress: Optional[Progress] = None) -> bytes:
+        chunks = self.__get_chunks(progress)
+        visible = get_visible_element_ids(self.schema_graph, table_states)
+
+        parts = []
+        for element_id, text in chunks:
+            if element_id is not None:
+                if element_id not in visible:
+                    continue
+                if visible[element_id]:
+                    text = text.replace(' class="node">', ' class="node" opacity="0.4">', 1)
+            parts.append(text)
+
+        report_progress(progress, ProgressStage.READY)
+        return "".join(parts).encode("utf-8")
+
+    def __get_chunks(self, progress: Optional[Progress]) -> List[Tuple[Optional[str], str]]:
+        """
+        Раскладывает полную схему при первом обращении и режет SVG на куски: ноды и ребра с их id и разметку между ними
+        """
+        with self.lock:
+            if self.chunks is not None:
+                return self.chunks
+
+            visualizer = GraphvizDatabaseSchemaVisualizer(self.tables, render_cache=self.render_cache,
+                                                          workers=self.workers, engine=self.engine,
+                                                          timeout=self.timeout, label_cache=self.label_cache,
+                                                          level=self.level, schema_graph=self.schema_graph)
+            svg = visualizer.visualize(progress).decode("utf-8")
+
+            chunks = []
+            position = 0
+            for match in SVG_ELEMENT_PATTERN.finditer(svg):
+                chunks.append((None, svg[position:match.start()]))
+                chunks.append((match.group('id'), match.group(0)))
+                position = match.end()
+            chunks.append((None, svg[position:]))
+
+            self.chunks = chunks
+            return chunks
+
+
+def relation_id(table_index: int, relation_index: int) -> str:
+    return f"relation_{table_index}_{relation_index}"
+
+
+def get_node_id(schema_graph: SchemaGraph, node: int) -> str:
+    """
+    Возвращает id ноды, не зависящий от видимости: таблицам по их позиции, а таблицам вне списка,
+    на которые есть ссылки, по порядку первой ссылки
+    """
+    if schema_graph.is_table(node):
+        return f"table_{node}"
+
+    return f"external_{node - schema_graph.table_count}"
+
+
+def get_visible_element_ids(schema_graph: SchemaGraph, table_states: Dict[str, VisualizeState]) -> Dict[str, bool]:
+    """
+    Возвращает id видимых нод и ребер; значение True означает, что нода видна только из-за ссылок на нее
+    """
+    visible: Dict[str, bool] = {}
+    for table_index, table in enumerate(schema_graph.tables):
+        if table_states.get(table.qualified_name, VisualizeState.SHOW) != VisualizeState.SHOW:
+            continue
+
+        visible[get_node_id(schema_graph, table_index)] = False
+        related_nodes = schema_graph.get_successors(table_index)
+        for relation_index, (relation, related_node) in enumerate(zip(table.relations, related_nodes)):
+            related_table_state = table_states.get(relation.related_qualified_name, VisualizeState.SHOW)
+            if related_table_state == VisualizeState.HIDE:
+                continue
+
+            visible[relation_id(table_index, relation_index)] = False
+            visible.setdefault(get_node_id(schema_graph, related_node), related_table_state == VisualizeState.LINK)
+
+    return visible
@@ -0,0 +1,181 @@
+import random
+from typing import List, Tuple, Set, FrozenSet
+
+import pytest
+
+from src.main.core import Table, Relation, SchemaGraph
+
+
+def create_tables(table_count: int, edges: List[Tuple[int, str]]) -> List[Table]:
+    """
+    Таблицы t0..t{table_count - 1}; ребро (i, name) это отношение таблицы ti к таблице name
+    """
+    tables = [Table(name=f"t{i}", columns=[], relations=[]) for i in range(table_count)]
+    for source, target in edges:
+        tables[source].relations.append(Relation(f"t{source}", "ref_id", target, "id"))
+    return tables
+
+
+def reachable(graph: SchemaGraph, node: int) -> Set[int]:
+    visited = {node}
+    frontier = [node]
+    while frontier:
+        current = frontier.pop()
+        for target in graph.get_successors(current):
+            if target not in visited:
+                visited.add(target)
+                frontier.append(target)
+    return visited
+
+
+def brute_force_strongly_connected(graph: SchemaGraph) -> Set[FrozenSet[int]]:
+    reach = [reachable(graph, node) for node in range(graph.node_count)]
+    return {
+        frozenset(other for other in range(graph.node_count) if other in reach[node] and node in reach[other])
+        for node in range(graph.node_count)
+    }
+
+
+def brute_force_components(graph: SchemaGraph) -> Set[FrozenSet[int]]:
+    """
+    Компоненты слабой связности таблиц: вершины, достижимые без учета направления ребер
+    """
+    neighbors = {node: set() for node in range(graph.node_count)}
+    for source, table in enumerate(graph.tables):
+        for relation in table.relations:
+            target = graph.get_id(relation.related_qualified_name)
+            neighbors[source].add(target)
+            neighbors[target].add(source)
+
+    components = set()
+    for node in range(graph.table_count):
+        visited = {node}
+        frontier = [node]
+        while frontier:
+            for neighbor in neighbors[frontier.pop()] - visited:
+                visited.add(neighbor)
+                frontier.append(neighbor)
+        components.add(frozenset(e for e in visited if graph.is_table(e)))
+    return components
+
+
+def brute_force_neighborhood(graph: SchemaGraph, node: int, radius: int, outgoing: bool, incoming: bool) -> Set[int]:
+    distances = {node: 0}
+    frontier = [node]
+    while frontier:
+        current = frontier.pop(0)
+        if distances[current] == radius:
+            continue
+        neighbors = []
+        for source in range(graph.table_count):
+            for relation in graph.tables[source].relations:
+                target = graph.get_id(relation.related_qualified_name)
+                if outgoing and source == current:
+                    neighbors.append(target)
+                if incoming and target == current:
+                    neighbors.append(source)
+        for neighbor in neighbors:
+            if neighbor not in distances:
+                distances[neighbor] = distances[current] + 1
+                frontier.append(neighbor)
+    return set(distances)
+
+
+def random_tables(seed: int) -> List[Table]:
+    rng = random.Random(seed)
+    table_count = rng.randint(1, 30)
+    names = [f"t{i}" for i in range(table_count)] + [f"external{i}" for i in range(3)]
+    edges = [(rng.randrange(table_count), rng.choice(names)) for _ in range(rng.randint(0, 3 * table_count))]
+    return create_tables(table_count, edges)
+
+
+def test_adjacency():
+    tables = create_tables(4, [(0, "t1"), (0, "t2"), (1, "t2"), (2, "other"), (3, "t0"), (0, "t1")])
+    graph = SchemaGraph(tables)
+
+    assert graph.node_count == 5
+    assert graph.get_id("other") == 4 and not graph.is_table(4)
+    # Порядок соседей совпадает с порядком relations, повторные ссылки сохраняются
+    assert list(graph.get_successors(0)) == [1, 2, 1]
+    assert list(graph.get_successors(4)) == []
+    assert list(graph.get_predecessors(1)) == [0, 0]
+    assert list(graph.get_predecessors(2)) == [0, 1]
+    assert list(graph.get_predecessors(4)) == [2]
+    assert [graph.get_out_degree(e) for e in range(5)] == [3, 1, 1, 1, 0]
+    assert [graph.get_in_degree(e) for e in range(5)] == [1, 2, 2, 0, 1]
+
+
+def test_neighborhood():
+    graph = SchemaGraph(create_tables(5, [(0, "t1"), (1, "t2"), (2, "t3"), (4, "t0")]))
+
+    assert graph.get_neighborhood(0, 0) == {0}
+    assert graph.get_neighborhood(0, 1) == {0, 1, 4}
+    assert graph.get_neighborhood(0, 2, incoming=False) == {0, 1, 2}
+    assert graph.get_neighborhood(2, 5, outgoing=False) == {0, 1, 2, 4}
+
+
+def test_components():
+    graph = SchemaGraph(create_tables(6, [(0, "t1"), (2, "t1"), (3, "t4"), (5, "external")]))
+
+    assert sorted(map(sorted, graph.components)) == [[0, 1, 2], [3, 4], [5]]
+    # Скрытая вершина не связывает компоненты, внешняя связывает, но в результат не попадает
+    assert sorted(map(sorted, graph.get_components([0, 1, 2], lambda e: e != 1))) == [[0], [1], [2]]
+    graph = SchemaGraph(create_tables(2, [(0, "external"), (1, "external")]))
+    assert graph.get_components(range(2)) == [[0, 1]]
+
+
+@pytest.mark.parametrize("table_count, edges, expected", [
+    (1, [(0, "t0")], [{0}]),
+    (3, [(0, "t1"), (1, "t2"), (2, "t0")], [{0, 1, 2}]),
+    (4, [(0, "t1"), (1, "t0"), (2, "t3"), (3, "t2"), (1, "t2")], [{0, 1}, {2, 3}]),
+    (3, [], [{0}, {1}, {2}]),
+    (2, [(0, "t0"), (0, "t1"), (1, "external")], [{0}, {1}, {2}]),
+])
+def test_strongly_connected_components(table_count, edges, expected):
+    graph = SchemaGraph(create_tables(table_count, edges))
+
+    components = graph.strongly_connected_components
+    assert sorted(map(set, components), key=min) == expected
+
+
+def test_strongly_connected_components_are_topologically_ordered():
+    graph = SchemaGraph(create_tables(4, [(0, "t1"), (1, "t0"), (1, "t2"), (2, "t3")]))
+
+    # Тарьян выдает компоненты в обратном топологическом порядке: сначала те, на которые ссылаются
+    assert [set(e) for e in graph.strongly_connected_components] == [{3}, {2}, {0, 1}]
+
+
+def test_long_chain_has_no_recursion_limit():
+    table_count = 20000
+    graph = SchemaGraph(create_tables(table_count, [(i, f"t{(i + 1) % table_count}") for i in range(table_count)]))
+
+    assert len(graph.strongly_connected_components) == 1
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_random_graph_against_brute_force(seed):
+    tables = random_tables(seed)
+    graph = SchemaGraph(tables)
+
+    for node in range(graph.node_count):
+        successors = [
+            graph.get_id(e.related_qualified_name) for e in tables[node].relations
+        ] if graph.is_table(node) else []
+        assert list(graph.get_successors(node)) == successors
+        assert sorted(graph.get_predecessors(node)) == sorted(
+            source for source in range(graph.table_count) for target in
+            (graph.get_id(e.related_qualified_name) for e in tables[source].relations) if target == node
+        )
+        assert graph.get_out_degree(node) == len(graph.get_successors(node))
+        assert graph.get_in_degree(node) == len(graph.get_predecessors(node))
+        for outgoing, incoming in ((True, True), (True, False), (False, True)):
+            assert graph.get_neighborhood(node, 2, outgoing, incoming) == \
+                   brute_force_neighborhood(graph, node, 2, outgoing, incoming)
+
+    assert set(map(frozenset, graph.components)) == brute_force_components(graph)
+    assert [len(e) for e in graph.components] == sorted(map(len, graph.components), reverse=True)
+
+    components = graph.strongly_connected_components
+    assert set(map(frozenset, components)) == brute_force_strongly_connected(graph)
+    # Каждая вершина ровно в одной компоненте
+    assert sorted(node for component in components for node in component) == list(range(graph.node_count))
@@ -0,0 +1,42 @@
+from src.main.persistence import EngineRegistry, DatabaseURL, Dialect
+
+
+def make_url(database: str) -> DatabaseURL:
+    return DatabaseURL(Dialect.POSTGRESQL, "user", "secret", "localhost", 5432, database)
+
+
+def test_idle_engine_is_disposed():
+    registry = EngineRegistry(idle_timeout=0)
+    first = registry.get(make_url("first"))
+
+    registry.get(make_url("second"))
+
+    assert first not in registry.connections.values()
+
+
+def test_acquired_engine_is_not_disposed():
+    registry = EngineRegistry(idle_timeout=0)
+    with registry.acquire(make_url("first")) as first:
+        registry.get(make_url("second"))
+        assert registry.get(make_url("first")) is first
+
+    registry.get(make_url("second"))
+    assert first not in registry.connections.values()
+
+
+def test_disposed_while_acquired_is_closed_on_release():
+    registry = EngineRegistry()
+    with registry.acquire(make_url("first")) as first:
+        registry.dispose(make_url("first"))
+        assert first in registry.retired
+
+    assert not registry.retired
+    assert not registry.holders
+
+
+def test_dispose_all_closes_acquired():
+    registry = EngineRegistry()
+    with registry.acquire(make_url("first")):
+        registry.dispose_all()
+        assert not registry.retired
+        assert not registry.connections
@@ -0,0 +1,76 @@
+import pytest
+from sqlalchemy import create_engine, event
+
+from src.main.persistence import SQLAlchemyDatabaseSchemaInspector, refresh_tables
+from src.main.persistence.inspector import get_pool_capacity, supports_bulk_reflection
+
+
+class SQLiteConnection:
+    def __init__(self, path: str, **engine_options):
+        self.engine = create_engine(f"sqlite:///{path}", **engine_options)
+
+
+@pytest.fixture
+def connection(tmp_path):
+    connection = SQLiteConnection(tmp_path / "schema.db", pool_size=2, max_overflow=1)
+    with connection.engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE users (id INTEGER PRIMARY KEY, email TEXT UNIQUE NOT NULL)")
+        for index in range(20):
+            conn.exec_driver_sql(
+                f"CREATE TABLE orders_{index} (id INTEGER PRIMARY KEY, user_id INTEGER REFERENCES users(id))"
+            )
+    yield connection
+    connection.engine.dispose()
+
+
+def test_parallel_matches_bulk(connection):
+    bulk = SQLAlchemyDatabaseSchemaInspector(connection, bulk=True).get_tables()
+    parallel = SQLAlchemyDatabaseSchemaInspector(connection, bulk=False, workers=8).get_tables()
+
+    assert parallel == bulk
+
+
+def test_workers_limited_by_pool(connection):
+    inspector = SQLAlchemyDatabaseSchemaInspector(connection, bulk=False, workers=16)
+
+    assert inspector.max_connections == get_pool_capacity(connection.engine) == 3
+    assert len(inspector.get_tables()) == 21
+
+
+def test_bulk_reflection_support(connection):
+    assert not supports_bulk_reflection(connection.engine)
+    assert supports_bulk_reflection(create_engine("postgresql+psycopg://localhost/db"))
+
+
+def test_repeated_reflection_sees_changes(connection):
+    inspector = SQLAlchemyDatabaseSchemaInspector(connection, bulk=True)
+    versions = inspector.get_table_versions()
+
+    with connection.engine.begin() as conn:
+        conn.exec_driver_sql("ALTER TABLE users ADD COLUMN name TEXT")
+        conn.exec_driver_sql("CREATE TABLE tags (id INTEGER PRIMARY KEY)")
+
+    tables = {table.qualified_name: table for table in inspector.get_tables()}
+    assert "tags" in tables
+    assert "name" in [column.name for column in tables["users"].columns]
+    assert inspector.get_table_versions()["users"] != versions["users"]
+
+
+def test_refresh_reflects_once(connection):
+    statements = []
+    event.listen(connection.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    inspector = SQLAlchemyDatabaseSchemaInspector(connection, bulk=True)
+
+    inspector.get_tables()
+    reflection_count = len(statements)
+    statements.clear()
+
+    tables, versions, changes = refresh_tables(inspector, [], {})
+    assert len(statements) == reflection_count
+    assert len(changes.added) == len(tables) == 21
+
+    statements.clear()
+    refreshed, _, changes = refresh_tables(inspector, tables, versions)
+    assert len(statements) == reflection_count
+    assert changes.is_empty()
+    assert refreshed is tables
@@ -0,0 +1,151 @@
+import os
+import warnings
+from typing import List
+
+import pytest
+from sqlalchemy.dialects.mysql.base import MySQLDialect
+from sqlalchemy.dialects.mysql.reflection import MySQLTableDefinitionParser, ReflectedState
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+from src.main.persistence import Connection, DatabaseURL, Dialect, SQLAlchemyDatabaseSchemaInspector
+from src.main.persistence.mysql_inspector import MySQLDatabaseSchemaInspector, map_mysql_type
+
+
+def reflect_type(column_definition: str) -> str:
+    """
+    Тип столбца так, как его дает рефлексия SQLAlchemy по строке SHOW CREATE TABLE
+    """
+    dialect = MySQLDialect()
+    parser = MySQLTableDefinitionParser(dialect, dialect.identifier_preparer)
+    state = ReflectedState()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        parser._parse_column(f"  `c` {column_definition} DEFAULT NULL,", state)
+    return str(state.columns[0]['type'])
+
+
+@pytest.mark.parametrize("column_type, collation, expected", [
+    ("int(11) unsigned", None, "INTEGER"),
+    ("int", None, "INTEGER"),
+    ("tinyint(1)", None, "TINYINT"),
+    ("smallint(6)", None, "SMALLINT"),
+    ("bigint unsigned zerofill", None, "BIGINT"),
+    ("decimal(10,2) unsigned zerofill", None, "DECIMAL(10, 2)"),
+    ("float(10,2)", None, "FLOAT"),
+    ("double", None, "DOUBLE"),
+    ("bit(1)", None, "BIT"),
+    ("datetime(6)", None, "DATETIME"),
+    ("timestamp(3)", None, "TIMESTAMP"),
+    ("time", None, "TIME"),
+    ("year", None, "YEAR"),
+    ("enum('a','b')", None, "ENUM"),
+    ("set('x','it''s')", None, "SET"),
+    ("varchar(32)", None, "VARCHAR(32)"),
+    ("varchar(32)", "utf8mb4_bin", 'VARCHAR(32) COLLATE "utf8mb4_bin"'),
+    ("char(3)", "latin1_bin", 'CHAR(3) COLLATE "latin1_bin"'),
+    ("longtext", "utf8mb4_bin", "LONGTEXT"),
+    ("json", None, "JSON"),
+    ("varbinary(16)", None, "VARBINARY(16)"),
+    ("geometry", None, "NULL"),
+])
+def test_map_mysql_type(column_type, collation, expected):
+    assert map_mysql_type(column_type, None, collation) == expected
+
+
+@pytest.mark.parametrize("definition, column_type, character_set, collation", [
+    ("int(11) unsigned", "int(11) unsigned", None, None),
+    ("decimal(10,2) unsigned zerofill", "decimal(10,2) unsigned zerofill", None, None),
+    ("datetime(6)", "datetime(6)", None, None),
+    ("enum('a','b')", "enum('a','b')", None, None),
+    ("varchar(32) CHARACTER SET latin1", "varchar(32)", "latin1", None),
+    ("varchar(32) COLLATE utf8mb4_bin", "varchar(32)", None, "utf8mb4_bin"),
+    ("longtext CHARACTER SET utf8mb4 COLLATE utf8mb4_bin", "longtext", "utf8mb4", "utf8mb4_bin"),
+    ("text COLLATE utf8mb4_bin", "text", None, "utf8mb4_bin"),
+])
+def test_map_mysql_type_matches_reflection(definition, column_type, character_set, collation):
+    assert map_mysql_type(column_type, character_set, collation) == reflect_type(definition)
+
+
+SCRIPTS_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "..", "test_sql_sripts")
+PARITY_SCHEMA = "inspector_parity"
+
+# Типы, написание которых у information_schema и SQLAlchemy расходится сильнее всего
+EXTRA_TYPES_SQL = """
+CREATE TABLE type_samples (
+    id BIGINT UNSIGNED ZEROFILL AUTO_INCREMENT PRIMARY KEY,
+    parent_id BIGINT UNSIGNED ZEROFILL,
+    flag TINYINT(1),
+    amount DECIMAL(10, 2) UNSIGNED,
+    ratio FLOAT(10, 2),
+    bits BIT(1),
+    created_at DATETIME(6),
+    updated_at TIMESTAMP(3) NULL,
+    state ENUM('new', 'done'),
+    tags SET('a', 'b'),
+    code VARCHAR(32) COLLATE utf8mb4_bin,
+    legacy VARCHAR(32) CHARACTER SET latin1,
+    document JSON,
+    area GEOMETRY,
+    UNIQUE (code, legacy),
+    FOREIGN KEY (parent_id) REFERENCES type_samples (id)
+) DEFAULT CHARSET = utf8mb4
+"""
+
+# Порты серверов из docker-compose.yaml
+SERVERS = [
+    (Dialect.MARIADB, 3307, "mariadb.sql"),
+    (Dialect.MYSQL, 3308, "mysql.sql"),
+]
+
+
+def split_script(script: str) -> List[str]:
+    lines = [e for e in script.splitlines() if not e.strip().startswith("--")]
+    return [e.strip() for e in "\n".join(lines).split(";") if e.strip()]
+
+
+@pytest.fixture(scope="module", params=SERVERS, ids=lambda e: e[0].value)
+def connection(request):
+    """
+    Схема из test_sql_sripts в базе из docker-compose.yaml; без базы тест пропускается
+    """
+    dialect, port, script_name = request.param
+    if not all(os.environ.get(e) for e in ("DB_USER", "DB_PASSWORD", "DB_DEFAULT")):
+        pytest.skip("Не заданы DB_USER, DB_PASSWORD и DB_DEFAULT")
+
+    db_url = DatabaseURL(dialect, os.environ["DB_USER"], os.environ["DB_PASSWORD"],
+                         os.environ.get("DB_HOST", "localhost"), port, os.environ["DB_DEFAULT"])
+    connection = Connection(db_url)
+    with open(os.path.join(SCRIPTS_PATH, script_name), encoding="utf-8") as f:
+        statements = split_script(f.read()) + [EXTRA_TYPES_SQL]
+
+    try:
+        with connection.engine.begin() as conn:
+            conn.exec_driver_sql(f"DROP DATABASE IF EXISTS {PARITY_SCHEMA}")
+            conn.exec_driver_sql(f"CREATE DATABASE {PARITY_SCHEMA} DEFAULT CHARACTER SET utf8mb4")
+            conn.exec_driver_sql(f"USE {PARITY_SCHEMA}")
+            for statement in statements:
+                conn.exec_driver_sql(statement)
+    except (OperationalError, ProgrammingError) as ex:
+        connection.close()
+        pytest.skip(f"{dialect.value} недоступен: {ex}")
+
+    yield connection
+
+    with connection.engine.begin() as conn:
+        conn.exec_driver_sql(f"DROP DATABASE IF EXISTS {PARITY_SCHEMA}")
+    connection.close()
+
+
+def test_native_matches_sqlalchemy(connection):
+    native = MySQLDatabaseSchemaInspector(connection, [PARITY_SCHEMA]).get_tables()
+    with warnings.catch_warnings():
+        # SQLAlchemy предупреждает о GEOMETRY, который отражается как NullType
+        warnings.simplefilter("ignore")
+        generic = SQLAlchemyDatabaseSchemaInspector(connection, schemas=[PARITY_SCHEMA]).get_tables()
+
+    native_tables = {table.qualified_name: table for table in native}
+    generic_tables = {table.qualified_name: table for table in generic}
+    assert native_tables.keys() == generic_tables.keys()
+    for name, table in generic_tables.items():
+        assert native_tables[name].columns == table.columns, name
+        assert sorted(native_tables[name].relations, key=repr) == sorted(table.relations, key=repr), name
@@ -0,0 +1,95 @@
+import os
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from src.main.persistence import Connection, DatabaseURL, Dialect, SQLAlchemyDatabaseSchemaInspector
+from src.main.persistence.postgresql_inspector import PostgreSQLDatabaseSchemaInspector, map_pg_type
+
+SCRIPT_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "..", "test_sql_sripts", "postgresql.sql")
+PARITY_SCHEMA = "inspector_parity"
+
+# Типы, написание которых у pg_catalog и SQLAlchemy расходится сильнее всего
+EXTRA_TYPES_SQL = """
+CREATE TYPE mood AS ENUM ('happy', 'indifferent');
+CREATE DOMAIN email AS VARCHAR(100);
+CREATE TABLE type_samples
+(
+    id          BIGSERIAL PRIMARY KEY,
+    user_id     INTEGER REFERENCES users (id),
+    code        CHAR(3) UNIQUE,
+    amount      NUMERIC(10),
+    created_at  TIMESTAMP(3) WITH TIME ZONE,
+    duration    INTERVAL DAY TO SECOND,
+    flags       BIT VARYING(8),
+    seats       INT4RANGE,
+    target      REGCLASS,
+    document    XML,
+    location    POINT,
+    state       mood,
+    contact     email,
+    tags        TEXT[],
+    matrix      INTEGER[][],
+    UNIQUE (user_id, code)
+);
+"""
+
+
+@pytest.fixture(scope="module")
+def connection():
+    """
+    Схема из test_sql_sripts/postgresql.sql в базе из docker-compose.yaml; без базы тест пропускается
+    """
+    if not all(os.environ.get(e) for e in ("DB_USER", "DB_PASSWORD", "DB_DEFAULT")):
+        pytest.skip("Не заданы DB_USER, DB_PASSWORD и DB_DEFAULT")
+
+    db_url = DatabaseURL(Dialect.POSTGRESQL, os.environ["DB_USER"], os.environ["DB_PASSWORD"],
+                         os.environ.get("DB_HOST", "localhost"), int(os.environ.get("DB_PORT", 5433)),
+                         os.environ["DB_DEFAULT"])
+    connection = Connection(db_url)
+    with open(SCRIPT_PATH, encoding="utf-8") as f:
+        script = f.read()
+
+    try:
+        with connection.engine.begin() as conn:
+            conn.exec_driver_sql(f"DROP SCHEMA IF EXISTS {PARITY_SCHEMA} CASCADE")
+            conn.exec_driver_sql(f"CREATE SCHEMA {PARITY_SCHEMA}")
+            conn.exec_driver_sql(f"SET LOCAL search_path TO {PARITY_SCHEMA}")
+            conn.exec_driver_sql(script)
+            conn.exec_driver_sql(EXTRA_TYPES_SQL)
+    except OperationalError as ex:
+        connection.close()
+        pytest.skip(f"PostgreSQL недоступен: {ex}")
+
+    yield connection
+
+    with connection.engine.begin() as conn:
+        conn.exec_driver_sql(f"DROP SCHEMA IF EXISTS {PARITY_SCHEMA} CASCADE")
+    connection.close()
+
+
+def test_native_matches_sqlalchemy(connection):
+    native = PostgreSQLDatabaseSchemaInspector(connection, [PARITY_SCHEMA]).get_tables()
+    generic = SQLAlchemyDatabaseSchemaInspector(connection, schemas=[PARITY_SCHEMA]).get_tables()
+
+    native_tables = {table.qualified_name: table for table in native}
+    generic_tables = {table.qualified_name: table for table in generic}
+    assert native_tables.keys() == generic_tables.keys()
+    for name, table in generic_tables.items():
+        assert native_tables[name].columns == table.columns, name
+        assert sorted(native_tables[name].relations, key=repr) == sorted(table.relations, key=repr), name
+
+
+def test_map_pg_type():
+    assert map_pg_type('character varying(50)') == 'VARCHAR(50)'
+    assert map_pg_type('numeric(10,2)') == 'NUMERIC(10, 2)'
+    assert map_pg_type('numeric(10)') == 'NUMERIC'
+    assert map_pg_type('timestamp(3) with time zone') == 'TIMESTAMP'
+    assert map_pg_type('interval day to second') == 'INTERVAL'
+    assert map_pg_type('bit varying(8)') == 'BIT'
+    assert map_pg_type('int4range') == 'INT4RANGE'
+    assert map_pg_type('regclass') == 'REGCLASS'
+    assert map_pg_type('xml') == 'NULL'
+    assert map_pg_type('integer[]') == 'ARRAY'
+    assert map_pg_type('email', is_domain=True) == 'DOMAIN'
+    assert map_pg_type('mood', enum_length=11) == 'VARCHAR(11)'
@@ -0,0 +1,39 @@
+import os
+
+from src.main.core import Table, Column
+from src.main.persistence import SchemaCache, DatabaseURL, Dialect
+
+
+def test_schema_cache_roundtrip(tmp_path):
+    cache = SchemaCache(directory=str(tmp_path))
+    db_url = DatabaseURL(Dialect.POSTGRESQL, "user", "secret", "localhost", 5432, "db")
+    tables = [Table(name="users", columns=[Column(name="id", type="INTEGER", is_primary_key=True)], relations=[])]
+
+    snapshot = cache.put(db_url, tables, {"users": "1"})
+
+    cached = cache.get(db_url)
+    assert cached.tables == tables
+    assert cached.fingerprint == snapshot.fingerprint
+
+
+def test_schema_cache_malformed_entry_is_miss(tmp_path):
+    cache = SchemaCache(directory=str(tmp_path))
+    db_url = DatabaseURL(Dialect.POSTGRESQL, "user", "secret", "localhost", 5432, "db")
+    cache.put(db_url, [], {})
+    path = os.path.join(str(tmp_path), os.listdir(str(tmp_path))[0])
+    with open(path, "w") as f:
+        f.write('{"tables": []}')
+
+    assert cache.get(db_url) is None
+
+
+def test_schema_cache_write_failure_is_ignored(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    cache = SchemaCache(directory=str(blocker / "schemas"))
+    db_url = DatabaseURL(Dialect.POSTGRESQL, "user", "secret", "localhost", 5432, "db")
+
+    snapshot = cache.put(db_url, [], {})
+
+    assert snapshot.tables == []
+    assert cache.get(db_url) is None
@@ -0,0 +1,52 @@
+import gzip
+import json
+
+import pytest
+
+from src.main.core import Table, Column
+from src.main.persistence import SnapshotError, create_snapshot, export_snapshot, load_snapshot, iter_snapshot
+
+
+def write_snapshot(path, table_count: int = 50) -> None:
+    tables = [
+        Table(name=f"table_{i}", columns=[Column(name="id", type="INTEGER", is_primary_key=True)], relations=[])
+        for i in range(table_count)
+    ]
+    export_snapshot(str(path), create_snapshot(tables))
+
+
+def test_snapshot_roundtrip(tmp_path):
+    path = tmp_path / "schema.jsonl.gz"
+    write_snapshot(path)
+
+    snapshot = load_snapshot(str(path))
+
+    assert [e.name for e in snapshot.tables] == [f"table_{i}" for i in range(50)]
+
+
+def test_truncated_snapshot(tmp_path):
+    path = tmp_path / "schema.jsonl.gz"
+    write_snapshot(path, 2000)
+    data = path.read_bytes()
+    path.write_bytes(data[:len(data) // 2])
+
+    with pytest.raises(SnapshotError):
+        list(iter_snapshot(str(path)))
+
+
+def test_not_gzip_snapshot(tmp_path):
+    path = tmp_path / "schema.jsonl.gz"
+    path.write_bytes(b"not a gzip file")
+
+    with pytest.raises(SnapshotError):
+        load_snapshot(str(path))
+
+
+@pytest.mark.parametrize("version", ["1", None, 1.5, True, 2])
+def test_unsupported_snapshot_version(tmp_path, version):
+    path = tmp_path / "schema.jsonl.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write(json.dumps(dict(format="structura-snapshot", version=version)) + "\n")
+
+    with pytest.raises(SnapshotError):
+        load_snapshot(str(path))
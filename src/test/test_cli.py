@@ -0,0 +1,21 @@
+from src.main.cli import get_target_names
+from src.main.persistence import Dialect
+
+
+def test_target_names_are_unique():
+    database = dict(dialect=Dialect.POSTGRESQL, host="localhost", port=5432, user="user", password="secret",
+                    database="shop")
+    targets = [
+        database,
+        dict(database, schemas=["sales"]),
+        dict(snapshot="a/shop@localhost_5432.jsonl.gz"),
+        dict(snapshot="b/Shop@localhost_5432.jsonl.gz"),
+        dict(snapshot="shop@localhost_5432-2.jsonl.gz"),
+    ]
+
+    names = get_target_names(targets)
+
+    assert names == [
+        "shop@localhost_5432", "shop@localhost_5432-2", "shop@localhost_5432-3", "Shop@localhost_5432-4",
+        "shop@localhost_5432-2-2"
+    ]
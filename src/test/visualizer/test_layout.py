@@ -0,0 +1,71 @@
+import os
+import stat
+import sys
+import textwrap
+import time
+
+import pytest
+from graphviz import Digraph
+
+from src.main.core import Progress, OperationCancelled
+from src.main.visualizer import LayoutEngine, LayoutTimeout, run_layout, layout_timeouts
+from src.main.visualizer.layout import POLL_INTERVAL
+from src.main.visualizer.visualizer import render_graph
+
+
+@pytest.fixture
+def slow_engine(tmp_path, monkeypatch):
+    """
+    Подменяет dot скриптом, который отвечает содержимым stdin через delay секунд, заданных в DOT
+    """
+    script = tmp_path / LayoutEngine.DOT.value
+    script.write_text(textwrap.dedent(f"""\
+        #!{sys.executable}
+        import sys, time
+        data = sys.stdin.buffer.read()
+        time.sleep(float(data.split(b"delay=")[1].split(b";")[0]))
+        sys.stdout.buffer.write(data)
+    """))
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", str(tmp_path) + os.pathsep + os.environ["PATH"])
+
+
+def test_layout_longer_than_poll_interval(slow_engine):
+    source = "digraph { delay=0.7; " + "a -> b; " * 20000 + "}"
+
+    assert run_layout(source, LayoutEngine.DOT) == source.encode("utf-8")
+
+
+def test_layout_timeout(slow_engine):
+    with pytest.raises(LayoutTimeout):
+        run_layout("digraph { delay=5; }", LayoutEngine.DOT, timeout=0.5)
+
+
+def test_layout_cancel(slow_engine):
+    progress = Progress()
+    progress.cancel()
+
+    with pytest.raises(OperationCancelled):
+        run_layout("digraph { delay=5; }", LayoutEngine.DOT, progress=progress)
+
+
+def test_layout_deadline(slow_engine):
+    with pytest.raises(LayoutTimeout):
+        run_layout("digraph { delay=5; }", LayoutEngine.DOT, deadline=time.monotonic() + 0.5)
+
+
+def test_remembered_timeout_skips_layout(slow_engine):
+    layout_timeouts.clear()
+    graph = Digraph(engine=LayoutEngine.DOT.value)
+    graph.body.append("delay=5;")
+    with pytest.raises(LayoutTimeout):
+        render_graph(graph, timeout=0.5)
+
+    start = time.monotonic()
+    with pytest.raises(LayoutTimeout):
+        render_graph(graph, timeout=0.5)
+    assert time.monotonic() - start < POLL_INTERVAL
+
+    # Запомненный таймаут не затрагивает другой DOT
+    graph.body[-1] = "delay=0;"
+    assert render_graph(graph, timeout=0.5)
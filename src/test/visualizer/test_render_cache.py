@@ -0,0 +1,59 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from src.main.visualizer import RenderCache
+
+
+def disk_bytes(directory) -> int:
+    return sum(os.path.getsize(os.path.join(directory, e)) for e in os.listdir(directory) if e.endswith(".svgz"))
+
+
+def test_disk_tier_survives_memory_clear(tmp_path):
+    cache = RenderCache(directory=str(tmp_path))
+    cache.put("a", b"<svg>a</svg>")
+    cache.clear()
+
+    assert cache.get("a") == b"<svg>a</svg>"
+    assert cache.get("b") is None
+
+
+def test_disk_size_is_tracked_incrementally(tmp_path):
+    data = [os.urandom(1000) for _ in range(10)]
+    cache = RenderCache(directory=str(tmp_path), max_disk_bytes=4000)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(lambda e: cache.put(f"key{e}", data[e]), range(10)))
+
+    assert cache.disk_size == disk_bytes(tmp_path)
+    assert cache.disk_size <= 4000
+    assert not [e for e in os.listdir(tmp_path) if e.endswith(".tmp")]
+
+    # Новый экземпляр восстанавливает размер диска по каталогу
+    reopened = RenderCache(directory=str(tmp_path), max_disk_bytes=4000)
+    reopened.put("extra", data[0])
+    assert reopened.disk_size == disk_bytes(tmp_path) <= 4000
+
+
+def test_unwritable_directory_disables_disk_tier(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    cache = RenderCache(directory=str(blocker / "renders"))
+
+    cache.put("a", b"<svg>a</svg>")
+
+    assert not cache.disk_enabled
+    assert cache.get("a") == b"<svg>a</svg>"
+
+
+def test_corrupted_entry_is_miss(tmp_path):
+    cache = RenderCache(directory=str(tmp_path))
+    cache.put("a", b"<svg>a</svg>")
+    path = tmp_path / "a.svgz"
+    data = path.read_bytes()
+    # Заголовок gzip цел, а сжатые данные испорчены: gzip бросает zlib.error
+    path.write_bytes(data[:10] + b"\xff" * (len(data) - 10))
+    cache.clear()
+
+    assert cache.get("a") is None
+    assert not path.exists()
+    assert cache.disk_size == 0